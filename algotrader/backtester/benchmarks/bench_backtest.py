@@ -0,0 +1,75 @@
+"""
+Throughput of the backtest engine (src/portfolio/engine.py) on synthetic
+candles, against the target of 10k configurations x 100k bars in under a
+minute on one core. The positions are random regimes of --hold bars, with
+costs and stop-loss/take-profit exits on. --stats also times the
+statistics of every column (src/portfolio/stats.py) computed in column
+chunks, and the ranking of the columns. Run from the backtester directory:
+
+    python -m benchmarks.bench_backtest --bars 100000 --columns 10000 --stats
+
+The positions take bars x columns bytes, 1 GB for the target.
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.indicators import kernels
+from src.portfolio import simulate, simulate_statistics, top
+from benchmarks.synthetic import make_ohlcv
+
+TARGET_SECONDS = 60
+TARGET_CELLS = 10_000 * 100_000
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--bars', type=int, default=100_000)
+    p.add_argument('--columns', type=int, default=10_000)
+    p.add_argument('--symbols', type=int, default=10)
+    p.add_argument('--hold', type=int, default=50, help='Bars between position changes')
+    p.add_argument('--repeat', type=int, default=1)
+    p.add_argument('--stats', action='store_true', help='Also time the statistics and ranking')
+    args = p.parse_args()
+
+    candles = make_ohlcv(args.bars, args.symbols)
+    prices = [candles[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+    rng = np.random.default_rng(0)
+    regimes = rng.integers(-1, 2, (args.bars // args.hold + 1, args.columns), dtype=np.int8)
+    positions = np.repeat(regimes, args.hold, axis=0)[:args.bars]
+    symbols = np.arange(args.columns) % args.symbols
+    options = {'spread': 1e-4, 'commission': 2e-5, 'stop_loss': 0.01, 'take_profit': 0.02,
+               'record': False}
+
+    simulate(*(a[:10] for a in prices), positions[:10], symbols, **options)    # compile
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        _, _, equity, trades = simulate(*prices, positions, symbols, **options)
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    cells = args.bars * args.columns
+    print(f"{args.columns} columns x {args.bars} bars on {args.symbols} symbols "
+          f"({'numba' if kernels.available() else 'Python loop'}): {seconds:.2f} s, "
+          f"{seconds / cells * 1e9:.1f} ns per bar and column, "
+          f"{trades.sum() / args.columns:.0f} trades per column")
+    print(f"Target of {TARGET_SECONDS} s for {TARGET_CELLS:.0e} bars x columns: "
+          f"{seconds / cells * TARGET_CELLS:.1f} s at this rate")
+
+    if args.stats:
+        del options['record']
+        start = time.perf_counter()
+        stats = simulate_statistics(*prices, positions, symbols, **options)
+        middle = time.perf_counter()
+        best = top(stats, 'sharpe', 10)
+        end = time.perf_counter()
+        print(f"With the statistics: {middle - start:.2f} s, ranking {end - middle:.4f} s, "
+              f"best Sharpe {stats['sharpe'][best[0]]:.3f} per bar")
+
+
+if __name__ == '__main__':
+    main()
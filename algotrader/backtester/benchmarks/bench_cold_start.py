@@ -0,0 +1,57 @@
+"""
+Measure the imports the backtester pays before it can log in, and the ones
+the warm-up moves after login, with ``python -X importtime`` in fresh
+interpreters. Run from the backtester directory:
+
+    python -m benchmarks.bench_cold_start --repeat 5 --top 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Everything websocket_client needs up to sending the login
+LOGIN = "import websocket_client"
+# What the warm-up thread (or the first get-indicator) imports on top of that
+WARM_UP = ("import websocket_client, importlib, src.indicators as I\n"
+           "[importlib.import_module(m) for m in I.WARM_UP_MODULES]\n"
+           "[I.INDICATORS[name] for name in I.INDICATORS]")
+
+
+def import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per top-level import of code."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    args = p.parse_args()
+
+    for label, code in (('login', LOGIN), ('login + warm-up', WARM_UP)):
+        runs = [import_times(code) for _ in range(args.repeat)]
+        totals = [sum(times.values()) for times in runs]
+        print(f"{label}: {statistics.median(totals) / 1e6:.3f} s of imports "
+              f"(median of {args.repeat}, min {min(totals) / 1e6:.3f} s)")
+
+        modules = {name: statistics.median(times.get(name, 0) for times in runs)
+                   for name in runs[0]}
+        for name, micros in sorted(modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {micros / 1e3:9.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare the "db" (HTTP + JSON) and "pg" (direct binary COPY) candle feeds.
+
+Needs the database accessor API and Postgres to be reachable with the
+settings from .env. Run from the backtester directory:
+
+    python -m benchmarks.bench_feeds --symbols EURUSD,GBPUSD --timeframe 1 --repeat 3
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pandas.testing as pdt
+import src.data as Data
+
+
+def time_feed(feed: str, symbol_ids: list[int], timeframe: int, repeat: int, **kwargs):
+    timings = []
+    df = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = Data.get_candles(feed, symbol_ids, timeframe, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings), df
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--symbols', required=True, help='Comma-separated symbols, e.g. EURUSD,GBPUSD')
+    p.add_argument('--timeframe', type=int, default=1, help='Timeframe in minutes')
+    p.add_argument('--start', default=None)
+    p.add_argument('--end', default=None)
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    symbol_ids = Data.get_symbol_id(args.symbols.split(','))
+    kwargs = {'start_date': args.start, 'end_date': args.end}
+
+    db_time, db_df = time_feed('db', symbol_ids, args.timeframe, args.repeat, **kwargs)
+    pg_time, pg_df = time_feed('pg', symbol_ids, args.timeframe, args.repeat, **kwargs)
+
+    pdt.assert_frame_equal(db_df.astype(float), pg_df, check_freq=False)
+
+    print(f"{len(db_df)} bars x {len(symbol_ids)} symbols, timeframe {args.timeframe}")
+    print(f"db: {db_time:8.3f} s")
+    print(f"pg: {pg_time:8.3f} s  ({db_time / pg_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
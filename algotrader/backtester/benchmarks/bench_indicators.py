@@ -0,0 +1,155 @@
+"""
+Time and peak memory of every registered indicator's run, and of run_multi
+against calling run for every symbol, on synthetic candles (see
+synthetic.py) from 1e3 to 1e7 bars and 1 to 100 symbols.
+
+The results are written as JSON with the commit they were measured on, so a
+later run can be compared with them. Run from the backtester directory:
+
+    python -m benchmarks.bench_indicators --bars 1e3 1e5 --symbols 1 10
+    python -m benchmarks.bench_indicators --compare benchmarks/results/indicators-<commit>.json
+
+Sizes above --max-cells (bars x symbols) are skipped. Peak memory is what
+tracemalloc sees allocated on top of the candles, numpy and pandas included.
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import os
+import time
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+import src.indicators as Indicators
+from benchmarks.synthetic import make_ohlcv
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+# The indicators with a run_multi
+MULTI = ['Simple Moving Average', 'Relative Strength Index', 'Bollinger Bands',
+         'Moving Average Convergence Divergence']
+
+
+def defaults(indicator) -> dict:
+    parameters = indicator.info()['parameters']
+    return {name: parameter['default'] for name, parameter in parameters.items()}
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cases(bars: int, symbols: int, names: list[str]):
+    """(case, indicator, function) to measure on bars x symbols candles."""
+    panel = make_ohlcv(bars, symbols)
+    if symbols == 1:
+        candles = Data.get(panel.copy(), 'SYM0')
+        for name in names:
+            indicator = Indicators.INDICATORS[name]
+            if indicator.info().get('inputs'):
+                continue
+            yield ('run', name,
+                   lambda indicator=indicator: indicator.run(candles, **defaults(indicator)))
+
+    singles = [Data.get(panel, symbol) for symbol in panel['close'].columns]
+    for name in (name for name in MULTI if name in names):
+        indicator = Indicators.INDICATORS[name]
+        parameters = defaults(indicator)
+        yield 'run per symbol', name, lambda: [indicator.run(df, **parameters) for df in singles]
+        yield 'run_multi', name, lambda: indicator.run_multi(panel, **parameters)
+
+
+def compare(results: list[dict], baseline: dict, tolerance: float) -> None:
+    old = {(r['case'], r['indicator'], r['bars'], r['symbols']): r for r in baseline['results']}
+    print(f"\nAgainst {baseline.get('commit')} ({baseline.get('created')}), "
+          f"slower or larger than {tolerance}x flagged")
+    for r in results:
+        before = old.get((r['case'], r['indicator'], r['bars'], r['symbols']))
+        if before is None:
+            continue
+        time_ratio = r['seconds'] / before['seconds']
+        memory_ratio = r['peak_bytes'] / max(before['peak_bytes'], 1)
+        flag = ' <--' if time_ratio > tolerance or memory_ratio > tolerance else ''
+        print(f"{r['indicator'][:40]:40s} {r['case']:15s} {r['bars']:>9d} x {r['symbols']:<3d} "
+              f"time {time_ratio:6.2f}x  memory {memory_ratio:6.2f}x{flag}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--bars', type=float, nargs='+', default=[1e3, 1e4, 1e5, 1e6, 1e7])
+    p.add_argument('--symbols', type=int, nargs='+', default=[1, 10, 100])
+    p.add_argument('--max-cells', type=float, default=1e7, help='Largest bars x symbols to run')
+    p.add_argument('--indicators', nargs='+', default=None, help='Registry names, all by default')
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--output', default=None,
+                   help='JSON file, benchmarks/results/indicators-<commit>.json by default')
+    p.add_argument('--compare', default=None, help='JSON file of an earlier run')
+    p.add_argument('--tolerance', type=float, default=1.2)
+    args = p.parse_args()
+
+    names = args.indicators or list(Indicators.INDICATORS)
+    results = []
+    for bars in (int(b) for b in args.bars):
+        for symbols in args.symbols:
+            if bars * symbols > args.max_cells:
+                continue
+            for case, name, fn in cases(bars, symbols, names):
+                fn()    # warm up caches and compilation
+                result = {'case': case, 'indicator': name, 'bars': bars, 'symbols': symbols,
+                          'seconds': best_of(args.repeat, fn), 'peak_bytes': peak_bytes(fn)}
+                results.append(result)
+                print(f"{name[:40]:40s} {case:15s} {bars:>9d} x {symbols:<3d} "
+                      f"{result['seconds']:9.4f} s {result['peak_bytes'] / 1e6:9.1f} MB")
+
+    report = {
+        'commit': commit(),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    name = f"indicators-{report['commit'] or 'unknown'}.json"
+    output = args.output or os.path.join(RESULTS, name)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f), args.tolerance)
+
+
+if __name__ == '__main__':
+    main()
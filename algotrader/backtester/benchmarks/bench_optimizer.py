@@ -0,0 +1,59 @@
+"""
+Scaling of the parameter optimizer (src/portfolio/optimizer.py) with the
+number of worker processes, on synthetic candles and a moving average
+crossover grid. Run from the backtester directory:
+
+    python -m benchmarks.bench_optimizer --bars 100000 --symbols 10 --workers 1 2 4 8
+
+The speedup is against the first --workers count. It stays below the
+number of cores the machine actually has.
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.data import CandlePanel
+from src.portfolio.optimizer import Optimizer
+from benchmarks.synthetic import make_ohlcv
+
+
+def crossover(candles, fast: int, slow: int):
+    close = candles['close']
+    return np.sign(close.rolling(fast).mean() - close.rolling(slow).mean()).fillna(0)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--bars', type=int, default=100_000)
+    p.add_argument('--symbols', type=int, default=10)
+    p.add_argument('--fast', type=int, nargs='+', default=list(range(5, 50, 5)))
+    p.add_argument('--slow', type=int, nargs='+', default=[100, 150, 200, 250])
+    p.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = p.parse_args()
+
+    panel = CandlePanel.from_frame(make_ohlcv(args.bars, args.symbols))
+    space = {'fast': args.fast, 'slow': args.slow}
+    print(f"{len(args.fast) * len(args.slow)} combinations x {args.symbols} symbols "
+          f"x {args.bars} bars, {os.cpu_count()} cores")
+
+    # Compile the kernels first, for this process and for the shared arrays of the workers
+    for workers in (1, 2):
+        Optimizer(crossover, {'fast': [5, 10], 'slow': [20]}, workers=workers, spread=1e-4,
+                  stop_loss=0.01).run(panel.slice(0, 100))
+    baseline = None
+    for workers in args.workers:
+        optimizer = Optimizer(crossover, space, workers=workers, spread=1e-4, stop_loss=0.01)
+        start = time.perf_counter()
+        result = optimizer.run(panel)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        best = result['Sharpe'].idxmax()
+        print(f"{workers:3d} workers: {seconds:7.2f} s, {len(result) / seconds:8.1f} columns/s, "
+              f"speedup {baseline / seconds:5.2f}x, best {best}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Throughput of the Monte Carlo resampling (src/portfolio/robustness.py) of
+one backtested column of synthetic candles, for every method. Run from the
+backtester directory:
+
+    python -m benchmarks.bench_robustness --bars 100000 --resamples 10000 --workers 1 2
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.portfolio import simulate
+from src.portfolio.robustness import METHODS, monte_carlo
+from benchmarks.synthetic import make_ohlcv
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--bars', type=int, default=100_000)
+    p.add_argument('--resamples', type=int, default=10_000)
+    p.add_argument('--hold', type=int, default=50, help='Bars between position changes')
+    p.add_argument('--workers', type=int, nargs='+', default=[1])
+    p.add_argument('--max-bytes', type=int, default=2 ** 26)
+    args = p.parse_args()
+
+    candles = make_ohlcv(args.bars, 1)
+    prices = [candles[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+    rng = np.random.default_rng(0)
+    positions = np.repeat(rng.integers(-1, 2, (args.bars // args.hold + 1, 1), dtype=np.int8),
+                          args.hold, axis=0)[:args.bars]
+    returns, held, _, trades = simulate(*prices, positions, spread=1e-4)
+    print(f"{args.resamples} resamples of {args.bars} bars, {trades[0]} trades, "
+          f"{os.cpu_count()} cores")
+
+    for method in METHODS:
+        for workers in args.workers:
+            start = time.perf_counter()
+            result = monte_carlo(returns[:, 0], held[:, 0], method, args.resamples, seed=0,
+                                 workers=workers, max_bytes=args.max_bytes)
+            seconds = time.perf_counter() - start
+            low, high = np.percentile(result['max_drawdown'] * 100, [5, 95])
+            print(f"{method:>9} {workers:3d} workers: {seconds:7.2f} s, "
+                  f"{args.resamples / seconds:9.0f} resamples/s, "
+                  f"max drawdown 5-95% {low:.1f}-{high:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare run_multi over a (symbols x parameters) grid with calling run for
+every symbol and parameter value, and the sweep planner with computing each
+parameter combination on its own.
+
+Uses synthetic candles, no database needed. Run from the backtester directory:
+
+    python -m benchmarks.bench_run_multi --symbols 50 --bars 5000
+"""
+import argparse
+import sys
+import os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.data as Data
+from src.indicators import SMA, RSI, BBANDS, MACD
+from src.indicators.sweep import Sweep
+from benchmarks.synthetic import make_ohlcv
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--symbols', type=int, default=50)
+    p.add_argument('--bars', type=int, default=5000)
+    p.add_argument('--repeat', type=int, default=3)
+    p.add_argument('--naive-symbols', type=int, default=5,
+                   help='Symbols the per-symbol loop runs on, scaled up to --symbols')
+    args = p.parse_args()
+
+    data = make_ohlcv(args.bars, args.symbols, timeframe=1)
+    singles = [Data.get(data, symbol) for symbol in data['close'].columns[:args.naive_symbols]]
+    scale = args.symbols / len(singles)
+
+    lengths = list(range(2, 102))
+    # 10 fast x 10 slow lengths, 100 combinations
+    fast, slow = list(range(2, 12)), list(range(20, 30))
+    cases = [
+        ('SMA', lambda: SMA.run_multi(data, 'close', lengths),
+         lambda df: [SMA.run(df, 'close', l) for l in lengths]),
+        ('RSI', lambda: RSI.run_multi(data, 'close', lengths),
+         lambda df: [RSI.run(df, 'close', l) for l in lengths]),
+        ('BBANDS', lambda: BBANDS.run_multi(data, lengths, 'close', 2.0),
+         lambda df: [BBANDS.run(df, l, 'close', 2) for l in lengths]),
+        ('MACD', lambda: MACD.run_multi(data, fast, slow, 'close', 9),
+         lambda df: [MACD.run(df, f, s, 'close', 9) for f in fast for s in slow]),
+    ]
+
+    print(f"{args.bars} bars x {args.symbols} symbols x 100 parameter values")
+    for name, multi, naive in cases:
+        multi_time = best_of(args.repeat, multi)
+        naive_time = best_of(1, lambda: [naive(df) for df in singles]) * scale
+        print(f"{name:7s} run_multi: {multi_time:8.3f} s   per-symbol run: {naive_time:8.3f} s"
+              f"  ({naive_time / multi_time:.1f}x)")
+
+    # Sweep planner: shared primitives against each combination on its own
+    sweeps = [
+        (MACD, {'fast_length': fast, 'slow_length': slow, 'signal_smoothing': 9}),
+        (BBANDS, {'length': list(range(2, 27)), 'std': [1.0, 1.5, 2.0, 2.5]}),
+    ]
+    for indicator, grid in sweeps:
+        sweep = Sweep(indicator, grid)
+        sweep.run(data, compare=True)
+        r = sweep.report
+        print(f"{indicator.__name__:7s} sweep: {r['primitives']} of {r['naive_primitives']} "
+              f"primitives, {r['seconds']:8.3f} s vs {r['naive_seconds']:8.3f} s  "
+              f"({r['speedup']:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare the PSAR, SuperTrend and ZigZag kernels and Aroon's rolling argmax
+with the implementations they replaced (kept in
+test/indicators/test_user_indicators.py).
+
+The old loops take minutes on 100k bars, so they run on --legacy-bars and
+are compared per bar. Run from the backtester directory:
+
+    python -m benchmarks.bench_user_kernels --bars 100000 --legacy-bars 5000
+"""
+import argparse
+import sys
+import os
+import time
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# The legacy implementations live with their test ("test" is taken by the standard library)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test',
+                                                'indicators')))
+
+from src.indicators import user_indicators as ui
+from src.indicators import kernels
+from test_user_indicators import (make_candles, legacy_aroon, legacy_psar, legacy_supertrend,
+                                  legacy_zigzag)
+
+
+def per_bar(fn, df, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        data = df.copy()
+        start = time.perf_counter()
+        fn(data)
+        timings.append(time.perf_counter() - start)
+    return min(timings) / len(df)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--bars', type=int, default=100_000)
+    p.add_argument('--legacy-bars', type=int, default=5000)
+    p.add_argument('--repeat', type=int, default=3)
+    args = p.parse_args()
+
+    data = make_candles(args.bars)
+    legacy_data = data.iloc[:args.legacy_bars]
+    # Each with how it runs without numba
+    cases = [
+        ('PSAR', ui.PSAR, legacy_psar, mock.patch.object(kernels, 'psar', kernels.psar.py_func)),
+        ('SuperTrend', ui.SuperTrend, legacy_supertrend,
+         mock.patch.object(kernels, 'supertrend', kernels.supertrend.py_func)),
+        ('ZigZag', ui.ZigZag, legacy_zigzag,
+         mock.patch.object(kernels, 'zigzag', kernels.zigzag.py_func)),
+        ('Aroon', ui.Aroon, legacy_aroon,
+         mock.patch.object(kernels, 'available', return_value=False)),
+    ]
+
+    print(f"kernels on {args.bars} bars, legacy loops on {len(legacy_data)} bars")
+    for name, indicator, legacy, without_numba in cases:
+        indicator(data.iloc[:100].copy())    # compile
+        compiled = per_bar(indicator, data, args.repeat)
+        with without_numba:
+            python = per_bar(indicator, data, 1)
+
+        old = per_bar(legacy, legacy_data, 1)
+        print(f"{name:10s} legacy: {old * args.bars:8.2f} s   numba: {compiled * args.bars:8.4f} s"
+              f" ({old / compiled:7.0f}x)   no numba: {python * args.bars:8.3f} s"
+              f" ({old / python:5.0f}x)"
+              f"   (per {args.bars} bars)")
+
+
+if __name__ == '__main__':
+    main()
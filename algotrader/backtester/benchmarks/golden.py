@@ -0,0 +1,143 @@
+"""
+Golden outputs of every registered indicator and every user_indicators
+function on seeded synthetic candles, kept in test/indicators/golden.npz and
+checked by test/indicators/test_golden.py.
+
+The file holds the candles too, so the goldens do not depend on the
+generator. Indicators with a plan are recorded from the node graph, so
+writing them needs no pandas_ta. After a change that is meant to alter
+outputs, review the differences and write the file again. Run from the
+backtester directory:
+
+    python -m benchmarks.golden            # compare with the file
+    python -m benchmarks.golden --write    # record the current outputs
+"""
+import argparse
+import inspect
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+import src.indicators as Indicators
+from src.indicators import user_indicators as ui
+from src.indicators.graph import evaluate
+from benchmarks.synthetic import FIELDS, make_ohlcv
+
+GOLDEN = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'test', 'indicators',
+                                      'golden.npz'))
+BARS = 300
+RTOL = 1e-9
+# The candles of the indicators with inputs, e.g. Currency Strength
+PANEL = ['EURUSD', 'USDJPY', 'USDCHF', 'GBPUSD', 'AUDUSD', 'USDCAD', 'NZDUSD']
+# user_indicators column -> candle field
+MID = {'mid_o': 'open', 'mid_h': 'high', 'mid_l': 'low', 'mid_c': 'close', 'volume': 'volume'}
+
+
+def make_inputs() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """The candles of one symbol, and of the PANEL symbols with (field, symbol) columns."""
+    candles = make_ohlcv(BARS, ['SYM0'], seed=1).droplevel(1, axis=1)
+    return candles, make_ohlcv(BARS, PANEL, seed=2)
+
+
+def defaults(indicator) -> dict:
+    parameters = indicator.info()['parameters']
+    return {name: parameter['default'] for name, parameter in parameters.items()}
+
+
+def user_functions() -> dict:
+    """The indicator functions of user_indicators by name."""
+    return {name: function for name, function in inspect.getmembers(ui, inspect.isfunction)
+            if function.__module__ == ui.__name__ and not name.startswith('_')}
+
+
+def indicator_outputs(name: str, candles: pd.DataFrame, panel: pd.DataFrame,
+                      use_plan: bool = True) -> pd.DataFrame:
+    """
+    A registered indicator with its default parameters, on the node graph if
+    use_plan and it has a plan.
+    """
+    indicator = Indicators.INDICATORS[name]
+    data = panel if indicator.info().get('inputs') else candles
+    parameters = defaults(indicator)
+    if use_plan and hasattr(indicator, 'plan'):
+        return evaluate(data, [indicator.plan(**parameters)])[0]
+    return indicator.run(data, **parameters)
+
+
+def user_outputs(name: str, candles: pd.DataFrame) -> pd.DataFrame:
+    """The columns a user_indicators function adds to the mid_* candles."""
+    df = pd.DataFrame({column: candles[field].to_numpy() for column, field in MID.items()},
+                      index=candles.index)
+    result = user_functions()[name](df)
+    return result.drop(columns=list(MID))
+
+
+def compute(candles: pd.DataFrame, panel: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Every golden output, keyed 'indicator|<name>|<column>' and 'user|<function>|<column>'."""
+    outputs = {}
+    for name in Indicators.INDICATORS:
+        for column, values in indicator_outputs(name, candles, panel).items():
+            outputs[f'indicator|{name}|{column}'] = values.to_numpy()
+    for name in user_functions():
+        for column, values in user_outputs(name, candles).items():
+            outputs[f'user|{name}|{column}'] = values.to_numpy()
+    return outputs
+
+
+def load() -> tuple[pd.DataFrame, pd.DataFrame, dict[str, np.ndarray]]:
+    """The candles, panel and outputs of the golden file."""
+    with np.load(GOLDEN) as golden:
+        arrays = dict(golden)
+    index = pd.DatetimeIndex(arrays.pop('timestamp').view('datetime64[ns]'), name='timestamp')
+    candles = pd.DataFrame({field: arrays.pop(f'candles|{field}') for field in FIELDS}, index=index)
+    panel = pd.concat({field: pd.DataFrame({symbol: arrays.pop(f'panel|{field}|{symbol}')
+                                            for symbol in PANEL}, index=index)
+                       for field in FIELDS}, axis=1)
+    return candles, panel, arrays
+
+
+def write() -> None:
+    candles, panel = make_inputs()
+    arrays = {'timestamp': candles.index.asi8}
+    arrays.update({f'candles|{field}': candles[field].to_numpy() for field in FIELDS})
+    arrays.update({f'panel|{field}|{symbol}': panel[(field, symbol)].to_numpy()
+                   for field in FIELDS for symbol in PANEL})
+    arrays.update(compute(candles, panel))
+    np.savez_compressed(GOLDEN, **arrays)
+
+
+def differences(expected: dict, outputs: dict) -> list[str]:
+    """The outputs that are missing, new or not within RTOL of expected."""
+    lines = [f"missing: {key}" for key in expected if key not in outputs]
+    lines += [f"new: {key}" for key in outputs if key not in expected]
+    for key in expected.keys() & outputs.keys():
+        a, b = expected[key], outputs[key]
+        if a.dtype.kind == 'f':
+            same = a.shape == b.shape and np.allclose(b, a, rtol=RTOL, atol=0, equal_nan=True)
+        else:
+            same = np.array_equal(a, b)
+        if not same:
+            lines.append(f"changed: {key}")
+    return sorted(lines)
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--write', action='store_true', help='Record the current outputs')
+    args = p.parse_args()
+
+    if args.write:
+        write()
+        print(f"Wrote {GOLDEN}")
+        return
+
+    candles, panel, expected = load()
+    lines = differences(expected, compute(candles, panel))
+    print('\n'.join(lines) or f"All {len(expected)} outputs match")
+    sys.exit(1 if lines else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Seeded synthetic candles for the benchmarks, the tests and the golden
+indicator outputs.
+
+Prices follow a geometric Brownian motion per symbol. Like market data, the
+bars skip the weekends and a few random bars, and the price gaps over those:
+the open of the next bar moves by the volatility of the time without bars.
+"""
+import numpy as np
+import pandas as pd
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def make_index(bars: int, timeframe: int = 60, start: str = '2024-01-01', missing: float = 0.002,
+               rng: np.random.Generator = None, weekends: bool = False) -> pd.DatetimeIndex:
+    """
+    Bar timestamps every timeframe minutes from start, without Saturdays and
+    Sundays unless weekends and with a fraction missing of the bars left out
+    at random.
+    """
+    rng = np.random.default_rng(0) if rng is None else rng
+    step = np.timedelta64(timeframe, 'm')
+    # Enough candidates for the weekends and missing bars, at least a week
+    candidates = int(bars / (5 / 7) / (1 - missing) * 1.05) + 7 * 24 * 60 // timeframe + 1
+    first = np.datetime64(pd.Timestamp(start).to_datetime64(), 'm')
+    timestamps = first + np.arange(candidates) * step
+
+    # 1970-01-01 was a Thursday
+    weekday = (timestamps.astype('datetime64[D]').view(np.int64) + 3) % 7
+    keep = ((weekday < 5) | weekends) & (rng.random(candidates) >= missing)
+    timestamps = timestamps[keep][:bars]
+    if len(timestamps) < bars:
+        raise ValueError(f"Could not make {bars} bars")
+    return pd.DatetimeIndex(timestamps.astype('datetime64[ns]'), name='timestamp')
+
+
+def make_ohlcv(bars: int, symbols: int | list[str] = 1, timeframe: int = 60, seed: int = 0,
+               start: str = '2024-01-01', volatility: float = 0.1, drift: float = 0.0,
+               missing: float = 0.002, weekends: bool = False, dtype=np.float64) -> pd.DataFrame:
+    """
+    Synthetic OHLCV candles of one or more symbols.
+
+    Parameters:
+        bars (int): The number of bars.
+        symbols (int | list[str]): The symbol names, or how many symbols to
+            name SYM0, SYM1, ...
+        timeframe (int): The timeframe in minutes.
+        seed (int): The seed, the same arguments always give the same candles.
+        start (str): The first day.
+        volatility (float): The annual volatility of the log prices.
+        drift (float): The annual drift of the log prices.
+        missing (float): The fraction of bars left out at random.
+        weekends (bool): Keep the bars of Saturdays and Sundays.
+        dtype: The dtype of the columns.
+
+    Returns:
+        pd.DataFrame: Candles with (field, symbol) columns like Data.get_candles,
+        indexed by timestamp.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f'SYM{i}' for i in range(symbols)] if isinstance(symbols, int) else list(symbols)
+    index = make_index(bars, timeframe, start, missing, rng, weekends)
+
+    # Volatility per bar, and per time without bars before each bar
+    sigma = volatility * np.sqrt(timeframe / (365 * 24 * 60))
+    bar = timeframe * 60 * 10 ** 9
+    steps = np.diff(index.asi8, prepend=index.asi8[0] - bar) / bar
+    gap_sigma = sigma * np.sqrt(np.maximum(steps - 1, 0))[:, None]
+    mu = (drift / (365 * 24 * 60) * timeframe - sigma ** 2 / 2)
+
+    shape = (bars, len(names))
+    start_prices = np.exp(rng.normal(0, 1, len(names)))
+    gaps = gap_sigma * rng.standard_normal(shape)
+    moves = mu + sigma * rng.standard_normal(shape)
+    log_close = np.log(start_prices) + np.cumsum(gaps + moves, axis=0)
+    log_open = log_close - moves
+
+    close, open_ = np.exp(log_close), np.exp(log_open)
+    wicks = sigma / 2 * np.abs(rng.standard_normal((2, *shape)))
+    fields = {
+        'open': open_,
+        'high': np.maximum(open_, close) * np.exp(wicks[0]),
+        'low': np.minimum(open_, close) * np.exp(-wicks[1]),
+        'close': close,
+        'volume': np.round(rng.lognormal(5, 1, shape)),
+    }
+
+    columns = pd.MultiIndex.from_product([FIELDS, names])
+    values = np.concatenate([fields[field] for field in FIELDS], axis=1).astype(dtype, copy=False)
+    return pd.DataFrame(values, index=index, columns=columns)
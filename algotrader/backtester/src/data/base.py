@@ -1,83 +1,287 @@
 from src.data.feeds.databaseAccessor import Database
+from src.data.feeds.fileFeed import FileFeed
+from src.data.markets import MarketCache
+from src.data.panel import CandlePanel
+from src.data.synthetic import SYNTHETICS, PRICE_COLUMNS, SyntheticCache, is_synthetic
+from src.data.timeframes import bar_start, can_resample, resample_candles
+from decouple import config
+import numpy as np
 import pandas as pd
 
+# dtypes candles can be returned in, see get_candles
+CANDLE_DTYPES = ('float64', 'float32')
 
-def get(df: pd.DataFrame, symbol: str = None) -> pd.DataFrame:
+
+def get(df: pd.DataFrame | CandlePanel, symbol: str = None) -> pd.DataFrame | CandlePanel:
     """
-    Retrieve data for a specific symbol from a DataFrame.
+    Retrieve data for a specific symbol from a DataFrame or CandlePanel.
 
     Parameters:
-        df (pd.DataFrame): The DataFrame containing the data.
+        df (pd.DataFrame | CandlePanel): The DataFrame or panel containing the data.
         symbol (str, optional): The symbol to filter the data by. Defaults to None.
 
     Returns:
-        pd.DataFrame: The filtered DataFrame if a symbol is provided, otherwise the original DataFrame.
+        pd.DataFrame | CandlePanel: The filtered DataFrame if a symbol is provided, otherwise the
+            original data. A panel holding a single symbol is returned as that symbol's DataFrame.
     """
 
+    if isinstance(df, CandlePanel):
+        if symbol:
+            return df.frame(symbol)
+        if len(df.symbols) == 1:
+            return df.frame(df.symbols[0])
+        return df
+
     if symbol:
-        sliced_df = df.copy()
-        sliced_df = sliced_df[sliced_df.columns[sliced_df.columns.get_level_values(
-            1) == symbol]]
-        sliced_df.columns = sliced_df.columns.droplevel(1)
-        return sliced_df
+        return df.xs(symbol, axis=1, level=1)
     else:
         if isinstance(df.columns, pd.MultiIndex) and len(df.columns.levels[1]) == 1:
             df.columns = df.columns.droplevel(1)
         return df
 
 
-def get_symbol_id(symbols: list[str]) -> list[int]:
+def get_symbol_id(symbols: list[str]) -> list[int | str]:
     """
     Retrieve the unique identifier for each symbol in the provided list.
+    All symbols are resolved in one batch from the markets cache. Synthetic
+    instruments that are not stored in the database keep their name as ID.
     Args:
         symbols (list[str]): A list of symbol strings for which to retrieve IDs.
     Returns:
-        list[int]: A list of unique identifiers corresponding to the provided symbols.
+        list[int | str]: A list of unique identifiers corresponding to the provided symbols.
     """
     symbol_ids = []
-    for symbol in symbols:
-        symbol_id = Database.get_symbol_id(symbol)
+    for symbol, symbol_id in zip(symbols, MarketCache.get_symbol_ids(symbols)):
         if symbol_id:
             symbol_ids.append(symbol_id)
+        elif is_synthetic(symbol):
+            symbol_ids.append(symbol)
     return symbol_ids
 
 
-def get_candles(feed: str, symbol_ids: list[int], timeframe: int, start_date=None, end_date=None) -> pd.DataFrame:
+def get_market(symbol_id: int) -> tuple[str, str, float] | None:
+    """
+    Retrieve (symbol, exchange, min_move) for a symbol ID from the markets cache.
+    Args:
+        symbol_id (int): The symbol ID to look up.
+    Returns:
+        tuple[str, str, float] | None: The market, or None if it does not exist.
+    """
+    return MarketCache.get_market(symbol_id)
+
+
+def candle_dtype(dtype=None) -> np.dtype:
+    """
+    The dtype to return candles in: dtype if given, else the CANDLE_DTYPE setting
+    (default float64).
+    """
+    dtype = dtype or config('CANDLE_DTYPE', default='float64')
+    if np.dtype(dtype).name not in CANDLE_DTYPES:
+        raise ValueError(f"Unsupported candle dtype '{dtype}', use one of {list(CANDLE_DTYPES)}")
+    return np.dtype(dtype)
+
+
+def get_candles(feed: str, symbol_ids: list[int | str], timeframe: int, start_date=None,
+                end_date=None, columns: list[str] = None, dtype=None,
+                limit: int = None) -> pd.DataFrame:
     """
     Retrieve candlestick data for given symbols and timeframe
 
     Parameters:
-        feed (str): The data source, e.g., "db".
-        symbol_ids (list[int]): List of symbol IDs to retrieve data for.
+        feed (str): The data source, "db" for the database API, "pg" for a direct
+            Postgres connection or "file" for local SYMBOL_TF.csv / .parquet files
+            in MT5_DATA_DIR.
+        symbol_ids (list[int | str]): List of symbol IDs to retrieve data for. Names
+            of synthetic instruments are computed from their legs. The "file" feed
+            also accepts symbol names.
         timeframe (int): The timeframe for the candlestick data.
         start_date (optional): The start date for the data retrieval.
         end_date (optional): The end date for the data retrieval.
+        columns (list[str], optional): Only return these of open, high, low, close
+            and volume. Defaults to all of them.
+        dtype (optional): "float64" or "float32", which halves the memory of the
+            candles and of the indicators computed on them. Defaults to the
+            CANDLE_DTYPE setting, float64 if it is not set.
+        limit (int, optional): Only the last limit candles (before end_date) of
+            every symbol.
 
     Returns:
         pd.DataFrame: A DataFrame containing the candlestick data with a MultiIndex for columns.
     """
+    dtype = candle_dtype(dtype)
+
+    synthetic_ids = [symbol_id for symbol_id in symbol_ids
+                     if _is_synthetic(feed, symbol_id, timeframe)]
+    stored_ids = [symbol_id for symbol_id in symbol_ids if symbol_id not in synthetic_ids]
+
+    candles = dict(zip(stored_ids, _get_stored_candles(
+        feed, stored_ids, timeframe, start_date, end_date, columns, dtype, limit)))
+
+    for name in synthetic_ids:
+        instrument = SYNTHETICS[name]
+        leg_ids = list(instrument.legs) if feed == "file" else \
+            MarketCache.get_symbol_ids(list(instrument.legs))
+        if None in leg_ids:
+            raise ValueError(f"Legs {list(instrument.legs)} of {name} do not all exist!")
+
+        # Combined from float64 legs, only the result is rounded
+        legs = _get_stored_candles(
+            feed, leg_ids, timeframe, start_date, end_date, PRICE_COLUMNS, limit=limit)
+        synthetic = SyntheticCache.get_candles(name, dict(legs))
+        candles[name] = (name, synthetic.astype(dtype, copy=False))
 
     all_dataframes = []
+    for symbol_id in symbol_ids:
+        symbol, df = candles[symbol_id]
+
+        if columns is not None:
+            df = df[columns]
+
+        df.columns = pd.MultiIndex.from_product([df.columns, [symbol]])
+
+        all_dataframes.append(df)
+
+    combined_df = pd.concat(all_dataframes, axis=1, copy=False)
+
+    return combined_df
+
+
+def _is_synthetic(feed: str, symbol_id: int | str, timeframe: int) -> bool:
+    """A symbol is synthetic if it is registered as such and not stored by the feed."""
+    if not is_synthetic(symbol_id):
+        return False
+    return feed != "file" or not FileFeed.exists(symbol_id, timeframe)
+
+
+def _get_stored_candles(feed: str, symbol_ids: list[int | str], timeframe: int, start_date=None,
+                        end_date=None, columns: list[str] = None,
+                        dtype=np.float64, limit: int = None) -> list[tuple[str, pd.DataFrame]]:
+    """Fetch (symbol, OHLCV frame) pairs for symbols stored by the feed, with dtype values."""
+    results = []
 
     if feed == "db":
         for symbol_id in symbol_ids:
-            symbol = Database.get_market(symbol_id)
+            symbol = MarketCache.get_market(symbol_id)
 
             if symbol is None:
                 raise ValueError(f"symbol_id {symbol_id} does not exist!")
 
             candles = Database.get_candles(
-                symbol_id, timeframe, start_date, end_date)
+                symbol_id, timeframe, start_date, end_date, limit)
             df = pd.DataFrame(data=candles, columns=[
                               'timestamp', 'open', 'high', 'low', 'close', 'volume'])
 
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             df.set_index('timestamp', inplace=True)
+            df = df.astype(dtype, copy=False)
+
+            results.append((symbol[0], df))
+
+    elif feed == "pg":
+        from src.data.feeds.postgresFeed import PostgresFeed
+
+        symbols = []
+        for symbol_id in symbol_ids:
+            symbol = MarketCache.get_market(symbol_id)
+
+            if symbol is None:
+                raise ValueError(f"symbol_id {symbol_id} does not exist!")
+            symbols.append(symbol[0])
+
+        frames = PostgresFeed.get_candles_many(
+            symbol_ids, timeframe, start_date, end_date, limit, dtype)
+        results.extend(zip(symbols, frames))
+
+    elif feed == "file":
+        for symbol_id in symbol_ids:
+            if isinstance(symbol_id, str):
+                symbol = symbol_id
+            else:
+                market = MarketCache.get_market(symbol_id)
+                if market is None:
+                    raise ValueError(f"symbol_id {symbol_id} does not exist!")
+                symbol = market[0]
+
+            df = FileFeed.get_candles(
+                symbol, timeframe, start_date, end_date, columns, dtype, limit)
+
+            results.append((symbol, df))
+
+    else:
+        raise ValueError(f"Unknown feed '{feed}'")
+
+    return results
 
-            df.columns = pd.MultiIndex.from_product([df.columns, [symbol[0]]])
 
-            all_dataframes.append(df)
+def get_range_candles(feed: str, symbol_ids: list[int | str], timeframe: int, start_date=None,
+                      end_date=None, warmup: int = 0, dtype=None) -> pd.DataFrame:
+    """
+    Retrieve candles like get_candles, from warmup bars before start_date, e.g.
+    the visible range of a chart and the bars its indicators need before it.
+
+    Parameters:
+        feed (str): The data source, see get_candles.
+        symbol_ids (list[int | str]): List of symbol IDs to retrieve data for.
+        timeframe (int): The timeframe for the candlestick data.
+        start_date (optional): The start of the range, moved back to the start
+            of its bar so the first bar is complete. The whole history if None.
+        end_date (optional): The end of the range.
+        warmup (int): The number of bars before the range to add.
+        dtype (optional): "float64" or "float32", see get_candles.
 
-        combined_df = pd.concat(all_dataframes, axis=1)
+    Returns:
+        pd.DataFrame: The candles with a MultiIndex for columns. Symbols with
+        less history have fewer warm-up bars.
+    """
+    if start_date is None:
+        return get_candles(feed, symbol_ids, timeframe, end_date=end_date, dtype=dtype)
 
-        return combined_df
+    start_date = bar_start(start_date, timeframe).isoformat()
+    candles = get_candles(feed, symbol_ids, timeframe, start_date, end_date, dtype=dtype)
+    if warmup:
+        history = get_candles(feed, symbol_ids, timeframe, end_date=start_date, dtype=dtype,
+                              limit=warmup)
+        candles = pd.concat([history, candles])
+    return candles
+
+
+def get_input_candles(feed: str, symbol_ids: list[int | str], data: pd.DataFrame, timeframe: int,
+                      input_timeframe: int) -> pd.DataFrame:
+    """
+    Candles of another timeframe for the symbols of data, e.g. to run an
+    indicator on H4 bars for an M15 chart (see align_to_timeframe).
+
+    Parameters:
+        feed (str): The feed data was loaded from.
+        symbol_ids (list[int | str]): The symbol IDs data was loaded for.
+        data (pd.DataFrame): Candles of timeframe, as returned by get_candles or get.
+        timeframe (int): The timeframe of data in minutes.
+        input_timeframe (int): The timeframe of the candles to return in minutes.
+
+    Returns:
+        pd.DataFrame: The candles in the layout of data. Derived from data when
+        its bars add up to input_timeframe bars, loaded from feed otherwise.
+    """
+    if input_timeframe == timeframe:
+        return data
+    if can_resample(timeframe, input_timeframe):
+        return resample_candles(data, input_timeframe)
+
+    dtype = np.float32 if len(data.columns) and (data.dtypes == np.float32).all() else np.float64
+    candles = get_candles(feed, symbol_ids, input_timeframe, dtype=dtype)
+    if not isinstance(data.columns, pd.MultiIndex):
+        candles.columns = candles.columns.droplevel(1)
+    return candles
+
+
+def get_candle_panel(feed: str, symbol_ids: list[int | str], timeframe: int, start_date=None,
+                     end_date=None, columns: list[str] = None, dtype=None) -> CandlePanel:
+    """
+    Retrieve candlestick data like get_candles, packed into a CandlePanel.
+
+    Returns:
+        CandlePanel: The candles as one (time x symbol x field) array of dtype.
+    """
+    dtype = candle_dtype(dtype)
+    return CandlePanel.from_frame(
+        get_candles(feed, symbol_ids, timeframe, start_date, end_date, columns, dtype), dtype)
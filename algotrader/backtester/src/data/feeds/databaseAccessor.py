@@ -44,6 +44,16 @@ class Database:
             log.error(f"Error getting symbol: {e}")
             return None
 
+    @staticmethod
+    def get_markets() -> List[dict]:
+        """Get all markets in a single request."""
+        try:
+            response = Database._make_request('GET', '/markets')
+            return response.json()
+        except Exception as e:
+            log.error(f"Error getting markets: {e}")
+            return None
+
     @staticmethod
     def get_symbol_id(symbol: str, exchange: str = None) -> int:
         """Get symbol_id by symbol and exchange."""
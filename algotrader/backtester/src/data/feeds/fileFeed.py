@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+from decouple import config
+
+log = logging.getLogger(__name__)
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+TIMEFRAME_NAMES = {
+    1: 'M1', 5: 'M5', 15: 'M15', 30: 'M30',
+    60: 'H1', 240: 'H4', 720: 'H12', 1440: 'D1',
+    10080: 'W1', 43200: 'MN1'
+}
+
+# Alternative file name suffixes written by older downloads
+TIMEFRAME_ALIASES = {
+    'D1': ['D'], 'H12': ['12H'], 'H4': ['4H'], 'H1': ['1H'], 'W1': ['W'], 'MN1': ['M', '1M']
+}
+
+
+class FileFeed:
+    """
+    Candle feed reading the SYMBOL_TF.csv / SYMBOL_TF.parquet files written by
+    tools/mt5_downloader.py.
+
+    On first use every source file is converted into a columnar store: one
+    ``.npy`` file per column inside ``<data_dir>/.columnar/SYMBOL_TF/``. Later
+    reads memory-map only the requested columns, so loading costs little more
+    than opening the files. The store is rebuilt whenever the source file
+    changes.
+    """
+
+    data_dir = None
+
+    @staticmethod
+    def _get_data_dir() -> str:
+        """Get the data directory from environment or use default."""
+        if FileFeed.data_dir is None:
+            FileFeed.data_dir = config(
+                'MT5_DATA_DIR', default=os.path.join('mt5_data', 'mt5_csv'))
+        return FileFeed.data_dir
+
+    @staticmethod
+    def _find_source(symbol: str, timeframe: int) -> str:
+        """Find the source file for symbol and timeframe (in minutes)."""
+        data_dir = FileFeed._get_data_dir()
+        tf_name = TIMEFRAME_NAMES.get(timeframe, str(timeframe))
+
+        for name in [tf_name] + TIMEFRAME_ALIASES.get(tf_name, []):
+            for ext in ('.parquet', '.csv'):
+                path = os.path.join(data_dir, f"{symbol}_{name}{ext}")
+                if os.path.exists(path):
+                    return path
+
+        raise FileNotFoundError(
+            os.path.join(data_dir, f"{symbol}_{tf_name}.csv"))
+
+    @staticmethod
+    def exists(symbol: str, timeframe: int) -> bool:
+        """Check if there is a file for symbol and timeframe (in minutes)."""
+        try:
+            FileFeed._find_source(symbol, timeframe)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _read_source(path: str) -> pd.DataFrame:
+        """Read a downloaded file into a DataFrame with lower case OHLCV columns."""
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+            if not isinstance(df.index, pd.DatetimeIndex):
+                df = df.set_index(df.columns[0])
+        else:
+            df = pd.read_csv(path)
+            time_col = 'time' if 'time' in df.columns else df.columns[0]
+            df = df.set_index(time_col)
+
+        df.index = pd.to_datetime(df.index)
+        df.columns = [str(col).lower() for col in df.columns]
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+
+        for col in COLUMNS:
+            if col not in df.columns:
+                df[col] = np.nan
+        return df[COLUMNS].apply(pd.to_numeric, errors='coerce')
+
+    @staticmethod
+    def _store_dir(path: str) -> str:
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(os.path.dirname(path), '.columnar', name)
+
+    @staticmethod
+    def _ensure_store(path: str) -> str:
+        """Convert the source file into the columnar store if it is missing or outdated."""
+        store = FileFeed._store_dir(path)
+        meta_path = os.path.join(store, 'meta.json')
+        stat = os.stat(path)
+        source = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                if json.load(f).get('source') == source:
+                    return store
+        except (OSError, ValueError):
+            pass
+
+        log.info(f"Building columnar store for {path}")
+        df = FileFeed._read_source(path)
+        os.makedirs(store, exist_ok=True)
+
+        timestamps = df.index.values.astype('datetime64[ns]').view(np.int64)
+        np.save(os.path.join(store, 'timestamp.npy'), timestamps)
+        for col in COLUMNS:
+            np.save(os.path.join(store, f'{col}.npy'),
+                    df[col].to_numpy(dtype=np.float64))
+
+        # Written last so an interrupted build is redone next time
+        tmp = meta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'source': source, 'rows': len(df)}, f)
+        os.replace(tmp, meta_path)
+
+        return store
+
+    @staticmethod
+    def get_candles(symbol: str, timeframe: int, start_date: str = None, end_date: str = None,
+                    columns: list[str] = None, dtype=np.float64, limit: int = None) -> pd.DataFrame:
+        """
+        Load candles for a symbol from the columnar store.
+
+        Parameters:
+            symbol (str): The symbol name, e.g. "EURUSD".
+            timeframe (int): The timeframe in minutes.
+            start_date (optional): Only candles at or after this date.
+            end_date (optional): Only candles before this date.
+            columns (list[str], optional): The columns to load. Defaults to all OHLCV columns.
+            dtype (optional): The dtype of the columns. Defaults to float64, the
+                dtype of the store.
+
+        Returns:
+            pd.DataFrame: The candles indexed by timestamp. float64 columns are
+            read-only views on the memory-mapped files, float32 columns are
+            converted while they are read.
+        """
+        columns = COLUMNS if columns is None else columns
+        unknown = [col for col in columns if col not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns {unknown}, available: {COLUMNS}")
+
+        store = FileFeed._ensure_store(FileFeed._find_source(symbol, timeframe))
+
+        timestamps = np.load(os.path.join(store, 'timestamp.npy'), mmap_mode='r')
+        start = 0
+        end = len(timestamps)
+        if start_date is not None:
+            start = np.searchsorted(timestamps, pd.Timestamp(start_date).value, side='left')
+        if end_date is not None:
+            end = np.searchsorted(timestamps, pd.Timestamp(end_date).value, side='left')
+        if limit:
+            start = max(start, end - limit)
+
+        index = pd.DatetimeIndex(
+            np.asarray(timestamps[start:end]).view('datetime64[ns]'), name='timestamp')
+        data = {
+            col: np.load(os.path.join(store, f'{col}.npy'),
+                         mmap_mode='r')[start:end].astype(dtype, copy=False)
+            for col in columns
+        }
+
+        return pd.DataFrame(data, index=index, copy=False)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from decouple import config
+
+try:
+    from shared.candle_queries import aggregated_candles_sql, to_positional
+except ImportError:
+    # Running from a checkout instead of the container, where ../shared is mounted
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                                 '..', '..', '..', '..')))
+    from shared.candle_queries import aggregated_candles_sql, to_positional
+
+log = logging.getLogger(__name__)
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# COPY ... (FORMAT binary) layout of one aggregated candle: int16 field count,
+# then int32 length + value for timestamp (int64 microseconds since 2000-01-01)
+# and the five float8 columns. All values are big endian.
+_ROW_DTYPE = np.dtype([
+    ('fields', '>i2'),
+    ('timestamp_len', '>i4'), ('timestamp', '>i8'),
+    *[field for col in COLUMNS for field in ((f'{col}_len', '>i4'), (col, '>f8'))]
+])
+_COPY_SIGNATURE = b'PGCOPY\n\xff\r\n\x00'
+_PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+
+
+class PostgresFeed:
+    """
+    Candle feed that queries Postgres directly, for backtesters running next to
+    the database.
+
+    It runs the same aggregation query as the database accessor API (from
+    shared/candle_queries.py) through a pooled asyncpg connection, but streams
+    the result with ``COPY ... (FORMAT binary)`` and decodes it with one
+    ``np.frombuffer`` call instead of building JSON, dicts and tuples per row.
+
+    The pool lives on a private event loop thread so the synchronous
+    ``get_candles`` can be called from anywhere, including coroutines running on
+    the websocket loop. Requires the optional ``asyncpg`` package.
+    """
+
+    _loop = None
+    _pool = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_loop() -> asyncio.AbstractEventLoop:
+        """Start the event loop thread owning the connection pool."""
+        with PostgresFeed._lock:
+            if PostgresFeed._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=loop.run_forever, name="PostgresFeedThread", daemon=True)
+                thread.start()
+                PostgresFeed._loop = loop
+            return PostgresFeed._loop
+
+    @staticmethod
+    async def _get_pool():
+        """Create the connection pool on first use."""
+        if PostgresFeed._pool is None:
+            try:
+                import asyncpg
+            except ImportError as e:
+                raise ImportError(
+                    "The 'pg' feed requires asyncpg: pip install asyncpg") from e
+
+            PostgresFeed._pool = await asyncpg.create_pool(
+                user=config('DB_USER', default='postgres'),
+                password=config('DB_PASSWORD', default='password'),
+                host=config('DB_HOST', default='timescaledb'),
+                port=config('DB_PORT', default=5432, cast=int),
+                database=config('DB_NAME', default='finance_data'),
+                min_size=1,
+                max_size=config('DB_POOL_SIZE', default=4, cast=int),
+            )
+            log.info("Created Postgres connection pool")
+        return PostgresFeed._pool
+
+    @staticmethod
+    def _run(coro):
+        """Run a coroutine on the feed's event loop and wait for the result."""
+        return asyncio.run_coroutine_threadsafe(coro, PostgresFeed._get_loop()).result()
+
+    @staticmethod
+    def decode_copy(buffer: bytes, dtype=np.float64) -> pd.DataFrame:
+        """
+        Decode the binary COPY output of the aggregation query.
+
+        Parameters:
+            buffer (bytes): The complete COPY stream, header and trailer included.
+            dtype (optional): The dtype of the OHLCV columns, e.g. float32 to
+                round the float8 values while they are converted anyway.
+
+        Returns:
+            pd.DataFrame: The candles indexed by timestamp.
+        """
+        if buffer[:len(_COPY_SIGNATURE)] != _COPY_SIGNATURE:
+            raise ValueError("Not a binary COPY stream")
+
+        extension = int.from_bytes(buffer[15:19], 'big')
+        start = 19 + extension
+        end = len(buffer) - 2  # int16 -1 trailer
+
+        rows = np.frombuffer(buffer, dtype=_ROW_DTYPE, offset=start,
+                             count=(end - start) // _ROW_DTYPE.itemsize)
+        lengths = [rows[f'{col}_len'] for col in ['timestamp'] + COLUMNS]
+        if (end - start) % _ROW_DTYPE.itemsize or (rows['fields'] != 6).any() \
+                or any((length != 8).any() for length in lengths):
+            raise ValueError("Unexpected row layout in COPY stream (NULL values?)")
+
+        timestamps = _PG_EPOCH + rows['timestamp'].astype(np.int64).astype('timedelta64[us]')
+        index = pd.DatetimeIndex(timestamps.astype('datetime64[ns]'), name='timestamp')
+
+        return pd.DataFrame({col: rows[col].astype(dtype) for col in COLUMNS}, index=index)
+
+    @staticmethod
+    async def _fetch(symbol_id: int, timeframe: int, start_date: str = None, end_date: str = None,
+                     limit: int = None, dtype=np.float64) -> pd.DataFrame:
+        pool = await PostgresFeed._get_pool()
+        query = to_positional(aggregated_candles_sql(limit=bool(limit)))
+        args = [
+            symbol_id,
+            timeframe,
+            datetime.fromisoformat(start_date) if start_date else None,
+            datetime.fromisoformat(end_date) if end_date else None,
+        ]
+        if limit:
+            args.append(limit)
+
+        chunks = []
+
+        async def collect(chunk):
+            chunks.append(chunk)
+
+        async with pool.acquire() as connection:
+            await connection.copy_from_query(query, *args, output=collect, format='binary')
+
+        df = PostgresFeed.decode_copy(b''.join(chunks), dtype)
+        return df.iloc[::-1] if limit else df
+
+    @staticmethod
+    def get_candles_many(symbol_ids: list[int], timeframe: int, start_date: str = None,
+                         end_date: str = None, limit: int = None,
+                         dtype=np.float64) -> list[pd.DataFrame]:
+        """
+        Get aggregated candles for several symbols, queried concurrently over the pool,
+        with dtype (float64 or float32) columns.
+
+        Returns:
+            list[pd.DataFrame]: One frame of OHLCV columns per symbol_id, indexed by timestamp.
+        """
+        async def fetch_all():
+            return await asyncio.gather(*[
+                PostgresFeed._fetch(symbol_id, timeframe, start_date, end_date, limit, dtype)
+                for symbol_id in symbol_ids
+            ])
+
+        return PostgresFeed._run(fetch_all())
+
+    @staticmethod
+    def get_candles(symbol_id: int, timeframe: int, start_date: str = None, end_date: str = None,
+                    limit: int = None, dtype=np.float64) -> pd.DataFrame:
+        """Get aggregated candles for one symbol, indexed by timestamp."""
+        return PostgresFeed.get_candles_many([symbol_id], timeframe, start_date, end_date, limit,
+                                             dtype)[0]
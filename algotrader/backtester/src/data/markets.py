@@ -0,0 +1,136 @@
+"""
+Process-wide cache of the markets table.
+"""
+import logging
+import threading
+import time
+from decouple import config
+from src.data.feeds.databaseAccessor import Database
+
+log = logging.getLogger(__name__)
+
+
+class MarketCache:
+    """
+    In-memory copy of the markets table shared by the whole process.
+
+    The table is loaded in bulk with a single ``GET /markets`` request and
+    reloaded once it is older than ``MARKETS_CACHE_TTL`` seconds. A lookup for
+    an unknown symbol triggers an early reload, at most once every
+    ``MARKETS_CACHE_MIN_REFRESH`` seconds, so newly added markets are picked up
+    without waiting for the TTL.
+    """
+
+    ttl = None
+    min_refresh = None
+
+    _lock = threading.RLock()
+    _by_id: dict[int, tuple[str, str, float]] = {}
+    _by_symbol: dict[str, list[tuple[str, int]]] = {}
+    _loaded_at = None
+
+    @staticmethod
+    def _get_settings() -> tuple[float, float]:
+        """Get the TTL settings from environment or use defaults."""
+        if MarketCache.ttl is None:
+            MarketCache.ttl = config('MARKETS_CACHE_TTL', default=300, cast=float)
+            MarketCache.min_refresh = config(
+                'MARKETS_CACHE_MIN_REFRESH', default=10, cast=float)
+        return MarketCache.ttl, MarketCache.min_refresh
+
+    @staticmethod
+    def refresh(force: bool = False) -> bool:
+        """
+        Reload the markets table if it is stale.
+
+        Parameters:
+            force (bool): Reload even if the cached copy is still fresh.
+
+        Returns:
+            bool: True if the cache was reloaded.
+        """
+        ttl, _ = MarketCache._get_settings()
+
+        with MarketCache._lock:
+            loaded_at = MarketCache._loaded_at
+            if not force and loaded_at is not None and time.monotonic() - loaded_at < ttl:
+                return False
+
+            markets = Database.get_markets()
+            if markets is None:
+                # Keep serving the previous copy, retry after min_refresh
+                if loaded_at is not None:
+                    MarketCache._loaded_at = time.monotonic() - ttl + MarketCache.min_refresh
+                return False
+
+            by_id = {}
+            by_symbol = {}
+            for market in markets:
+                symbol_id = market['symbol_id']
+                by_id[symbol_id] = (
+                    market['symbol'], market['exchange'], market.get('min_move'))
+                by_symbol.setdefault(market['symbol'], []).append(
+                    (market['exchange'], symbol_id))
+
+            MarketCache._by_id = by_id
+            MarketCache._by_symbol = by_symbol
+            MarketCache._loaded_at = time.monotonic()
+            log.info(f"Loaded {len(by_id)} markets")
+            return True
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached copy so the next lookup reloads it."""
+        with MarketCache._lock:
+            MarketCache._loaded_at = None
+
+    @staticmethod
+    def _refresh_on_miss() -> bool:
+        """Reload early after a cache miss, rate limited by min_refresh."""
+        _, min_refresh = MarketCache._get_settings()
+        loaded_at = MarketCache._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < min_refresh:
+            return False
+        return MarketCache.refresh(force=True)
+
+    @staticmethod
+    def get_market(symbol_id: int) -> tuple[str, str, float] | None:
+        """
+        Get (symbol, exchange, min_move) for a symbol_id.
+
+        Returns:
+            tuple[str, str, float] | None: The market, or None if it does not exist.
+        """
+        MarketCache.refresh()
+        market = MarketCache._by_id.get(symbol_id)
+        if market is None and MarketCache._refresh_on_miss():
+            market = MarketCache._by_id.get(symbol_id)
+        return market
+
+    @staticmethod
+    def get_symbol_ids(symbols: list[str], exchange: str = None) -> list[int | None]:
+        """
+        Resolve many symbol names at once.
+
+        Parameters:
+            symbols (list[str]): Symbol names to resolve.
+            exchange (str, optional): Only match markets on this exchange.
+
+        Returns:
+            list[int | None]: One symbol_id per symbol, None where no market matches.
+        """
+        MarketCache.refresh()
+        symbol_ids = MarketCache._lookup(symbols, exchange)
+        if None in symbol_ids and MarketCache._refresh_on_miss():
+            symbol_ids = MarketCache._lookup(symbols, exchange)
+        return symbol_ids
+
+    @staticmethod
+    def _lookup(symbols: list[str], exchange: str = None) -> list[int | None]:
+        by_symbol = MarketCache._by_symbol
+        symbol_ids = []
+        for symbol in symbols:
+            matches = [symbol_id for market_exchange, symbol_id in by_symbol.get(symbol, [])
+                       if exchange is None or market_exchange == exchange]
+            symbol_ids.append(matches[0] if matches else None)
+        return symbol_ids
@@ -0,0 +1,124 @@
+"""
+Compact time x symbol x field container for candle data.
+"""
+import numpy as np
+import pandas as pd
+
+
+class CandlePanel:
+    """
+    Candle data for many symbols stored in one contiguous 3-D array.
+
+    ``values[t, s, f]`` holds field ``fields[f]`` of symbol ``symbols[s]`` at
+    ``index[t]``. Per-symbol and per-field accessors return views on that array,
+    so slicing a panel never copies candle data.
+
+    ``panel['close']`` returns a (time x symbol) DataFrame and ``panel.columns``
+    mirrors the (field, symbol) MultiIndex of :func:`src.data.get_candles`, which
+    lets indicators, signals and ``Portfolio`` consume a panel wherever they
+    accept the wide DataFrame layout.
+    """
+
+    def __init__(self, values: np.ndarray, index: pd.Index, symbols: list[str], fields: list[str]):
+        values = np.asarray(values)
+        if values.ndim != 3:
+            raise ValueError(f"values must be 3-D (time, symbol, field), got {values.ndim}-D")
+        if values.shape != (len(index), len(symbols), len(fields)):
+            raise ValueError(
+                f"values shape {values.shape} does not match "
+                f"({len(index)}, {len(symbols)}, {len(fields)})")
+
+        self.values = values
+        self.index = index if isinstance(index, pd.Index) else pd.DatetimeIndex(index)
+        self.symbols = list(symbols)
+        self.fields = list(fields)
+        self._symbol_pos = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._field_pos = {field: i for i, field in enumerate(self.fields)}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=np.float64) -> 'CandlePanel':
+        """
+        Build a panel from a DataFrame with (field, symbol) MultiIndex columns.
+
+        Parameters:
+            df (pd.DataFrame): Frame as returned by get_candles.
+            dtype (optional): The dtype of the panel values. Defaults to float64.
+
+        Returns:
+            CandlePanel: The panel. Missing (field, symbol) pairs are NaN.
+        """
+        fields = df.columns.get_level_values(0).unique().to_list()
+        symbols = df.columns.get_level_values(1).unique().to_list()
+        columns = _symbol_major(fields, symbols)
+
+        if not df.columns.equals(columns):
+            df = df.reindex(columns=columns)
+        values = df.to_numpy(dtype=dtype).reshape(len(df), len(symbols), len(fields))
+
+        return cls(np.ascontiguousarray(values), df.index, symbols, fields)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert back to a DataFrame with (field, symbol) MultiIndex columns.
+
+        Columns are grouped by symbol like in get_candles, which makes the
+        frame a view on the panel values when they are contiguous.
+        """
+        block = self.values.reshape(len(self.index), -1)
+        return pd.DataFrame(block, index=self.index, columns=self.columns, copy=False)
+
+    @property
+    def columns(self) -> pd.MultiIndex:
+        """The (field, symbol) columns of the equivalent DataFrame."""
+        return _symbol_major(self.fields, self.symbols)
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.values.shape
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return (f"CandlePanel({len(self.index)} bars x {len(self.symbols)} symbols x "
+                f"{len(self.fields)} fields, dtype={self.values.dtype})")
+
+    def symbol(self, symbol: str) -> np.ndarray:
+        """(time x field) view on one symbol."""
+        return self.values[:, self._symbol_pos[symbol], :]
+
+    def field(self, field: str) -> np.ndarray:
+        """(time x symbol) view on one field."""
+        return self.values[:, :, self._field_pos[field]]
+
+    def series(self, field: str, symbol: str) -> pd.Series:
+        """One field of one symbol as a Series backed by the panel."""
+        values = self.values[:, self._symbol_pos[symbol], self._field_pos[field]]
+        return pd.Series(values, index=self.index, name=symbol, copy=False)
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """All fields of one symbol as a DataFrame backed by the panel."""
+        return pd.DataFrame(self.symbol(symbol), index=self.index, columns=self.fields, copy=False)
+
+    def __getitem__(self, field: str) -> pd.DataFrame:
+        """All symbols of one field as a DataFrame backed by the panel."""
+        return pd.DataFrame(self.field(field), index=self.index, columns=self.symbols, copy=False)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self._field_pos
+
+    def select(self, symbols: list[str]) -> 'CandlePanel':
+        """Panel restricted to some symbols (copies, since the selection is not a slice)."""
+        positions = [self._symbol_pos[symbol] for symbol in symbols]
+        return CandlePanel(self.values[:, positions, :], self.index, symbols, self.fields)
+
+    def slice(self, start: int = None, stop: int = None) -> 'CandlePanel':
+        """Panel restricted to the bars in [start, stop) by position, as a view."""
+        rows = slice(start, stop)
+        return CandlePanel(self.values[rows], self.index[rows], self.symbols, self.fields)
+
+
+def _symbol_major(fields: list[str], symbols: list[str]) -> pd.MultiIndex:
+    """(field, symbol) columns grouped by symbol, the order get_candles produces."""
+    return pd.MultiIndex.from_tuples(
+        [(field, symbol) for symbol in symbols for field in fields])
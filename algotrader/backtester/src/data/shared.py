@@ -0,0 +1,91 @@
+"""
+Candle panels in shared memory, read by worker processes without copies.
+"""
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from src.data.panel import CandlePanel
+
+# Blocks attached by this process, kept open while their panels are in use
+_attached: dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedPanel:
+    """
+    The values and timestamps of a CandlePanel in two shared memory blocks.
+
+    The process creating it owns the blocks and unlinks them on close().
+    Other processes attach with its spec, a small picklable dict, and get a
+    read-only CandlePanel on the same memory, e.g. in a pool initializer:
+
+        with SharedPanel(panel) as shared:
+            with Pool(initializer=init, initargs=(shared.spec,)) as pool:
+                ...
+
+        def init(spec):
+            global panel
+            panel = SharedPanel.attach(spec)
+    """
+
+    def __init__(self, panel: CandlePanel):
+        values = np.ascontiguousarray(panel.values)
+        timestamps = pd.DatetimeIndex(panel.index).asi8
+        self._blocks = [shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                        for array in (values, timestamps)]
+        for block, array in zip(self._blocks, (values, timestamps)):
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+
+        self.spec = {
+            'values': self._blocks[0].name, 'timestamps': self._blocks[1].name,
+            'shape': values.shape, 'dtype': values.dtype.str,
+            'tz': str(panel.index.tz) if getattr(panel.index, 'tz', None) else None,
+            'name': panel.index.name, 'symbols': list(panel.symbols), 'fields': list(panel.fields),
+        }
+        # Read-only here too, like the panels of the attached processes
+        self.panel = self._panel(self.spec, *self._blocks)
+
+    @staticmethod
+    def attach(spec: dict) -> CandlePanel:
+        """The read-only panel of spec, from the blocks another process created."""
+        blocks = []
+        for name in (spec['values'], spec['timestamps']):
+            if name not in _attached:
+                _attached[name] = shared_memory.SharedMemory(name=name)
+            blocks.append(_attached[name])
+        return SharedPanel._panel(spec, *blocks)
+
+    @staticmethod
+    def detach(spec: dict) -> None:
+        """Close this process' handles on the blocks of spec. Its panels must no longer be used."""
+        for name in (spec['values'], spec['timestamps']):
+            block = _attached.pop(name, None)
+            if block is not None:
+                block.close()
+
+    @staticmethod
+    def _panel(spec: dict, values_block, timestamps_block) -> CandlePanel:
+        values = np.ndarray(spec['shape'], np.dtype(spec['dtype']), buffer=values_block.buf)
+        values.flags.writeable = False
+        # The index is copied, it is small and pandas may keep references to it
+        timestamps = np.ndarray(spec['shape'][:1], np.int64, buffer=timestamps_block.buf).copy()
+        index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name=spec['name'])
+        if spec['tz']:
+            index = index.tz_localize('UTC').tz_convert(spec['tz'])
+        return CandlePanel(values, index, spec['symbols'], spec['fields'])
+
+    def close(self) -> None:
+        """
+        Release and unlink the blocks. Panels and frames on them must no longer
+        be referenced, else the blocks cannot be released (BufferError).
+        """
+        self.panel = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedPanel':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
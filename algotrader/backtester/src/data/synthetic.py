@@ -0,0 +1,171 @@
+"""
+Synthetic instruments derived from stored symbols.
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.data.version import data_version
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+class SyntheticInstrument:
+    """
+    An instrument computed from the candles of stored symbols (its legs).
+
+    ``kind='product'`` prices the instrument as the product of its legs raised to
+    their weights, which covers crosses and ratios (weight -1 divides). For
+    example EURGBP = EURUSD^1 * GBPUSD^-1.
+
+    ``kind='sum'`` prices it as the weighted sum of its legs, for spreads and
+    baskets, for example the spread XAUUSD - 80 * XAGUSD.
+
+    Open and close are exact. High and low cannot be recovered from the legs'
+    bars, so they are the bound implied by the legs' highs and lows (every leg
+    at its most favourable extreme), clipped to contain open and close. Volume
+    is NaN.
+    """
+
+    def __init__(self, name: str, legs: dict[str, float], kind: str = 'product'):
+        if kind not in ('product', 'sum'):
+            raise ValueError(f"Unknown kind '{kind}', expected 'product' or 'sum'")
+        if not legs:
+            raise ValueError("A synthetic instrument needs at least one leg")
+
+        self.name = name
+        self.legs = dict(legs)
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        return f"SyntheticInstrument({self.name!r}, {self.legs!r}, kind={self.kind!r})"
+
+    def compute(self, leg_data: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Compute the instrument's candles.
+
+        Parameters:
+            leg_data (dict[str, pd.DataFrame]): OHLC frames per leg symbol. Only
+                timestamps present in every leg are used.
+
+        Returns:
+            pd.DataFrame: open, high, low, close and volume indexed by timestamp.
+        """
+        index = None
+        for symbol in self.legs:
+            leg_index = leg_data[symbol].index
+            index = leg_index if index is None else index.intersection(leg_index)
+
+        shape = (len(index), len(self.legs))
+        prices = {col: np.empty(shape) for col in PRICE_COLUMNS}
+        for i, symbol in enumerate(self.legs):
+            leg = leg_data[symbol]
+            if not leg.index.equals(index):
+                leg = leg.reindex(index)
+            for col in PRICE_COLUMNS:
+                prices[col][:, i] = leg[col].to_numpy(dtype=np.float64)
+
+        weights = np.fromiter(self.legs.values(), dtype=np.float64, count=len(self.legs))
+        positive = weights > 0
+        # Highest / lowest value each leg can contribute
+        upper = np.where(positive, prices['high'], prices['low'])
+        lower = np.where(positive, prices['low'], prices['high'])
+
+        open_ = self._combine(prices['open'], weights)
+        close = self._combine(prices['close'], weights)
+        high = np.maximum(self._combine(upper, weights), np.maximum(open_, close))
+        low = np.minimum(self._combine(lower, weights), np.minimum(open_, close))
+
+        return pd.DataFrame({
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': np.full(len(index), np.nan),
+        }, index=index)
+
+    def _combine(self, values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Combine (time x leg) values into the instrument's price."""
+        if self.kind == 'product':
+            return np.prod(values ** weights, axis=1)
+        return values @ weights
+
+
+def _fx_crosses() -> dict[str, SyntheticInstrument]:
+    """The 21 crosses of the majors, derived from the seven USD pairs."""
+    usd_quoted = ['EUR', 'GBP', 'AUD', 'NZD']   # EURUSD, GBPUSD, ...
+    usd_based = ['CAD', 'CHF', 'JPY']           # USDCAD, USDCHF, ...
+    order = usd_quoted + usd_based              # market convention for the base currency
+
+    def in_usd(currency: str, sign: float) -> tuple[str, float]:
+        if currency in usd_quoted:
+            return f'{currency}USD', sign
+        return f'USD{currency}', -sign
+
+    crosses = {}
+    for i, base in enumerate(order):
+        for quote in order[i + 1:]:
+            name = f'{base}{quote}'
+            crosses[name] = SyntheticInstrument(name, dict([in_usd(base, 1), in_usd(quote, -1)]))
+    return crosses
+
+
+SYNTHETICS: dict[str, SyntheticInstrument] = _fx_crosses()
+
+
+def register_synthetic(instrument: SyntheticInstrument) -> None:
+    """Make a synthetic instrument available to get_candles under its name."""
+    SYNTHETICS[instrument.name] = instrument
+
+
+def is_synthetic(symbol) -> bool:
+    """Check if a symbol name refers to a registered synthetic instrument."""
+    return isinstance(symbol, str) and symbol in SYNTHETICS
+
+
+class SyntheticCache:
+    """
+    Process-wide LRU cache of computed synthetic candles, keyed by the
+    instrument and the data versions of its legs.
+    """
+
+    max_entries = 64
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def get_candles(name: str, leg_data: dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Compute a synthetic instrument, or return the cached result if its legs
+        did not change.
+
+        Parameters:
+            name (str): The synthetic instrument name.
+            leg_data (dict[str, pd.DataFrame]): OHLC frames per leg symbol.
+
+        Returns:
+            pd.DataFrame: open, high, low, close and volume indexed by timestamp.
+        """
+        instrument = SYNTHETICS[name]
+        key = (name, instrument.kind, tuple(instrument.legs.items()),
+               tuple(data_version(leg_data[symbol]) for symbol in instrument.legs))
+
+        with SyntheticCache._lock:
+            if key in SyntheticCache._entries:
+                SyntheticCache._entries.move_to_end(key)
+                return SyntheticCache._entries[key].copy(deep=False)
+
+        candles = instrument.compute(leg_data)
+
+        with SyntheticCache._lock:
+            SyntheticCache._entries[key] = candles
+            while len(SyntheticCache._entries) > SyntheticCache.max_entries:
+                SyntheticCache._entries.popitem(last=False)
+
+        return candles.copy(deep=False)
+
+    @staticmethod
+    def clear() -> None:
+        with SyntheticCache._lock:
+            SyntheticCache._entries.clear()
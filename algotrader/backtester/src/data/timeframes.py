@@ -0,0 +1,120 @@
+"""
+Candles and indicator values across timeframes.
+
+Bars follow the aggregation query of the feeds (shared/candle_queries.py): a
+bar of N minutes starts at a multiple of N minutes after midnight UTC and
+ends at the latest at midnight, so timeframes of a day or more are days.
+"""
+import numpy as np
+import pandas as pd
+
+MINUTE = 60 * 10 ** 9
+DAY = 24 * 60 * MINUTE
+
+# How each candle field is aggregated into longer bars, others take the last value
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def bar_starts(index: pd.DatetimeIndex, timeframe: int) -> np.ndarray:
+    """Start of the timeframe bar each timestamp falls in, as int64 nanoseconds since the epoch."""
+    ns = index.asi8
+    minute = ns % DAY // MINUTE
+    return ns - ns % DAY + (minute - minute % timeframe) * MINUTE
+
+
+def bar_ends(index: pd.DatetimeIndex, timeframe: int) -> np.ndarray:
+    """End (close time) of the timeframe bar each timestamp falls in, as int64 nanoseconds."""
+    starts = bar_starts(index, timeframe)
+    return np.minimum(starts + timeframe * MINUTE, starts - starts % DAY + DAY)
+
+
+def bar_start(timestamp, timeframe: int) -> pd.Timestamp:
+    """Start of the timeframe bar timestamp falls in, in the timezone of timestamp."""
+    timestamp = pd.Timestamp(timestamp)
+    start = pd.Timestamp(bar_starts(pd.DatetimeIndex([timestamp]), timeframe)[0])
+    return start.tz_localize('UTC').tz_convert(timestamp.tz) if timestamp.tz is not None else start
+
+
+def select_range(data: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    The rows of data at or after start_date and before end_date, like the
+    feeds select candles.
+    """
+    mask = np.ones(len(data), dtype=bool)
+    for date, keep in ((start_date, np.greater_equal), (end_date, np.less)):
+        if date is not None:
+            date = pd.Timestamp(date)
+            if (date.tz is None) != (data.index.tz is None):
+                # Naive timestamps are UTC
+                date = (date.tz_localize('UTC') if date.tz is None
+                        else date.tz_convert('UTC').tz_localize(None))
+            mask &= keep(data.index, date)
+    return data[mask]
+
+
+def can_resample(timeframe: int, input_timeframe: int) -> bool:
+    """Whether input_timeframe bars are made of whole timeframe bars."""
+    return input_timeframe > timeframe and (input_timeframe % timeframe == 0
+                                            or input_timeframe >= 24 * 60)
+
+
+def resample_candles(data: pd.DataFrame, timeframe: int) -> pd.DataFrame:
+    """
+    Aggregate candles into bars of a longer timeframe, like the feeds would.
+
+    Parameters:
+        data (pd.DataFrame): Candles of a timeframe that divides timeframe (see
+            can_resample), with (field, symbol) columns or a single symbol's fields.
+        timeframe (int): The timeframe of the bars in minutes.
+
+    Returns:
+        pd.DataFrame: The bars, indexed by their start and with the columns of
+        data. The last bar may still be forming.
+    """
+    starts = bar_starts(data.index, timeframe)
+    fields = (data.columns.get_level_values(0) if isinstance(data.columns, pd.MultiIndex)
+              else data.columns)
+    grouped = data.groupby(starts, sort=False)
+
+    parts = []
+    for aggregation in dict.fromkeys(AGGREGATIONS.values()):
+        columns = data.columns[[AGGREGATIONS.get(field, 'last') == aggregation for field in fields]]
+        if len(columns):
+            # Symbols without bars in a period get NaN, also for their volume
+            kwargs = {'min_count': 1} if aggregation == 'sum' else {}
+            parts.append(getattr(grouped[list(columns)], aggregation)(**kwargs))
+    bars = pd.concat(parts, axis=1).reindex(columns=data.columns)
+
+    index = pd.DatetimeIndex(bars.index.to_numpy().view('datetime64[ns]'), name=data.index.name)
+    if data.index.tz is not None:
+        index = index.tz_localize('UTC').tz_convert(data.index.tz)
+    return bars.set_axis(index)
+
+
+def align_to_timeframe(values: pd.DataFrame, timeframe: int, index: pd.DatetimeIndex,
+                       output_timeframe: int) -> pd.DataFrame:
+    """
+    Map values computed on timeframe bars onto the bars of another timeframe
+    without look-ahead: every output bar gets the values of the last timeframe
+    bar that closed at or before it did. Bars still forming at its close,
+    including the last one of values, are never seen.
+
+    Parameters:
+        values (pd.DataFrame): Indicator values indexed by the start of their timeframe bars.
+        timeframe (int): The timeframe of values in minutes.
+        index (pd.DatetimeIndex): The start of the output bars.
+        output_timeframe (int): The timeframe of the output bars in minutes.
+
+    Returns:
+        pd.DataFrame: The values indexed by index, NaN before the first closed bar.
+    """
+    if len(values) == 0:
+        return pd.DataFrame(np.nan, index=index, columns=values.columns)
+
+    positions = np.searchsorted(bar_ends(values.index, timeframe),
+                                bar_ends(index, output_timeframe), side='right') - 1
+    aligned = values.iloc[np.maximum(positions, 0)].set_axis(index)
+    if len(positions) and positions[0] < 0:
+        # positions is sorted, only a head of output bars comes before the first close
+        aligned = aligned.where(pd.Series(positions >= 0, index=index), axis=0)
+    return aligned
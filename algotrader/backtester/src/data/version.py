@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+
+def data_version(data: pd.DataFrame | pd.Series) -> tuple:
+    """
+    Cheap fingerprint of candle data, used as part of cache keys.
+
+    Closed bars never change, so the version only looks at the number of bars,
+    the first and last timestamp and the values of the last (possibly still
+    forming) bar. It changes whenever bars are appended or the last bar is
+    revised, and between the float32 and float64 candles of the same bars.
+
+    Parameters:
+        data (pd.DataFrame | pd.Series): Candle data indexed by timestamp.
+
+    Returns:
+        tuple: A hashable version.
+    """
+    if len(data) == 0:
+        return (0,)
+
+    row = np.asarray(data.iloc[-1])
+    last = np.ascontiguousarray(row, dtype=np.float64)
+    return (len(data), data.index[0], data.index[-1], row.dtype.str, hash(last.tobytes()))
@@ -1,9 +1,11 @@
 """
 Handler for indicator-related messages.
+
+src.data and the indicator cache (pandas and friends) are imported on the
+first get-indicator, or by Indicators.warm_up(), so they do not delay login.
 """
 import logging
 from .base import BaseHandler
-import src.data as Data
 import src.indicators as Indicators
 
 
@@ -40,30 +42,74 @@ class IndicatorHandler(BaseHandler):
 
     async def _handle_get_indicator(self, message: dict, websocket) -> None:
         """Handle get-indicator message."""
+        import src.data as Data
+        from src.data.timeframes import align_to_timeframe, select_range
+        from src.indicators.cache import IndicatorCache
+
         try:
             # Extract message data
             indicator_name = message['data']['name']
             symbol_id = message['data']['symbol_id']
             timeframe = message['data']['timeframe']
+            # Optionally computed on other bars, e.g. an H4 RSI on an M15 chart
+            input_timeframe = message['data'].get('input_timeframe') or timeframe
+            # Optionally only the visible {'start', 'end'} of the chart, and
+            # with exact=True the values of the whole history there
+            visible = message['data'].get('range')
+            exact = message['data'].get('exact', False)
             custom_parameters = message['data'].get('parameters', {})
 
             # Get indicator info and prepare parameters
-            indicator_info = Indicators.INDICATORS[indicator_name].info()
+            indicator = Indicators.INDICATORS[indicator_name]
+            indicator_info = indicator.info()
             parameters = self._prepare_parameters(
                 indicator_info, custom_parameters)
 
             self.logger.info(f"Parameters: {parameters}")
 
-            # Get data for the indicator
             symbol_ids = self._get_symbol_ids(indicator_info, symbol_id)
-            data = Data.get_candles('db', symbol_ids, timeframe)
-            data = Data.get(data)
-
-            # Run the indicator
             indicator_instance = Indicators.get_indicator_instance(
                 indicator_name)
-            indicator_data = indicator_instance.run(
-                data, **parameters).dropna()
+            warmup = Indicators.warmup_bars(indicator, parameters)
+            if (visible is not None and exact
+                    and Indicators.exact_lookback(indicator, parameters) is None):
+                warmup = None
+
+            start = end = None
+            if visible is not None:
+                start, end = visible.get('start'), visible.get('end')
+                if start is not None:
+                    # The first visible bar is the one start falls in
+                    start = Data.bar_start(start, timeframe)
+
+            if visible is None or warmup is None:
+                # Run the indicator on the whole history, or reuse / extend
+                # the cached result
+                data = Data.get(Data.get_candles('db', symbol_ids, timeframe))
+                input_data = Data.get_input_candles(
+                    'db', symbol_ids, data, timeframe, input_timeframe)
+                indicator_data = IndicatorCache.run(
+                    indicator_name, indicator_instance, input_data, parameters,
+                    symbol_ids, input_timeframe)
+            else:
+                # Only the visible bars and the warm-up before them
+                same_timeframe = input_timeframe == timeframe
+                data = Data.get(Data.get_range_candles(
+                    'db', symbol_ids, timeframe, start, end, warmup if same_timeframe else 0))
+                input_data = data if same_timeframe else Data.get(Data.get_range_candles(
+                    'db', symbol_ids, input_timeframe, start, end, warmup))
+                indicator_data = IndicatorCache.run(
+                    indicator_name, indicator_instance, input_data, parameters,
+                    symbol_ids, input_timeframe, cache=False)
+
+            # Values of another timeframe are shown once their bar has closed
+            if input_timeframe != timeframe:
+                indicator_data = align_to_timeframe(
+                    indicator_data, input_timeframe, data.index, timeframe)
+            if visible is not None:
+                indicator_data = select_range(indicator_data, start, end)
+            indicator_data = indicator_data.dropna()
+            self.logger.debug(f"Indicator cache: {IndicatorCache.stats()}")
 
             # Format the response
             indicator_reset = indicator_data.reset_index()
@@ -75,6 +121,8 @@ class IndicatorHandler(BaseHandler):
                 'type': 'indicator-info',
                 'data': {
                     'id': message['data'].get('id'),
+                    'input_timeframe': input_timeframe,
+                    'range': visible,
                     'indicator_info': indicator_info,
                     'indicator_data': indicator_reset.to_dict(orient='records')
                 }
@@ -98,8 +146,14 @@ class IndicatorHandler(BaseHandler):
 
     def _get_symbol_ids(self, indicator_info: dict, symbol_id: str) -> list:
         """Get symbol IDs based on indicator requirements."""
+        import src.data as Data
+
         input_data = indicator_info.get('inputs', None)
         if input_data is None:
             return [symbol_id]
-        else:
-            return Data.get_symbol_id(input_data)
+
+        symbol_ids = Data.get_symbol_id(input_data)
+        if len(symbol_ids) != len(input_data):
+            self.logger.warning(
+                f"Could not resolve all inputs {input_data}, got {symbol_ids}")
+        return symbol_ids
@@ -1,17 +1,224 @@
-from .sma import SMA
-from .rsi import RSI
-from .bbands import BBANDS
-from .macd import MACD
-from .currencyStrength import CURRENCY_STRENGTH
-
-INDICATORS = {
-    'Simple Moving Average': SMA,
-    'Relative Strength Index': RSI,
-    'Bollinger Bands': BBANDS,
-    'Moving Average Convergence Divergence': MACD,
-    'Currency Strength': CURRENCY_STRENGTH
+"""
+The indicator registry.
+
+REGISTRY holds where every indicator class lives and what is known about it
+without importing it, so listing the indicators imports no implementation
+(and neither pandas nor pandas_ta). INDICATORS maps the names to the classes,
+importing each module on the first lookup; warm_up() imports them all in the
+background instead, e.g. right after login.
+"""
+import importlib
+import logging
+import threading
+import time
+from collections.abc import Mapping
+
+log = logging.getLogger(__name__)
+
+# Indicator name -> 'module:class', and:
+#   float32_rtol: relative error of the outputs on float32 candles, against the
+#       same candles in float64 (see Data.get_candles). The computations run in
+#       float64 either way, so this is rounding the outputs to float32, twice
+#       where float32 sources are summed first. Enforced by test_float32.py.
+REGISTRY = {
+    'Simple Moving Average':
+        {'path': 'src.indicators.sma:SMA', 'float32_rtol': 2 ** -23},
+    'Relative Strength Index':
+        {'path': 'src.indicators.rsi:RSI', 'float32_rtol': 2 ** -23},
+    'Bollinger Bands':
+        {'path': 'src.indicators.bbands:BBANDS', 'float32_rtol': 2 ** -23},
+    'Moving Average Convergence Divergence':
+        {'path': 'src.indicators.macd:MACD', 'float32_rtol': 2 ** -23},
+    'Currency Strength':
+        {'path': 'src.indicators.currencyStrength:CURRENCY_STRENGTH', 'float32_rtol': 2 ** -23},
+    # Ported from user_indicators, see catalog.py
+    'Exponential Moving Average':
+        {'path': 'src.indicators.catalog:EMA', 'float32_rtol': 2 ** -23},
+    'Average True Range':
+        {'path': 'src.indicators.catalog:ATR', 'float32_rtol': 2 ** -23},
+    'Keltner Channels':
+        {'path': 'src.indicators.catalog:KeltnerChannels', 'float32_rtol': 2 ** -23},
+    'Stochastic Oscillator':
+        {'path': 'src.indicators.catalog:Stochastic', 'float32_rtol': 2 ** -23},
+    'Average Directional Index':
+        {'path': 'src.indicators.catalog:ADX', 'float32_rtol': 2 ** -23},
+    'On-Balance Volume':
+        {'path': 'src.indicators.catalog:OBV', 'float32_rtol': 2 ** -23},
+    'Volume Weighted Average Price':
+        {'path': 'src.indicators.catalog:VWAP', 'float32_rtol': 2 ** -23},
+    'Session High/Low':
+        {'path': 'src.indicators.catalog:SessionHighLow', 'float32_rtol': 2 ** -23},
+    'Opening Range':
+        {'path': 'src.indicators.catalog:OpeningRange', 'float32_rtol': 2 ** -23},
+    'Ichimoku Cloud':
+        {'path': 'src.indicators.catalog:Ichimoku', 'float32_rtol': 2 ** -23},
+    'Parabolic SAR':
+        {'path': 'src.indicators.catalog:PSAR', 'float32_rtol': 2 ** -23},
+    'Commodity Channel Index':
+        {'path': 'src.indicators.catalog:CCI', 'float32_rtol': 2 ** -23},
+    'Williams %R':
+        {'path': 'src.indicators.catalog:WilliamsR', 'float32_rtol': 2 ** -23},
+    'Chaikin Money Flow':
+        {'path': 'src.indicators.catalog:CMF', 'float32_rtol': 2 ** -23},
+    'Donchian Channels':
+        {'path': 'src.indicators.catalog:DonchianChannels', 'float32_rtol': 2 ** -23},
+    # The mid price of the bands is summed in float32
+    'SuperTrend':
+        {'path': 'src.indicators.catalog:SuperTrend', 'float32_rtol': 2 ** -22},
+    'Aroon':
+        {'path': 'src.indicators.catalog:Aroon', 'float32_rtol': 2 ** -23},
+    'ZigZag':
+        {'path': 'src.indicators.catalog:ZigZag', 'float32_rtol': 2 ** -23},
+    'Rate of Change':
+        {'path': 'src.indicators.catalog:ROC', 'float32_rtol': 2 ** -23},
+    'Money Flow Index':
+        {'path': 'src.indicators.catalog:MFI', 'float32_rtol': 2 ** -23},
+    'Bollinger Bands (Typical Price)':
+        {'path': 'src.indicators.catalog:BollingerBands', 'float32_rtol': 2 ** -23},
+    'Relative Strength Index (EWM)':
+        {'path': 'src.indicators.catalog:RSI', 'float32_rtol': 2 ** -23},
+    'Moving Average Convergence Divergence (EWM)':
+        {'path': 'src.indicators.catalog:MACD', 'float32_rtol': 2 ** -23},
+}
+
+FLOAT32_RTOL = {name: entry['float32_rtol'] for name, entry in REGISTRY.items()}
+
+# Classes importable from the package, e.g. from src.indicators import SMA
+EXPORTS = {
+    'SMA': 'Simple Moving Average',
+    'RSI': 'Relative Strength Index',
+    'BBANDS': 'Bollinger Bands',
+    'MACD': 'Moving Average Convergence Divergence',
+    'CURRENCY_STRENGTH': 'Currency Strength',
 }
 
+# Imported by warm_up() along with the indicators, for the first get-indicator
+WARM_UP_MODULES = ['src.data', 'src.indicators.cache']
+
+
+class IndicatorRegistry(Mapping):
+    """
+    Read-only mapping of indicator name -> class, importing the class on its
+    first lookup. Names, len() and membership never import anything; values()
+    and items() import every indicator.
+    """
+
+    def __init__(self, entries: dict):
+        self._entries = entries
+        self._classes = {}
+
+    def __getitem__(self, name: str):
+        indicator = self._classes.get(name)
+        if indicator is None:
+            module, attribute = self._entries[name]['path'].split(':')
+            indicator = getattr(importlib.import_module(module), attribute)
+            self._classes[name] = indicator
+        return indicator
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def loaded(self) -> list[str]:
+        """The names whose class has been imported."""
+        return list(self._classes)
+
+
+INDICATORS = IndicatorRegistry(REGISTRY)
+
+# The warm-up thread once started, see warm_up
+_warm_up = {'thread': None}
+_warm_up_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    if name in EXPORTS:
+        return INDICATORS[EXPORTS[name]]
+    if name == 'catalog':
+        return importlib.import_module(f'{__name__}.catalog')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up() -> threading.Thread | None:
+    """
+    Import every indicator (and WARM_UP_MODULES) in a background thread, so
+    the first requests after a cold start do not wait for the imports.
+
+    Runs once per process and only if INDICATOR_WARM_UP is on (the default).
+
+    Returns:
+        threading.Thread | None: The thread, None if it is turned off.
+    """
+    from decouple import config
+
+    if not config('INDICATOR_WARM_UP', default=True, cast=bool):
+        return None
+
+    def run():
+        start = time.perf_counter()
+        for load, names in ((importlib.import_module, WARM_UP_MODULES),
+                            (INDICATORS.__getitem__, INDICATORS)):
+            for name in names:
+                try:
+                    load(name)
+                except Exception as e:
+                    # Raised again on first use
+                    log.warning(f"Could not warm up '{name}': {e}")
+        log.info(f"Warmed up {len(INDICATORS.loaded())} indicators "
+                 f"in {time.perf_counter() - start:.2f} s")
+
+    with _warm_up_lock:
+        if _warm_up['thread'] is None:
+            _warm_up['thread'] = threading.Thread(target=run, name="IndicatorWarmUpThread",
+                                                  daemon=True)
+            _warm_up['thread'].start()
+        return _warm_up['thread']
+
+
+def warmup_bars(indicator, parameters: dict) -> int | None:
+    """
+    The number of bars to compute an indicator on before the first one shown.
+
+    info()['warmup'] lists the parameter names and bar counts that add up to
+    the bars before the first output. With a lookback (see exact_lookback)
+    that is all the outputs depend on; the others, e.g. the EMAs, only settle
+    towards the values of the whole history, so they get INDICATOR_WARMUP_FACTOR
+    (default 4) times as many bars.
+
+    Parameters:
+        indicator: The indicator class or instance.
+        parameters (dict): The indicator parameters.
+
+    Returns:
+        int | None: The warm-up bars, None if the indicator declares none and
+        has to be computed on the whole history.
+    """
+    from decouple import config
+
+    warmup = indicator.info().get('warmup')
+    if warmup is None:
+        return None
+    bars = sum(item if isinstance(item, int) else int(parameters[item]) for item in warmup)
+    lookback = exact_lookback(indicator, parameters)
+    if lookback is None:
+        return bars * config('INDICATOR_WARMUP_FACTOR', default=4, cast=int)
+    return max(bars, lookback)
+
+
+def exact_lookback(indicator, parameters: dict) -> int | None:
+    """
+    The lookback of an indicator whose outputs only depend on that many bars,
+    so computing it on them gives exactly the values of the whole history.
+    None for the others, e.g. the EMAs, which never forget.
+    """
+    return indicator.lookback(**parameters) if hasattr(indicator, 'lookback') else None
+
+
 def get_available_indicators() -> list[str]:
     """Returns a list of all available indicator names."""
     return list(INDICATORS.keys())
@@ -29,5 +236,6 @@ def get_indicator_instance(name: str, *args, **kwargs):
         An instance of the requested indicator.
     """
     if name not in INDICATORS:
-        raise ValueError(f"Indicator '{name}' is not available. Available indicators: {get_available_indicators()}")
+        raise ValueError(f"Indicator '{name}' is not available. "
+                         f"Available indicators: {get_available_indicators()}")
     return INDICATORS[name](*args, **kwargs)
@@ -4,4 +4,17 @@ import pandas as pd
 class Indicator(Protocol):
     def run(self) -> pd.DataFrame: ...
 
-    def info(self) -> dict: ...
\ No newline at end of file
+    # info()['warmup']: parameter names and bar counts adding up to the bars needed
+    # before the first output, left out if it needs the whole history (see warmup_bars)
+    def info(self) -> dict: ...
+
+    # Incremental form: init(history, **params) -> state, update(state, bar, closed) -> output row,
+    # lookback(**params) -> bars each output depends on (None if unbounded)
+    def init(self, history: pd.DataFrame) -> dict: ...
+
+    def update(self, state: dict, bar, closed: bool = True) -> dict: ...
+
+    def lookback(self) -> int | None: ...
+
+    # Optional, for src.indicators.graph and sweep: plan(**params) -> {output: primitive expression}
+    def plan(self) -> dict: ...
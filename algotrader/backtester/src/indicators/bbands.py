@@ -1,6 +1,11 @@
+import math
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 import logging
+from src.indicators.primitives import (RollingMoments, as_list, ema, float_dtype, multi_frame,
+                                       source_block)
+from src.indicators.streaming import RollingMean, RollingVar, SmaSeededEma
 
 
 class BBANDS:
@@ -58,6 +63,7 @@ class BBANDS:
                     'options': ['close', 'open', 'high', 'low']
                 }
             },
+            'warmup': ['length'],
         }
 
     @staticmethod
@@ -65,7 +71,8 @@ class BBANDS:
         """Calculate the Bollinger Bands"""
         std_str = f'{std}.0' if std % 1 == 0 else str(std)
         postfix = f'_{length}_{std_str}'
-        bbands = ta.bbands(data[source],
+        # Computed in float64, float32 candles get float32 outputs
+        bbands = ta.bbands(data[source].astype(np.float64, copy=False),
                            length, std, mamode=ma_mode)
         
         if bbands is None:
@@ -80,10 +87,102 @@ class BBANDS:
             f'BBU{postfix}': 'upper',
         }, inplace=True)
 
-        return bbands
+        return bbands.astype(float_dtype(data[source]), copy=False)
 
+    @staticmethod
+    def lookback(length: int = 20, source: str = 'close', std: float = 2.0,
+                 ma_mode: str = 'SMA') -> int | None:
+        """Number of bars each output depends on, None for the EMA mid line"""
+        if str(ma_mode).lower() != 'sma':
+            return None
+        # ta.variance uses 30 bars for length 1
+        return length if length > 1 else 30
 
     @staticmethod
-    def run_multi():
-        # TODO
-        pass
\ No newline at end of file
+    def plan(length: int = 20, source: str = 'close', std: float = 2.0,
+             ma_mode: str = 'SMA') -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        values = ('source', source)
+        moments = ('moments', values)
+        if str(ma_mode).lower() == 'sma':
+            mid = ('mean', moments, length)
+        else:
+            mid = ('ema', values, length)
+        deviations = ('scale', ('std', moments, length if length > 1 else 30, 0),
+                      float(std) if std and std > 0 else 2.0)
+        return {'lower': ('sub', mid, deviations), 'mid': mid, 'upper': ('add', mid, deviations)}
+
+    @staticmethod
+    def init(history: pd.DataFrame, length: int = 20, source: str = 'close',
+             std: float = 2.0, ma_mode: str = 'SMA') -> dict:
+        """Create the streaming state from the closed bars in history"""
+        # Same parameter handling as ta.bbands: population std (ddof=0), ta.variance
+        # falls back to 30 bars for length 1 and ta.ma to EMA for unknown modes
+        mid = RollingMean(length) if str(ma_mode).lower() == 'sma' else SmaSeededEma(length)
+        state = {
+            'source': source,
+            'std': float(std) if std and std > 0 else 2.0,
+            'mid': mid,
+            'var': RollingVar(length if length > 1 else 30, ddof=0),
+        }
+        values = history[source].to_numpy(dtype=float)
+        state['mid'].fill(values)
+        state['var'].fill(values)
+
+        return state
+
+    @staticmethod
+    def update(state: dict, bar, closed: bool = True) -> dict:
+        """
+        Add a bar and return its output row. With closed=False the bar is the
+        still-forming one: its output is returned but the state is not changed.
+        """
+        return BBANDS._step(state, float(bar[state['source']]), closed)
+
+    @staticmethod
+    def _step(state: dict, value: float, closed: bool) -> dict:
+        mid = state['mid'].push(value, closed)
+        var = state['var'].push(value, closed)
+        # np.sqrt semantics: NaN for NaN or a (rounding) negative variance
+        deviations = state['std'] * (math.sqrt(var) if var >= 0 else math.nan)
+
+        return {'lower': mid - deviations, 'mid': mid, 'upper': mid + deviations}
+
+    @staticmethod
+    def run_multi(data: pd.DataFrame, length: int | list[int] = 20, source: str = 'close',
+                  std: float | list[float] = 2.0, ma_mode: str = 'SMA') -> pd.DataFrame:
+        """
+        Calculate the Bollinger Bands for every symbol and (length, std) combination.
+
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns.
+            length (int | list[int]): One or more lengths.
+            source (str): The field to use.
+            std (float | list[float]): One or more standard deviation multipliers.
+            ma_mode (str): 'SMA' or 'EMA' for the mid line.
+
+        Returns:
+            pd.DataFrame: Columns (f"BBL_{length}_{std}", symbol), BBM and BBU
+            likewise, named like ta.bbands. float32 for float32 candles and
+            float64 otherwise.
+        """
+        lengths = as_list(length)
+        stds = [float(s) if s and s > 0 else 2.0 for s in as_list(std)]
+        values, symbols = source_block(data, source)
+        moments = RollingMoments(values)
+        sma = str(ma_mode).lower() == 'sma'
+
+        S = len(symbols)
+        names = []
+        out = np.empty((len(values), 3 * len(lengths) * len(stds) * S), dtype=values.dtype)
+        for l in lengths:
+            # Mid line and deviation are shared by every std multiplier
+            mid = moments.mean(l) if sma else ema(values, l)
+            deviation = moments.std(l if l > 1 else 30, ddof=0)
+            for s in stds:
+                for name, band in (('BBL', mid - s * deviation), ('BBM', mid),
+                                   ('BBU', mid + s * deviation)):
+                    out[:, len(names) * S:(len(names) + 1) * S] = band
+                    names.append(f'{name}_{l}_{s}')
+
+        return multi_frame(out, names, data.index, symbols)
@@ -0,0 +1,210 @@
+"""
+Cache of indicator results, shared by all websocket clients.
+"""
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from decouple import config
+from src.data.version import data_version
+from src.indicators.graph import evaluate
+
+log = logging.getLogger(__name__)
+
+
+def _normalize(value):
+    """Make a parameter value hashable, so 20, 20.0 and np.int64(20) give the same key."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _nbytes(result: pd.DataFrame) -> int:
+    return int(result.memory_usage(index=True, deep=False).sum())
+
+
+class IndicatorCache:
+    """
+    Process-wide LRU cache of indicator results, bounded by the size of the
+    cached frames in bytes (INDICATOR_CACHE_MAX_BYTES, default 256 MB).
+
+    Entries are keyed by (indicator name, normalized parameters, symbol IDs,
+    timeframe) and remember the data version they were computed from. When the
+    data only gained bars at the end, or its last bar was revised, the cached
+    result is extended instead of recomputed:
+
+    - indicators with a finite ``lookback`` rerun on the last bars only,
+    - the others continue from their streaming state (``init``/``update``),
+      which is kept with the entry for the next extension.
+
+    The last bar is always recomputed, as it may have been the forming one.
+
+    Indicators with a ``plan`` are computed on the node graph, scoped by the
+    symbols, timeframe and data version, so requests for different indicators
+    or parameters on the same data share their nodes (see graph.py).
+    """
+
+    max_bytes = None
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()
+    _bytes = 0
+    _stats = {'hits': 0, 'extensions': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def _get_max_bytes() -> int:
+        if IndicatorCache.max_bytes is None:
+            IndicatorCache.max_bytes = config(
+                'INDICATOR_CACHE_MAX_BYTES', default=256 * 1024 ** 2, cast=int)
+        return IndicatorCache.max_bytes
+
+    @staticmethod
+    def key(name: str, parameters: dict, symbol_ids: list, timeframe) -> tuple:
+        params = tuple(sorted((param, _normalize(value)) for param, value in parameters.items()))
+        return (name, params, tuple(symbol_ids), timeframe)
+
+    @staticmethod
+    def run(name: str, indicator, data: pd.DataFrame, parameters: dict,
+            symbol_ids: list, timeframe, cache: bool = True) -> pd.DataFrame:
+        """
+        Run an indicator, or return / extend the cached result.
+
+        Parameters:
+            name (str): The indicator name.
+            indicator: The indicator class or instance.
+            data (pd.DataFrame): The candles the indicator runs on.
+            parameters (dict): The indicator parameters.
+            symbol_ids (list): The symbol IDs the data was loaded for.
+            timeframe: The timeframe the data was loaded for.
+            cache (bool): Whether to use the cache. Results of parts of the
+                history (e.g. a chart's visible range) are computed on the node
+                graph but not cached, so they do not replace the whole history.
+
+        Returns:
+            pd.DataFrame: The indicator output, equal to indicator.run(data, **parameters).
+        """
+        if not cache:
+            scope = (tuple(symbol_ids), timeframe, data_version(data))
+            return IndicatorCache._compute(indicator, data, parameters, scope)
+
+        key = IndicatorCache.key(name, parameters, symbol_ids, timeframe)
+        version = data_version(data)
+
+        with IndicatorCache._lock:
+            entry = IndicatorCache._entries.get(key)
+            if entry is not None and entry['version'] == version:
+                IndicatorCache._entries.move_to_end(key)
+                IndicatorCache._stats['hits'] += 1
+                return entry['result'].copy(deep=False)
+            if entry is not None:
+                # Taken out while it is extended, its state changes in place
+                IndicatorCache._remove(key)
+
+        extended = None
+        if entry is not None:
+            try:
+                extended = IndicatorCache._extend(indicator, entry, data, parameters)
+            except Exception as e:
+                log.warning(f"Could not extend cached {name}, recomputing: {e}")
+
+        if extended is not None:
+            result, state = extended
+            stat = 'extensions'
+        else:
+            scope = (tuple(symbol_ids), timeframe, version)
+            result, state = IndicatorCache._compute(indicator, data, parameters, scope), None
+            stat = 'misses'
+
+        with IndicatorCache._lock:
+            IndicatorCache._stats[stat] += 1
+            if result is not None and len(data):
+                IndicatorCache._put(key, {
+                    'version': version,
+                    'rows': len(data),
+                    'first': data.index[0],
+                    'last': data.index[-1],
+                    'result': result,
+                    'state': state,
+                    'nbytes': _nbytes(result),
+                })
+
+        return result.copy(deep=False) if result is not None else None
+
+    @staticmethod
+    def _compute(indicator, data: pd.DataFrame, parameters: dict,
+                 scope: tuple = None) -> pd.DataFrame:
+        """Run the indicator, on the node graph if it has a plan."""
+        if hasattr(indicator, 'plan'):
+            return evaluate(data, [indicator.plan(**parameters)], scope)[0]
+        return indicator.run(data, **parameters)
+
+    @staticmethod
+    def _extend(indicator, entry: dict, data: pd.DataFrame, parameters: dict) -> tuple | None:
+        """Extend a cached result to data, None if data does not continue the cached bars."""
+        rows = entry['rows']
+        if (len(data) < rows or data.index[0] != entry['first']
+                or data.index[rows - 1] != entry['last']):
+            return None
+
+        # The last cached bar may have been the forming one
+        start = rows - 1
+        cached = entry['result']
+        lookback = indicator.lookback(**parameters) if hasattr(indicator, 'lookback') else None
+
+        if lookback is not None:
+            first = max(start - lookback + 1, 0)
+            new = IndicatorCache._compute(indicator, data.iloc[first:], parameters)
+            new = new.iloc[start - first:]
+            state = None
+        elif hasattr(indicator, 'init'):
+            # The state covers every bar but the last one
+            state = entry['state']
+            if state is None:
+                state = indicator.init(data.iloc[:start], **parameters)
+            new = [indicator.update(state, data.iloc[i]) for i in range(start, len(data) - 1)]
+            new.append(indicator.update(state, data.iloc[-1], closed=False))
+            new = pd.DataFrame(new, index=data.index[start:], columns=cached.columns)
+        else:
+            return None
+
+        return pd.concat([cached.iloc[:start], new]), state
+
+    @staticmethod
+    def _put(key: tuple, entry: dict) -> None:
+        max_bytes = IndicatorCache._get_max_bytes()
+        if entry['nbytes'] > max_bytes:
+            return
+
+        IndicatorCache._entries[key] = entry
+        IndicatorCache._bytes += entry['nbytes']
+        while IndicatorCache._bytes > max_bytes:
+            IndicatorCache._remove(next(iter(IndicatorCache._entries)))
+            IndicatorCache._stats['evictions'] += 1
+
+    @staticmethod
+    def _remove(key: tuple) -> None:
+        IndicatorCache._bytes -= IndicatorCache._entries.pop(key)['nbytes']
+
+    @staticmethod
+    def stats() -> dict:
+        """Hits, extensions, misses and evictions since the last clear, and the current size."""
+        with IndicatorCache._lock:
+            return {
+                **IndicatorCache._stats,
+                'entries': len(IndicatorCache._entries),
+                'bytes': IndicatorCache._bytes,
+                'max_bytes': IndicatorCache._get_max_bytes(),
+            }
+
+    @staticmethod
+    def clear() -> None:
+        with IndicatorCache._lock:
+            IndicatorCache._entries.clear()
+            IndicatorCache._bytes = 0
+            for stat in IndicatorCache._stats:
+                IndicatorCache._stats[stat] = 0
@@ -0,0 +1,615 @@
+"""
+The indicators of user_indicators.py as registry classes.
+
+Every class has the registry's ``info()`` and ``run(data, **params)``: it
+reads the open, high, low, close and volume columns of a single symbol's
+candles and returns a new frame with its outputs, indexed like data. The
+columns are read as float64 views and the outputs are freshly allocated,
+so data is never written to and callers need no defensive copies. Float
+outputs of float32 candles are stored as float32, but computed in float64
+like any others.
+
+The composite indicators (ATR, Keltner Channels, ADX, SuperTrend) also
+have a ``plan`` and share their true range and ATR nodes on the graph (see
+graph.py).
+
+The ``warmup`` of info() is left out where the outputs depend on every bar
+before them (OBV, PSAR, SuperTrend, ZigZag), on the whole session (VWAP,
+Session High/Low, Opening Range) or on bars after them
+(the lagging span of Ichimoku), so they are computed on the whole history.
+
+user_indicators.py keeps the original functions on mid_* columns, which add
+their outputs to the frame they are given, on top of these classes.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from . import kernels
+    from .graph import evaluate
+    from .primitives import (float_dtype, rolling_argmax, rolling_argmin, rolling_mad, rolling_max,
+                             rolling_mean, rolling_min)
+    from .sessions import RESETS, SessionCalendar
+except ImportError:
+    # Loaded as a top-level module, see tools/csv_indicator.py
+    import kernels
+    from graph import evaluate
+    from primitives import (float_dtype, rolling_argmax, rolling_argmin, rolling_mad, rolling_max,
+                            rolling_mean, rolling_min)
+    from sessions import RESETS, SessionCalendar
+
+HIGH, LOW, CLOSE = ('source', 'high'), ('source', 'low'), ('source', 'close')
+TRUE_RANGE = ('true_range', HIGH, LOW, CLOSE)
+SOURCES = ['close', 'open', 'high', 'low']
+
+
+def _atr(n: int) -> tuple:
+    return ('rolling_mean', TRUE_RANGE, n)
+
+
+def _column(data: pd.DataFrame, field: str) -> np.ndarray:
+    """One column as float64, a view unless it has another dtype (float32 candles)."""
+    return data[field].to_numpy(dtype=np.float64)
+
+
+def _frame(data: pd.DataFrame, outputs: dict) -> pd.DataFrame:
+    """The outputs indexed like data, float outputs in float_dtype(data)."""
+    dtype = float_dtype(data)
+    outputs = {name: np.asarray(values) for name, values in outputs.items()}
+    return pd.DataFrame({name: values.astype(dtype, copy=False) if values.dtype.kind == 'f'
+                         else values for name, values in outputs.items()}, index=data.index)
+
+
+def _line(color: str, width: int = 2) -> dict:
+    return {'type': 'line', 'plotOptions': {'lineWidth': width, 'color': color}}
+
+
+def _hidden() -> dict:
+    # Sent with the data, not drawn
+    return {'type': 'line', 'plotOptions': {'visible': False}}
+
+
+def _int(default: int, minimum: int = 1) -> dict:
+    return {'type': 'int', 'default': default, 'min': minimum, 'max': 1e6, 'step': 1}
+
+
+def _float(default: float, minimum: float, maximum: float, step: float) -> dict:
+    return {'type': 'float', 'default': default, 'min': minimum, 'max': maximum, 'step': step}
+
+
+def _source(default: str = 'close') -> dict:
+    return {'type': 'string', 'default': default, 'options': SOURCES}
+
+
+def _session() -> dict:
+    """The parameters of the sessions the outputs restart with, see sessions.py"""
+    return {
+        'reset': {'type': 'string', 'default': 'day', 'options': RESETS},
+        'reset_time': {'type': 'string', 'default': '00:00'},
+        'timezone': {'type': 'string', 'default': 'UTC'},
+    }
+
+
+class BollingerBands:
+    """Bollinger Bands of the typical price, unlike BBANDS on one source"""
+
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Bollinger Bands (Typical Price)',
+            'overlay': True,
+            'outputs': {
+                'BB_MA': _line('#2962FF', 1), 'BB_UP': _line('#F23645', 1),
+                'BB_LW': _line('#089981', 1),
+            },
+            'parameters': {'n': _int(20), 's': _float(2.0, 0.1, 10, 0.1)},
+            'warmup': ['n'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, n: int = 20, s: float = 2) -> pd.DataFrame:
+        typical = pd.Series((_column(data, 'close') + _column(data, 'high')
+                             + _column(data, 'low')) / 3)
+        std = typical.rolling(window=n).std().to_numpy()
+        mid = typical.rolling(window=n).mean().to_numpy()
+        return _frame(data, {'BB_MA': mid, 'BB_UP': mid + std * s, 'BB_LW': mid - std * s})
+
+
+class ATR:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Average True Range',
+            'overlay': False,
+            'outputs': {'ATR': _line('#B71C1C')},
+            'parameters': {'n': _int(14)},
+            'warmup': ['n', 1],
+        }
+
+    @staticmethod
+    def plan(n: int = 14) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        return {'ATR': _atr(n)}
+
+    @staticmethod
+    def run(data: pd.DataFrame, n: int = 14) -> pd.DataFrame:
+        return evaluate(data, [ATR.plan(n)])[0]
+
+
+class KeltnerChannels:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Keltner Channels',
+            'overlay': True,
+            'outputs': {
+                'EMA': _line('#2962FF', 1), 'KeUp': _line('#F23645', 1),
+                'KeLo': _line('#089981', 1),
+            },
+            'parameters': {'n_ema': _int(20), 'n_atr': _int(10)},
+            'warmup': ['n_ema', 'n_atr'],
+        }
+
+    @staticmethod
+    def plan(n_ema: int = 20, n_atr: int = 10) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        ema = ('ewm', CLOSE, n_ema)
+        width = ('scale', _atr(n_atr), 2)
+        return {'EMA': ema, 'KeUp': ('add', width, ema), 'KeLo': ('sub', ema, width)}
+
+    @staticmethod
+    def run(data: pd.DataFrame, n_ema: int = 20, n_atr: int = 10) -> pd.DataFrame:
+        return evaluate(data, [KeltnerChannels.plan(n_ema, n_atr)])[0]
+
+
+class RSI:
+    """RSI with pandas' adjusted EWM averages, unlike the Wilder smoothing of indicators.RSI"""
+
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Relative Strength Index (EWM)',
+            'overlay': False,
+            'outputs': {'RSI': _line('#7E57C2')},
+            'parameters': {'n': _int(14)},
+            'warmup': ['n', 1],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, n: int = 14) -> pd.DataFrame:
+        change = np.diff(_column(data, 'close'), prepend=np.nan)
+        # The first change (NaN) counts as no gain and no loss
+        wins = pd.Series(np.where(change >= 0, change, 0.0))
+        losses = pd.Series(np.where(change < 0, -change, 0.0))
+        rs = (wins.ewm(min_periods=n, alpha=1.0 / n).mean()
+              / losses.ewm(min_periods=n, alpha=1.0 / n).mean())
+        return _frame(data, {'RSI': (100.0 - (100.0 / (1.0 + rs))).to_numpy()})
+
+
+class MACD:
+    """MACD with pandas' adjusted EWMs, unlike indicators.MACD"""
+
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Moving Average Convergence Divergence (EWM)',
+            'overlay': False,
+            'outputs': {
+                'HIST': {'type': 'histogram', 'plotOptions': {'color': '#089981'}},
+                'MACD': _line('#2962FF'),
+                'SIGNAL': _line('#F23645'),
+            },
+            'parameters': {'n_slow': _int(26), 'n_fast': _int(12), 'n_signal': _int(9)},
+            'warmup': ['n_slow', 'n_signal'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, n_slow: int = 26, n_fast: int = 12,
+            n_signal: int = 9) -> pd.DataFrame:
+        close = pd.Series(_column(data, 'close'), copy=False)
+        macd = (close.ewm(min_periods=n_fast, span=n_fast).mean()
+                - close.ewm(min_periods=n_slow, span=n_slow).mean())
+        signal = macd.ewm(min_periods=n_signal, span=n_signal).mean()
+        return _frame(data, {'MACD': macd.to_numpy(), 'SIGNAL': signal.to_numpy(),
+                             'HIST': (macd - signal).to_numpy()})
+
+
+class SMA:
+    """Simple Moving Average of any column, computed with pandas"""
+
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Simple Moving Average (pandas)',
+            'overlay': True,
+            'outputs': {'SMA': _line('#FCFC4E')},
+            'parameters': {'source': _source(), 'period': _int(20)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, source: str = 'close', period: int = 20) -> pd.DataFrame:
+        return _frame(data, {'SMA': data[source].rolling(window=period).mean().to_numpy()})
+
+
+class EMA:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Exponential Moving Average',
+            'overlay': True,
+            'outputs': {'EMA': _line('#FF9800')},
+            'parameters': {'source': _source(), 'period': _int(20)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, source: str = 'close', period: int = 20) -> pd.DataFrame:
+        ema = data[source].ewm(span=period, min_periods=period).mean()
+        return _frame(data, {'EMA': ema.to_numpy()})
+
+
+class Stochastic:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Stochastic Oscillator',
+            'overlay': False,
+            'outputs': {'STOCH_K': _line('#2962FF'), 'STOCH_D': _line('#FF6D00')},
+            'parameters': {'k_period': _int(14), 'd_period': _int(3)},
+            'warmup': ['k_period', 'd_period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, k_period: int = 14, d_period: int = 3) -> pd.DataFrame:
+        # %K = (Current Close - Lowest Low) / (Highest High - Lowest Low) * 100
+        low_min = rolling_min(_column(data, 'low'), k_period)
+        high_max = rolling_max(_column(data, 'high'), k_period)
+        k = 100 * ((_column(data, 'close') - low_min) / (high_max - low_min))
+        d = pd.Series(k).rolling(window=d_period).mean()
+        return _frame(data, {'STOCH_K': k, 'STOCH_D': d.to_numpy()})
+
+
+class ADX:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Average Directional Index',
+            'overlay': False,
+            'outputs': {
+                'DI+': _line('#089981', 1), 'DI-': _line('#F23645', 1), 'ADX': _line('#FF9800'),
+            },
+            'parameters': {'period': _int(14)},
+            'warmup': ['period', 'period', 1],
+        }
+
+    @staticmethod
+    def plan(period: int = 14) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        up = ('sub', HIGH, ('shift', HIGH, 1))
+        down = ('sub', ('shift', LOW, 1), LOW)
+        atr = _atr(period)
+        plus_dm = ('rolling_mean', ('directional_movement', up, down), period)
+        minus_dm = ('rolling_mean', ('directional_movement', down, up), period)
+        plus = ('scale', ('div', plus_dm, atr), 100)
+        minus = ('scale', ('div', minus_dm, atr), 100)
+        dx = ('div', ('scale', ('abs', ('sub', plus, minus)), 100), ('add', plus, minus))
+        return {'DI+': plus, 'DI-': minus, 'ADX': ('rolling_mean', dx, period)}
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+        return evaluate(data, [ADX.plan(period)])[0]
+
+
+class OBV:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'On-Balance Volume',
+            'overlay': False,
+            'outputs': {'OBV': _line('#2962FF')},
+            'parameters': {},
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame) -> pd.DataFrame:
+        flow = np.sign(np.diff(_column(data, 'close'), prepend=np.nan)) * _column(data, 'volume')
+        return _frame(data, {'OBV': np.cumsum(np.where(np.isnan(flow), 0.0, flow))})
+
+
+class VWAP:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Volume Weighted Average Price',
+            'overlay': True,
+            'outputs': {'VWAP': _line('#E040FB')},
+            'parameters': _session(),
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, reset: str = 'day', reset_time: str = '00:00',
+            timezone: str = 'UTC') -> pd.DataFrame:
+        """VWAP from the start of every session, by default every day (UTC)"""
+        typical = (_column(data, 'high') + _column(data, 'low') + _column(data, 'close')) / 3
+        volume = _column(data, 'volume')
+        calendar = SessionCalendar.get(data.index, reset, reset_time, timezone)
+        return _frame(data, {'VWAP': calendar.cumsum(typical * volume) / calendar.cumsum(volume)})
+
+
+class SessionHighLow:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Session High/Low',
+            'overlay': True,
+            'outputs': {'SESSION_HIGH': _line('#089981', 1), 'SESSION_LOW': _line('#F23645', 1)},
+            'parameters': _session(),
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, reset: str = 'day', reset_time: str = '00:00',
+            timezone: str = 'UTC') -> pd.DataFrame:
+        """The highest high and lowest low of the session so far"""
+        calendar = SessionCalendar.get(data.index, reset, reset_time, timezone)
+        return _frame(data, {'SESSION_HIGH': calendar.cummax(_column(data, 'high')),
+                             'SESSION_LOW': calendar.cummin(_column(data, 'low'))})
+
+
+class OpeningRange:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Opening Range',
+            'overlay': True,
+            'outputs': {'OR_HIGH': _line('#2962FF', 1), 'OR_LOW': _line('#FF6D00', 1)},
+            'parameters': {'minutes': _int(30), **_session()},
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, minutes: int = 30, reset: str = 'day', reset_time: str = '00:00',
+            timezone: str = 'UTC') -> pd.DataFrame:
+        """
+        The high and low of the bars starting within the first minutes of the
+        session, as far as they have been seen, then held until the session ends.
+        """
+        calendar = SessionCalendar.get(data.index, reset, reset_time, timezone)
+        opening = calendar.elapsed < int(minutes) * 60 * 10 ** 9
+        # Sessions without an opening bar have no range
+        high = calendar.cummax(np.where(opening, _column(data, 'high'), -np.inf))
+        low = calendar.cummin(np.where(opening, _column(data, 'low'), np.inf))
+        return _frame(data, {'OR_HIGH': np.where(np.isinf(high), np.nan, high),
+                             'OR_LOW': np.where(np.isinf(low), np.nan, low)})
+
+
+class Ichimoku:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Ichimoku Cloud',
+            'overlay': True,
+            'outputs': {
+                'TENKAN': _line('#2962FF', 1), 'KIJUN': _line('#B71C1C', 1),
+                'SENKOU_A': _line('#089981', 1), 'SENKOU_B': _line('#F23645', 1),
+                'CHIKOU': _line('#43A047', 1),
+            },
+            'parameters': {'tenkan': _int(9), 'kijun': _int(26), 'senkou_b': _int(52)},
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, tenkan: int = 9, kijun: int = 26,
+            senkou_b: int = 52) -> pd.DataFrame:
+        high, low = _column(data, 'high'), _column(data, 'low')
+        # Conversion and base lines
+        tenkan_line = (rolling_max(high, tenkan) + rolling_min(low, tenkan)) / 2
+        kijun_line = (rolling_max(high, kijun) + rolling_min(low, kijun)) / 2
+        # Leading spans, shifted forward, and the lagging span shifted back
+        senkou_b_mid = (rolling_max(high, senkou_b) + rolling_min(low, senkou_b)) / 2
+        shift = lambda values, periods: pd.Series(values, copy=False).shift(periods).to_numpy()
+        return _frame(data, {
+            'TENKAN': tenkan_line,
+            'KIJUN': kijun_line,
+            'SENKOU_A': shift((tenkan_line + kijun_line) / 2, kijun),
+            'SENKOU_B': shift(senkou_b_mid, kijun),
+            'CHIKOU': shift(_column(data, 'close'), -kijun),
+        })
+
+
+class PSAR:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Parabolic SAR',
+            'overlay': True,
+            'outputs': {'PSAR': _line('#FF9800', 1)},
+            'parameters': {
+                'iaf': _float(0.02, 0.001, 1, 0.001), 'maxaf': _float(0.2, 0.01, 1, 0.01),
+            },
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, iaf: float = 0.02, maxaf: float = 0.2) -> pd.DataFrame:
+        return _frame(data, {'PSAR': kernels.psar(_column(data, 'high'), _column(data, 'low'),
+                                                  float(iaf), float(maxaf))})
+
+
+class CCI:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Commodity Channel Index',
+            'overlay': False,
+            'outputs': {'CCI': _line('#2962FF')},
+            'parameters': {'period': _int(20)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 20) -> pd.DataFrame:
+        typical = (_column(data, 'high') + _column(data, 'low') + _column(data, 'close')) / 3
+        # Mean absolute deviation of each window from its own mean
+        cci = (typical - rolling_mean(typical, period)) / (0.015 * rolling_mad(typical, period))
+        return _frame(data, {'CCI': cci})
+
+
+class WilliamsR:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Williams %R',
+            'overlay': False,
+            'outputs': {'WILLIAMS_R': _line('#7E57C2')},
+            'parameters': {'period': _int(14)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+        highest_high = rolling_max(_column(data, 'high'), period)
+        lowest_low = rolling_min(_column(data, 'low'), period)
+        return _frame(data, {'WILLIAMS_R': -100 * (highest_high - _column(data, 'close'))
+                                           / (highest_high - lowest_low)})
+
+
+class CMF:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Chaikin Money Flow',
+            'overlay': False,
+            'outputs': {'CMF': _line('#089981')},
+            'parameters': {'period': _int(20)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 20) -> pd.DataFrame:
+        high, low, close = _column(data, 'high'), _column(data, 'low'), _column(data, 'close')
+        volume = pd.Series(_column(data, 'volume'), copy=False)
+        money_flow_volume = pd.Series(((close - low) - (high - close)) / (high - low)) * volume
+        cmf = money_flow_volume.rolling(window=period).sum() / volume.rolling(window=period).sum()
+        return _frame(data, {'CMF': cmf.to_numpy()})
+
+
+class DonchianChannels:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Donchian Channels',
+            'overlay': True,
+            'outputs': {'DC_UPPER': _line('#2962FF', 1), 'DC_LOWER': _line('#2962FF', 1),
+                        'DC_MIDDLE': _line('#FF6D00', 1)},
+            'parameters': {'period': _int(20)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 20) -> pd.DataFrame:
+        upper = rolling_max(_column(data, 'high'), period)
+        lower = rolling_min(_column(data, 'low'), period)
+        return _frame(data, {'DC_UPPER': upper, 'DC_LOWER': lower,
+                             'DC_MIDDLE': (upper + lower) / 2})
+
+
+class SuperTrend:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'SuperTrend',
+            'overlay': True,
+            'outputs': {'SUPERTREND': _line('#089981'), 'ST_DIRECTION': _hidden()},
+            'parameters': {'atr_period': _int(10), 'multiplier': _float(3.0, 0.1, 20, 0.1)},
+        }
+
+    @staticmethod
+    def plan(atr_period: int = 10, multiplier: float = 3.0) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        hl2 = ('scale', ('add', HIGH, LOW), 0.5)
+        width = ('scale', _atr(atr_period), multiplier)
+        # The bands are trailed by the kernel; direction 1 for uptrend, -1 for downtrend
+        trend = ('supertrend', CLOSE, ('add', hl2, width), ('sub', hl2, width))
+        return {'SUPERTREND': ('item', trend, 0), 'ST_DIRECTION': ('item', trend, 1)}
+
+    @staticmethod
+    def run(data: pd.DataFrame, atr_period: int = 10, multiplier: float = 3.0) -> pd.DataFrame:
+        return evaluate(data, [SuperTrend.plan(atr_period, multiplier)])[0]
+
+
+class Aroon:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Aroon',
+            'overlay': False,
+            'outputs': {'AROON_UP': _line('#089981', 1), 'AROON_DOWN': _line('#F23645', 1),
+                        'AROON_OSC': _line('#2962FF')},
+            'parameters': {'period': _int(25)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 25) -> pd.DataFrame:
+        # ((period - periods since the highest high / lowest low) / period) * 100
+        days_since_high = period - rolling_argmax(_column(data, 'high'), period) - 1
+        days_since_low = period - rolling_argmin(_column(data, 'low'), period) - 1
+        up = 100 * (period - days_since_high) / period
+        down = 100 * (period - days_since_low) / period
+        return _frame(data, {'AROON_UP': up, 'AROON_DOWN': down, 'AROON_OSC': up - down})
+
+
+class ZigZag:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'ZigZag',
+            'overlay': True,
+            'outputs': {'ZIGZAG': _line('#FF9800'), 'ZIGZAG_PIVOT': _hidden()},
+            'parameters': {'deviation': _float(5.0, 0.01, 100, 0.01)},
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, deviation: float = 5.0) -> pd.DataFrame:
+        values, pivots = kernels.zigzag(_column(data, 'close'), float(deviation))
+        return _frame(data, {'ZIGZAG': values, 'ZIGZAG_PIVOT': pivots})
+
+
+class ROC:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Rate of Change',
+            'overlay': False,
+            'outputs': {'ROC': _line('#2962FF')},
+            'parameters': {'period': _int(12)},
+            'warmup': ['period'],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 12) -> pd.DataFrame:
+        close = pd.Series(_column(data, 'close'), copy=False)
+        previous = close.shift(period)
+        return _frame(data, {'ROC': (((close - previous) / previous) * 100).to_numpy()})
+
+
+class MFI:
+    @staticmethod
+    def info() -> dict:
+        return {
+            'name': 'Money Flow Index',
+            'overlay': False,
+            'outputs': {'MFI': _line('#7E57C2')},
+            'parameters': {'period': _int(14)},
+            'warmup': ['period', 1],
+        }
+
+    @staticmethod
+    def run(data: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+        typical = (_column(data, 'high') + _column(data, 'low') + _column(data, 'close')) / 3
+        money_flow = typical * _column(data, 'volume')
+
+        # Money flow of the bars closing up or down
+        change = np.diff(typical, prepend=np.nan)
+        positive = pd.Series(np.where(change > 0, money_flow, 0.0)).rolling(window=period).sum()
+        negative = pd.Series(np.where(change < 0, money_flow, 0.0)).rolling(window=period).sum()
+
+        return _frame(data, {'MFI': (100 - (100 / (1 + positive / negative))).to_numpy()})
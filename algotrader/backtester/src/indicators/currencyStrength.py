@@ -1,6 +1,98 @@
 import pandas as pd
 import numpy as np
 import logging
+from src.indicators.primitives import float_dtype
+from src.indicators.sessions import SessionCalendar, session_keys
+
+# Chunk of bars whose (bar x currency x currency) matrix is built at once
+MATRIX_BYTES = 32 * 1024 ** 2
+
+
+def parse_pair(symbol) -> tuple[str, str] | None:
+    """Base and quote currency of a symbol like "EURUSD", None if it is not a currency pair."""
+    if (not isinstance(symbol, str) or len(symbol) != 6 or not symbol.isalpha()
+            or not symbol.isupper()):
+        return None
+    return symbol[:3], symbol[3:]
+
+
+class CurrencyStrengthEngine:
+    """
+    Strength of every currency from any set of quoted pairs.
+
+    Each currency gets a log value in a common unit, solved from the pairs' log
+    prices by least squares: exact when the pairs form a tree (like the seven
+    USD majors), averaged over the redundant paths otherwise. The pairs must
+    connect all currencies.
+
+    Over one bar, cross a/b moves by d = dx_a - dx_b in log terms, which is a
+    symmetric percent change (c1 - c0) / ((c1 + c0) / 2) of 2 * tanh(d / 2).
+    These form a currency x currency matrix of moves in basis points, and the
+    strength of a currency is the mean of its row over the other currencies.
+    """
+
+    def __init__(self, pairs: dict[str, tuple[str, str]], currencies: list[str] = None):
+        """
+        Parameters:
+            pairs (dict[str, tuple[str, str]]): Symbol -> (base, quote), e.g.
+                {"EURUSD": ("EUR", "USD")}.
+            currencies (list[str], optional): Order of the outputs. Defaults to the
+                order the currencies first appear in pairs; missing ones are appended.
+        """
+        if not pairs:
+            raise ValueError("Currency strength needs at least one currency pair")
+
+        self.symbols = list(pairs)
+        found = list(dict.fromkeys(c for base_quote in pairs.values() for c in base_quote))
+        self.currencies = [c for c in (currencies or []) if c in found]
+        self.currencies += [c for c in found if c not in self.currencies]
+
+        position = {c: i for i, c in enumerate(self.currencies)}
+        incidence = np.zeros((len(self.symbols), len(self.currencies)))
+        for row, (base, quote) in enumerate(pairs.values()):
+            incidence[row, position[base]] += 1.0
+            incidence[row, position[quote]] -= 1.0
+        if np.linalg.matrix_rank(incidence) != len(self.currencies) - 1:
+            raise ValueError(f"The pairs {self.symbols} do not connect all of {self.currencies}")
+
+        # Log values of the currencies from the log prices of the pairs
+        self._solve = np.linalg.pinv(incidence).T
+
+    @staticmethod
+    def from_symbols(symbols, currencies: list[str] = None) -> 'CurrencyStrengthEngine':
+        """Engine for the currency pairs among symbols, other symbols are ignored."""
+        pairs = {symbol: parse_pair(symbol) for symbol in symbols}
+        return CurrencyStrengthEngine({s: pair for s, pair in pairs.items() if pair}, currencies)
+
+    def values(self, closes: np.ndarray) -> np.ndarray:
+        """(time x currency) log values from (time x symbol) closes in self.symbols order."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            logs = np.log(closes)
+        # Summed pair by pair rather than with a matrix product, so a row gives
+        # the same result on its own (update) as within a block (run)
+        values = np.zeros((len(logs), len(self.currencies)))
+        for i in range(len(self.symbols)):
+            values += logs[:, i, None] * self._solve[i]
+        return values
+
+    def moves(self, change: np.ndarray) -> np.ndarray:
+        """
+        Strength of each currency over (time x currency) changes of the log values,
+        in basis points. Rows with a NaN give NaN.
+        """
+        T, C = change.shape
+        out = np.empty((T, C))
+        step = max(1, MATRIX_BYTES // (8 * C * C))
+        for start in range(0, T, step):
+            d = change[start:start + step]
+            matrix = 2e4 * np.tanh((d[:, :, None] - d[:, None, :]) / 2)
+            out[start:start + step] = matrix.sum(axis=2) / max(C - 1, 1)
+        return out
+
+    def strength(self, values: np.ndarray) -> np.ndarray:
+        """Strength between consecutive rows of (time x currency) log values, NaN for the first."""
+        return self.moves(np.diff(values, axis=0, prepend=np.nan))
+
 
 class CURRENCY_STRENGTH:
     @staticmethod
@@ -68,83 +160,118 @@ class CURRENCY_STRENGTH:
                 }
             },
             'parameters': {
-
+                'reset': {
+                    'type': 'string',
+                    'default': 'day',
+                    'options': ['day', 'week', 'none']
+                },
+                'reset_time': {
+                    'type': 'string',
+                    'default': '00:00'
+                },
+                'timezone': {
+                    'type': 'string',
+                    'default': 'UTC'
+                },
             }
         }
 
     @staticmethod
-    def run(data: pd.DataFrame) -> pd.DataFrame:
-        data = data['close']
-
-        def get_val(prev_val, curr_val):
-            return (curr_val - prev_val) / ((curr_val + prev_val) / 2) * 10000
-
-        def get_val_m(prev_val1, curr_val1, prev_val2, curr_val2):
-            return get_val(prev_val1 * prev_val2, curr_val1 * curr_val2)
-
-        def get_val_d(prev_val1, curr_val1, prev_val2, curr_val2):
-            return get_val(prev_val1 / prev_val2, curr_val1 / curr_val2)
-
-        shifted_data = data.shift(1)
-
-        eurusd_val = get_val(shifted_data['EURUSD'], data['EURUSD'])
-        gbpusd_val = get_val(shifted_data['GBPUSD'], data['GBPUSD'])
-        usdjpy_val = get_val(shifted_data['USDJPY'], data['USDJPY'])
-        audusd_val = get_val(shifted_data['AUDUSD'], data['AUDUSD'])
-        nzdusd_val = get_val(shifted_data['NZDUSD'], data['NZDUSD'])
-        usdcad_val = get_val(shifted_data['USDCAD'], data['USDCAD'])
-        usdchf_val = get_val(shifted_data['USDCHF'], data['USDCHF'])
-        
-        # Derived pairs
-        eurgbp_val = get_val_d(data['EURUSD'], shifted_data['EURUSD'], data['GBPUSD'], shifted_data['GBPUSD'])
-        eurjpy_val = get_val_m(data['EURUSD'], shifted_data['EURUSD'], data['USDJPY'], shifted_data['USDJPY'])
-        euraud_val = get_val_d(data['EURUSD'], shifted_data['EURUSD'], data['AUDUSD'], shifted_data['AUDUSD'])
-        eurnzd_val = get_val_d(data['EURUSD'], shifted_data['EURUSD'], data['NZDUSD'], shifted_data['NZDUSD'])
-        eurcad_val = get_val_d(data['EURUSD'], shifted_data['EURUSD'], data['USDCAD'], shifted_data['USDCAD'])
-        eurchf_val = get_val_m(data['EURUSD'], shifted_data['EURUSD'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        gbpjpy_val = get_val_m(data['GBPUSD'], shifted_data['GBPUSD'], data['USDJPY'], shifted_data['USDJPY'])
-        gbpaud_val = get_val_m(data['GBPUSD'], shifted_data['GBPUSD'], data['AUDUSD'], shifted_data['AUDUSD'])
-        gbpnzd_val = get_val_m(data['GBPUSD'], shifted_data['GBPUSD'], data['NZDUSD'], shifted_data['NZDUSD'])
-        gbpcad_val = get_val_m(data['GBPUSD'], shifted_data['GBPUSD'], data['USDCAD'], shifted_data['USDCAD'])
-        gbpchf_val = get_val_m(data['GBPUSD'], shifted_data['GBPUSD'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        jpyaud_val = get_val_d(data['USDJPY'], shifted_data['USDJPY'], data['AUDUSD'], shifted_data['AUDUSD'])
-        jpynzd_val = get_val_d(data['USDJPY'], shifted_data['USDJPY'], data['NZDUSD'], shifted_data['NZDUSD'])
-        jpycad_val = get_val_d(data['USDJPY'], shifted_data['USDJPY'], data['USDCAD'], shifted_data['USDCAD'])
-        jpychf_val = get_val_d(data['USDJPY'], shifted_data['USDJPY'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        audnzd_val = get_val_m(data['AUDUSD'], shifted_data['AUDUSD'], data['NZDUSD'], shifted_data['NZDUSD'])
-        audcad_val = get_val_m(data['AUDUSD'], shifted_data['AUDUSD'], data['USDCAD'], shifted_data['USDCAD'])
-        audchf_val = get_val_m(data['AUDUSD'], shifted_data['AUDUSD'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        nzdcad_val = get_val_m(data['NZDUSD'], shifted_data['NZDUSD'], data['USDCAD'], shifted_data['USDCAD'])
-        nzdchf_val = get_val_m(data['NZDUSD'], shifted_data['NZDUSD'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        cadchf_val = get_val_m(data['USDCAD'], shifted_data['USDCAD'], data['USDCHF'], shifted_data['USDCHF'])
-        
-        # Calculating the strength of each currency by averaging the values of its pairs
-        strength = pd.DataFrame(index=data.index)
-        strength['EUR'] = (eurusd_val + eurgbp_val + eurjpy_val + euraud_val + eurnzd_val + eurcad_val + eurchf_val) / 7
-        strength['GBP'] = (gbpusd_val + eurgbp_val + gbpjpy_val + gbpaud_val + gbpnzd_val + gbpcad_val + gbpchf_val) / 7
-        strength['JPY'] = (usdjpy_val + eurjpy_val + gbpjpy_val + jpyaud_val + jpynzd_val + jpycad_val + jpychf_val) / 7
-        strength['AUD'] = (audusd_val + euraud_val + gbpaud_val + jpyaud_val + audnzd_val + audcad_val + audchf_val) / 7
-        strength['NZD'] = (nzdusd_val + eurnzd_val + gbpnzd_val + jpynzd_val + audnzd_val + nzdcad_val + nzdchf_val) / 7
-        strength['CAD'] = (usdcad_val + eurcad_val + gbpcad_val + jpycad_val + audcad_val + nzdcad_val + cadchf_val) / 7
-        strength['CHF'] = (usdchf_val + eurchf_val + gbpchf_val + jpychf_val + audchf_val + nzdchf_val + cadchf_val) / 7
-        strength['USD'] = (-eurusd_val - gbpusd_val + usdjpy_val - audusd_val - nzdusd_val + usdcad_val + usdchf_val) / 7
-        # Detect new days
-        new_day_mask = data.index.to_series().dt.date != data.index.to_series().dt.date.shift()
-        new_day_indices = np.where(new_day_mask)[0]
-
-        # Split the data into days
-        split_strength = {col: [strength[col].iloc[start:end] for start, end in zip(new_day_indices, new_day_indices[1:])] + [strength[col].iloc[new_day_indices[-1]:]] for col in strength.columns}
-
-        # Cumsum each day separately and recombine
-        for col in split_strength:
-            split_strength[col] = [np.cumsum(day) for day in split_strength[col]]
-            split_strength[col] = np.concatenate(split_strength[col])
-
-        strength = pd.DataFrame(split_strength, index=data.index)
-        
-        return strength
\ No newline at end of file
+    def _engine(symbols) -> CurrencyStrengthEngine:
+        # Outputs in the order of info(), further currencies after them
+        outputs = list(CURRENCY_STRENGTH.info()['outputs'])
+        return CurrencyStrengthEngine.from_symbols(symbols, outputs)
+
+    @staticmethod
+    def run(data: pd.DataFrame, reset: str = 'day', reset_time: str = '00:00',
+            timezone: str = 'UTC') -> pd.DataFrame:
+        """
+        Calculate the strength of every currency in the pairs of data, summed up
+        over each session.
+
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns. Symbols that
+                are not currency pairs like "EURUSD" are ignored.
+            reset (str): Restart the sums every 'day', 'week' or never ('none').
+            reset_time (str): "HH:MM" the sessions start at.
+            timezone (str): Timezone of reset_time.
+
+        Returns:
+            pd.DataFrame: One column per currency, float32 for float32 candles.
+        """
+        closes = data['close']
+        engine = CURRENCY_STRENGTH._engine(closes.columns)
+        values = engine.values(closes[engine.symbols].to_numpy(dtype=float))
+        calendar = SessionCalendar.get(data.index, reset, reset_time, timezone)
+
+        # The sums restart every session, NaN values are skipped. They run in
+        # float64 whatever the candles, only the result is stored as float32
+        sums = calendar.cumsum(engine.strength(values)).astype(float_dtype(closes), copy=False)
+        return pd.DataFrame(sums, index=data.index, columns=engine.currencies)
+
+    @staticmethod
+    def lookback(**_params) -> None:
+        """Number of bars each output depends on, None as the sums run over the whole session"""
+        return None
+
+    @staticmethod
+    def init(history: pd.DataFrame, reset: str = 'day', reset_time: str = '00:00',
+             timezone: str = 'UTC') -> dict:
+        """Create the streaming state from the closed bars in history"""
+        closes = history['close']
+        engine = CURRENCY_STRENGTH._engine(closes.columns)
+        state = {
+            'engine': engine,
+            'session': (reset, reset_time, timezone),
+            'values': None,
+            'key': None,
+            'sums': np.zeros(len(engine.currencies)),
+        }
+
+        if len(closes):
+            # The state only depends on the last session, and the bar before it for the first change
+            calendar = SessionCalendar.get(closes.index, reset, reset_time, timezone)
+            start = int(calendar.starts[-1])
+            first = max(start - 1, 0)
+            values = engine.values(closes[engine.symbols].iloc[first:].to_numpy(dtype=float))
+            strength = engine.strength(values)[start - first:]
+
+            # Added up in order, like the cumulative sums of run
+            state['sums'] = np.cumsum(np.where(np.isnan(strength), 0.0, strength), axis=0)[-1]
+            state['values'] = values[-1]
+            state['key'] = calendar.keys[-1]
+
+        return state
+
+    @staticmethod
+    def update(state: dict, bar: pd.Series, closed: bool = True) -> dict:
+        """
+        Add a bar and return its output row. bar is a row of the candle frame,
+        e.g. data.iloc[-1], named by its timestamp. With closed=False the bar is
+        the still-forming one: its output is returned but the state is not changed.
+        """
+        engine = state['engine']
+        close = bar['close'][engine.symbols].to_numpy(dtype=float)
+        return CURRENCY_STRENGTH._step(state, bar.name, close, closed)
+
+    @staticmethod
+    def _step(state: dict, timestamp, close: np.ndarray, closed: bool) -> dict:
+        engine = state['engine']
+        key = session_keys(pd.DatetimeIndex([timestamp]), *state['session'])[0]
+        sums = state['sums'] if key == state['key'] else np.zeros(len(engine.currencies))
+
+        values = engine.values(close[None, :])[0]
+        if state['values'] is None:
+            strength = np.full(len(engine.currencies), np.nan)
+        else:
+            strength = engine.moves((values - state['values'])[None, :])[0]
+
+        # NaN values are skipped like in the cumulative sums of run
+        missing = np.isnan(strength)
+        new_sums = sums + np.where(missing, 0.0, strength)
+        if closed:
+            state['values'] = values
+            state['key'] = key
+            state['sums'] = new_sums
+
+        return dict(zip(engine.currencies, np.where(missing, np.nan, new_sums)))
@@ -0,0 +1,276 @@
+"""
+Indicators as one graph of shared computations.
+
+An indicator joins the graph with a ``plan(**params)`` method returning its
+outputs as expressions over the operations in OPS. An expression is a node,
+a tuple (operation, *inputs and parameters) whose inputs are expressions
+themselves, e.g. ATR(14) is
+
+    ('rolling_mean', ('true_range', ('source', 'high'), ('source', 'low'), ('source', 'close')), 14)
+
+Equal nodes are equal tuples, so evaluating several indicators together
+computes every node they share once: the true range of ATR, ADX and
+SuperTrend, the EMAs of MACD lines with a common length, the source columns
+of everything. Given a scope identifying the data (symbols, timeframe and
+version), the nodes are also kept in NodeCache for the next evaluation on
+the same data.
+
+This module only depends on numpy and pandas (python-decouple for the cache
+size), so user_indicators can import it outside of the src package.
+"""
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+try:
+    from . import kernels
+    from .primitives import RollingMoments, ema, first_valid, float_dtype, rma, source_block
+except ImportError:
+    # Loaded as a top-level module, see tools/csv_indicator.py
+    import kernels
+    from primitives import RollingMoments, ema, first_valid, float_dtype, rma, source_block
+
+log = logging.getLogger(__name__)
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(x.shape, np.nan)
+    if periods >= 0:
+        out[periods:] = x[:len(x) - periods]
+    else:
+        out[:periods] = x[-periods:]
+    return out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    # Skips NaN like a row-wise DataFrame.max, so the first bar is high - low
+    previous = _shift(close, 1)
+    return np.fmax(np.fmax(high - low, np.abs(high - previous)), np.abs(previous - low))
+
+
+def _directional_movement(move: np.ndarray, opposite: np.ndarray) -> np.ndarray:
+    return np.where(move > opposite, np.maximum(move, 0), 0.0)
+
+
+def _ewm(x: np.ndarray, span: int) -> np.ndarray:
+    # pandas' adjusted EWM, as df.ewm(span=span, min_periods=span).mean()
+    return pd.DataFrame(x).ewm(span=span, min_periods=span).mean().to_numpy()
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    # pandas' rolling mean, exact over windows of equal values (no trend gives a
+    # directional movement of exactly 0, which ADX divides by)
+    return pd.DataFrame(x).rolling(window).mean().to_numpy()
+
+
+def _supertrend(close: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> tuple:
+    # The kernel trails the bands in place, so it gets copies
+    line = np.empty(close.shape)
+    direction = np.empty(close.shape, dtype=np.int64)
+    for s in range(close.shape[1]):
+        line[:, s], direction[:, s] = kernels.supertrend(
+            close[:, s].copy(), upper[:, s].copy(), lower[:, s].copy())
+    return line, direction
+
+
+def _rsi(positive_avg: np.ndarray, negative_avg: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+def _divide(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return a / b
+
+
+# Operation name -> function of the evaluated arguments. Arguments that are
+# expressions are evaluated first, the others (lengths, factors) are passed as
+# is. Every operation returns new arrays, its inputs may be shared.
+OPS = {
+    'diff': lambda x: np.diff(x, axis=0, prepend=np.nan),
+    'shift': _shift,
+    'gain': lambda x: np.where(x < 0, 0.0, x),
+    'loss': lambda x: np.where(x > 0, 0.0, x),
+    # Seeded at row length - 1 like ta.ema on a price series
+    'ema': lambda x, length: ema(x, length),
+    # Seeded from the first valid value of each column, like ta.macd's signal line
+    'ema_valid': lambda x, length: ema(x, length, first_valid(x)),
+    'ewm': _ewm,
+    'rma': rma,
+    'moments': RollingMoments,
+    'mean': lambda moments, window: moments.mean(window),
+    'rolling_mean': _rolling_mean,
+    'std': lambda moments, window, ddof: moments.std(window, ddof),
+    'add': np.add,
+    'sub': np.subtract,
+    'div': _divide,
+    'abs': np.abs,
+    'scale': lambda x, factor: factor * x,
+    'rsi': _rsi,
+    'true_range': _true_range,
+    'directional_movement': _directional_movement,
+    'supertrend': _supertrend,
+    'item': lambda values, i: values[i],
+}
+
+
+def is_expression(arg) -> bool:
+    return isinstance(arg, tuple) and len(arg) > 0 and isinstance(arg[0], str)
+
+
+def walk(expression: tuple, seen: dict) -> None:
+    """Add the sub-expressions of expression to seen, children before parents."""
+    if expression in seen:
+        return
+    for arg in expression[1:]:
+        if is_expression(arg):
+            walk(arg, seen)
+    seen[expression] = None
+
+
+def _nbytes(value) -> int | None:
+    """Size of an array or tuple of arrays, None for values that are not cached."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple) and all(isinstance(v, np.ndarray) for v in value):
+        return sum(v.nbytes for v in value)
+    return None
+
+
+class NodeCache:
+    """
+    Process-wide LRU cache of evaluated nodes, bounded by their size in bytes
+    (INDICATOR_NODE_CACHE_MAX_BYTES, default 128 MB).
+
+    Entries are keyed by (scope, node). Only arrays are kept, as read-only,
+    so a cached node can be handed to any number of evaluations; helper
+    objects like RollingMoments are rebuilt when a node above them is missing.
+    """
+
+    max_bytes = None
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()
+    _bytes = 0
+    _stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def _get_max_bytes() -> int:
+        if NodeCache.max_bytes is None:
+            from decouple import config
+            NodeCache.max_bytes = config('INDICATOR_NODE_CACHE_MAX_BYTES',
+                                         default=128 * 1024 ** 2, cast=int)
+        return NodeCache.max_bytes
+
+    @staticmethod
+    def get(key: tuple):
+        """The cached value of key, None if it is not cached."""
+        with NodeCache._lock:
+            entry = NodeCache._entries.get(key)
+            if entry is None:
+                NodeCache._stats['misses'] += 1
+                return None
+            NodeCache._entries.move_to_end(key)
+            NodeCache._stats['hits'] += 1
+            return entry[0]
+
+    @staticmethod
+    def put(key: tuple, value) -> None:
+        nbytes = _nbytes(value)
+        if nbytes is None or nbytes > NodeCache._get_max_bytes():
+            return
+        for array in value if isinstance(value, tuple) else (value,):
+            array.flags.writeable = False
+
+        with NodeCache._lock:
+            if key in NodeCache._entries:
+                NodeCache._bytes -= NodeCache._entries.pop(key)[1]
+            NodeCache._entries[key] = (value, nbytes)
+            NodeCache._bytes += nbytes
+            while NodeCache._bytes > NodeCache._get_max_bytes():
+                NodeCache._bytes -= NodeCache._entries.popitem(last=False)[1][1]
+                NodeCache._stats['evictions'] += 1
+
+    @staticmethod
+    def stats() -> dict:
+        """Hits, misses and evictions since the last clear, and the current size."""
+        with NodeCache._lock:
+            return {
+                **NodeCache._stats,
+                'entries': len(NodeCache._entries),
+                'bytes': NodeCache._bytes,
+                'max_bytes': NodeCache._get_max_bytes(),
+            }
+
+    @staticmethod
+    def clear() -> None:
+        with NodeCache._lock:
+            NodeCache._entries.clear()
+            NodeCache._bytes = 0
+            for stat in NodeCache._stats:
+                NodeCache._stats[stat] = 0
+
+
+def evaluate(data: pd.DataFrame, plans: list[dict], scope: tuple = None) -> list[pd.DataFrame]:
+    """
+    Evaluate the plans of several indicators on the same data, computing every
+    node they share once.
+
+    Parameters:
+        data (pd.DataFrame): Candles, with (field, symbol) columns or the
+            fields of a single symbol.
+        plans (list[dict]): Indicator outputs as expressions, as returned by plan().
+        scope (tuple): Identifies the data, e.g. (symbol IDs, timeframe,
+            data_version(data)), to reuse and keep the nodes in NodeCache.
+            None evaluates without the cache.
+
+    Returns:
+        list[pd.DataFrame]: One frame per plan with its outputs as columns,
+        (output, symbol) columns for (field, symbol) data. Float outputs are
+        float32 for float32 candles, the nodes in between are mostly float64.
+    """
+    values = {}
+    symbols = None
+    computed = 0
+
+    def value(node: tuple):
+        nonlocal symbols, computed
+        if node in values:
+            return values[node]
+
+        result = NodeCache.get((scope, node)) if scope is not None else None
+        if result is None:
+            op, args = node[0], node[1:]
+            if op == 'source':
+                result, source_symbols = source_block(data, *args)
+                symbols = symbols or source_symbols
+            else:
+                result = OPS[op](*(value(arg) if is_expression(arg) else arg for arg in args))
+            computed += 1
+            if scope is not None:
+                NodeCache.put((scope, node), result)
+        values[node] = result
+        return result
+
+    results = [{output: value(expression) for output, expression in plan.items()} for plan in plans]
+    log.debug(f"Evaluated {len(plans)} plans: {computed} of {len(values)} nodes computed")
+
+    multi = isinstance(data.columns, pd.MultiIndex)
+    if symbols is None:
+        # Every source came from the cache
+        symbols = source_block(data, data.columns.get_level_values(0)[0])[1] if multi else [None]
+    dtype = float_dtype(data)
+
+    frames = []
+    for outputs in results:
+        columns = {}
+        for output, block in outputs.items():
+            block = block.reshape(len(data), len(symbols))
+            output_dtype = dtype if block.dtype.kind == 'f' else block.dtype
+            for s, symbol in enumerate(symbols):
+                # Copied, the frame must not share cached arrays
+                columns[(output, symbol) if multi else output] = block[:, s].astype(output_dtype)
+        frames.append(pd.DataFrame(columns, index=data.index))
+    return frames
@@ -0,0 +1,209 @@
+"""
+Compiled loops for the path-dependent indicators (PSAR, SuperTrend, ZigZag)
+and the rolling extremes.
+
+The kernels run on raw float64 arrays. They are compiled with numba on first
+use if it is installed, otherwise they run as plain Python loops over the
+arrays, which is slower but gives the same results.
+
+This module only depends on numpy, so user_indicators can import it when it
+is loaded outside of the src package (see tools/csv_indicator.py).
+"""
+import functools
+import importlib.util
+import logging
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    """Whether numba is installed, so the kernels are compiled."""
+    return importlib.util.find_spec('numba') is not None
+
+
+def _jit(fn):
+    """
+    Compile fn with numba on its first call, fall back to fn without numba.
+
+    error_model='numpy' makes division by zero give inf/NaN like numpy
+    instead of raising ZeroDivisionError. There is no on-disk cache, its
+    entries are tied to the module name and this module is also loaded as a
+    top-level one.
+    """
+    compiled = None
+
+    def wrapper(*args):
+        nonlocal compiled
+        if compiled is None:
+            try:
+                import numba
+                compiled = numba.njit(error_model='numpy')(fn)
+            except ImportError:
+                log.info("numba is not installed, %s runs as a Python loop", fn.__name__)
+                compiled = fn
+        return compiled(*args)
+
+    wrapper.__name__ = fn.__name__
+    wrapper.__doc__ = fn.__doc__
+    wrapper.py_func = fn
+    return wrapper
+
+
+@_jit
+def psar(high: np.ndarray, low: np.ndarray, iaf: float, maxaf: float) -> np.ndarray:
+    """Parabolic SAR, starting as an uptrend at the first low."""
+    n = len(high)
+    out = np.empty(n)
+    if n == 0:
+        return out
+
+    sar = low[0]
+    direction = 1
+    af = iaf
+    high_point = high[0]
+    low_point = low[0]
+    out[0] = sar
+
+    for i in range(1, n):
+        if direction == 1:
+            sar = sar + af * (high_point - sar)
+            # Not above the prior two lows, compared like min(sar, a, b)
+            prior = low[i - 2] if i >= 2 else low[0]
+            if prior < sar:
+                sar = prior
+            if low[i - 1] < sar:
+                sar = low[i - 1]
+
+            if low[i] < sar:
+                direction = -1
+                sar = high_point
+                high_point = high[i]
+                low_point = low[i]
+                af = iaf
+            elif high[i] > high_point:
+                high_point = high[i]
+                af = min(af + iaf, maxaf)
+        else:
+            sar = sar - af * (sar - low_point)
+            # Not below the prior two highs
+            prior = high[i - 2] if i >= 2 else high[0]
+            if prior > sar:
+                sar = prior
+            if high[i - 1] > sar:
+                sar = high[i - 1]
+
+            if high[i] > sar:
+                direction = 1
+                sar = low_point
+                high_point = high[i]
+                low_point = low[i]
+                af = iaf
+            elif low[i] < low_point:
+                low_point = low[i]
+                af = min(af + iaf, maxaf)
+
+        out[i] = sar
+
+    return out
+
+
+@_jit
+def supertrend(close: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> tuple:
+    """
+    SuperTrend line and direction (1 up, -1 down, 0 before the first signal)
+    from the basic bands. The bands are trailed in place.
+    """
+    n = len(close)
+    line = np.zeros(n)
+    direction = np.zeros(n, dtype=np.int64)
+
+    for i in range(1, n):
+        if close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+            # The band on the trend side only moves with the trend
+            if direction[i] == 1 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction[i] == -1 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+
+        line[i] = lower[i] if direction[i] == 1 else upper[i]
+
+    return line, direction
+
+
+@_jit
+def zigzag(close: np.ndarray, deviation: float) -> tuple:
+    """
+    ZigZag pivots: a price becomes the next pivot when it moved at least
+    deviation percent from the last one. Returns the pivot prices (0 between
+    pivots) and the pivot mask; the last pivot is always marked.
+    """
+    n = len(close)
+    values = np.zeros(n)
+    pivots = np.zeros(n, dtype=np.bool_)
+    if n == 0:
+        return values, pivots
+
+    last_price = close[0]
+    last_position = 0
+    for i in range(1, n):
+        change = (close[i] - last_price) / last_price * 100
+        if abs(change) >= deviation:
+            values[last_position] = last_price
+            pivots[last_position] = True
+            last_price = close[i]
+            last_position = i
+
+    values[last_position] = last_price
+    pivots[last_position] = True
+    return values, pivots
+
+
+@_jit
+def rolling_extreme(x: np.ndarray, window: int, maximum: bool) -> tuple:
+    """
+    Rolling max (or min) along every row of a (symbol x time) array and the
+    position of its first occurrence in the window, with a monotonic deque
+    of indices. Windows containing NaN give NaN.
+    """
+    S, T = x.shape
+    values = np.full((S, T), np.nan)
+    positions = np.full((S, T), np.nan)
+    # The deque is queue[head:tail], it never wraps around
+    queue = np.empty(T, dtype=np.int64)
+
+    for s in range(S):
+        row = x[s]
+        head = 0
+        tail = 0
+        last_missing = -1
+        for i in range(T):
+            if tail > head and queue[head] <= i - window:
+                head += 1
+
+            value = row[i]
+            if value != value:
+                last_missing = i
+            else:
+                # Equal values stay, so the front is the first occurrence
+                while tail > head:
+                    back = row[queue[tail - 1]]
+                    if (back < value) if maximum else (back > value):
+                        tail -= 1
+                    else:
+                        break
+                queue[tail] = i
+                tail += 1
+
+            if i - last_missing >= window:
+                front = queue[head]
+                values[s, i] = row[front]
+                positions[s, i] = front - (i - window + 1)
+
+    return values, positions
@@ -1,7 +1,12 @@
+import math
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
 from itertools import product
 import logging
+from src.indicators.primitives import (as_list, ema, first_valid, float_dtype, multi_frame,
+                                       source_block)
+from src.indicators.streaming import SmaSeededEma
 
 
 class MACD:
@@ -69,6 +74,8 @@ class MACD:
                     'step': 1
                 },
             },
+            # Bars until the first signal value, the EMAs take longer to settle
+            'warmup': ['slow_length', 'signal_smoothing'],
         }
 
     @staticmethod
@@ -76,7 +83,8 @@ class MACD:
                  source: str, signal_smoothing: int) -> pd.DataFrame:
         """Calculate the Moving Average Convergence Divergence"""
         postfix = f'_{fast_length}_{slow_length}_{signal_smoothing}'
-        macd = ta.macd(data[source], 
+        # Computed in float64, float32 candles get float32 outputs
+        macd = ta.macd(data[source].astype(np.float64, copy=False),
                        fast=fast_length, 
                        slow=slow_length, 
                        signal=signal_smoothing
@@ -88,37 +96,112 @@ class MACD:
             f'MACDs{postfix}': 'Signal',
         }, inplace=True)
 
-        return macd
+        return macd.astype(float_dtype(data[source]), copy=False)
 
     @staticmethod
-    def run_multi(data: pd.DataFrame, fast_length: int | list[int], 
-                  slow_length: int | list[int], source: str, 
+    def lookback(**_params) -> None:
+        """Number of bars each output depends on, None as the EMAs never forget"""
+        return None
+
+    @staticmethod
+    def plan(fast_length: int, slow_length: int, source: str, signal_smoothing: int) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        fast, slow = sorted((fast_length, slow_length))
+        values = ('source', source)
+        macd = ('sub', ('ema', values, fast), ('ema', values, slow))
+        signal = ('ema_valid', macd, signal_smoothing)
+        return {'MACD': macd, 'Histogram': ('sub', macd, signal), 'Signal': signal}
+
+    @staticmethod
+    def init(history: pd.DataFrame, fast_length: int, slow_length: int,
+             source: str, signal_smoothing: int) -> dict:
+        """Create the streaming state from the closed bars in history"""
+        # ta.macd swaps the lengths if slow < fast
+        fast, slow = sorted((fast_length, slow_length))
+        state = {
+            'source': source,
+            'fast': SmaSeededEma(fast),
+            'slow': SmaSeededEma(slow),
+            'signal': SmaSeededEma(signal_smoothing),
+            'macd_started': False,
+        }
+        values = history[source].to_numpy(dtype=float)
+        macd = state['fast'].fill(values) - state['slow'].fill(values)
+        valid = np.flatnonzero(macd == macd)
+        if len(valid):
+            state['signal'].fill(macd[valid[0]:])
+            state['macd_started'] = True
+
+        return state
+
+    @staticmethod
+    def update(state: dict, bar, closed: bool = True) -> dict:
+        """
+        Add a bar and return its output row. With closed=False the bar is the
+        still-forming one: its output is returned but the state is not changed.
+        """
+        return MACD._step(state, float(bar[state['source']]), closed)
+
+    @staticmethod
+    def _step(state: dict, value: float, closed: bool) -> dict:
+        macd = state['fast'].push(value, closed) - state['slow'].push(value, closed)
+
+        # The signal line starts at the first valid MACD value
+        signal = math.nan
+        if state['macd_started'] or macd == macd:
+            signal = state['signal'].push(macd, closed)
+            if closed:
+                state['macd_started'] = True
+
+        return {'MACD': macd, 'Histogram': macd - signal, 'Signal': signal}
+
+    @staticmethod
+    def run_multi(data: pd.DataFrame, fast_length: int | list[int],
+                  slow_length: int | list[int], source: str,
                   signal_smoothing: int | list[int]) -> pd.DataFrame:
         """
-        Calculat the Moving Average Convergence Divergence with parameter variations
+        Calculate the Moving Average Convergence Divergence for every symbol and
+        (fast, slow, signal) combination.
+
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns.
+            fast_length (int | list[int]): One or more fast EMA lengths.
+            slow_length (int | list[int]): One or more slow EMA lengths.
+            source (str): The field to use.
+            signal_smoothing (int | list[int]): One or more signal EMA lengths.
+
+        Returns:
+            pd.DataFrame: Columns (f"MACD_{fast}_{slow}_{signal}", symbol),
+            MACDh (histogram) and MACDs (signal) likewise, named like ta.macd.
+            float32 for float32 candles and float64 otherwise.
         """
-        # TODO: FIX BUGs
-        fast_length = [fast_length] if type(fast_length) == int else fast_length
-        slow_length = [slow_length] if type(slow_length) == int else slow_length
-        signal_smoothing = [signal_smoothing] if type(signal_smoothing) == int else signal_smoothing
-
-        parameter_combinations = list(product(fast_length, slow_length, signal_smoothing))
-        #columns = pd.MultiIndex.from_product([[f"MACD_{fast}_{slow}_{signal}" for fast, slow, signal in parameter_combinations], symbols])
-        symbols = data.columns.get_level_values(1).unique().to_list()
-
-        macd = pd.DataFrame(None, index=data.index)
-
-        for s in symbols:
-            for fast, slow, signal in parameter_combinations:
-                print(fast, slow, signal)
-                post = f'_{fast}_{slow}_{signal}'
-                # macd[f'MACD'+post], macd[f'MACDh'+post], macd[f'MACDs'+post]
-                macd = ta.macd(data[source], 
-                    fast=fast, 
-                    slow=slow, 
-                    signal=signal
-                    )
-                print(macd)
-
-        return macd
-        
\ No newline at end of file
+        values, symbols = source_block(data, source)
+        # ta.macd swaps the lengths if slow < fast
+        grid = product(as_list(fast_length), as_list(slow_length), as_list(signal_smoothing))
+        combinations = [(*sorted((fast, slow)), signal) for fast, slow, signal in grid]
+
+        # Every EMA length and MACD line is computed once
+        emas = {}
+        lines = {}
+        for fast, slow, _ in combinations:
+            for n in (fast, slow):
+                if n not in emas:
+                    emas[n] = ema(values, n)
+            if (fast, slow) not in lines:
+                macd = emas[fast] - emas[slow]
+                lines[(fast, slow)] = macd, first_valid(macd)
+
+        S = len(symbols)
+        names = []
+        out = np.empty((len(values), 3 * len(combinations) * S), dtype=values.dtype)
+        for fast, slow, signal in combinations:
+            macd, start = lines[(fast, slow)]
+            # The signal line starts at the first valid MACD value of each symbol
+            signal_line = ema(macd, signal, start)
+            postfix = f'_{fast}_{slow}_{signal}'
+            for name, line in (('MACD', macd), ('MACDh', macd - signal_line),
+                               ('MACDs', signal_line)):
+                out[:, len(names) * S:(len(names) + 1) * S] = line
+                names.append(name + postfix)
+
+        return multi_frame(out, names, data.index, symbols)
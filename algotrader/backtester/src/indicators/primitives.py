@@ -0,0 +1,404 @@
+"""
+Vectorized building blocks for the indicators.
+
+The functions work on float64 arrays of shape (time, symbols), so a single
+call computes a primitive for every symbol at once. Like pandas' rolling
+functions with the default min_periods, a window containing NaN gives NaN.
+
+float32 candles (see Data.get_candles) stay float32 in source_block, but the
+sums and smoothing here always run in float64: callers store the results in
+float_dtype(data), so float32 only costs the final rounding.
+"""
+import warnings
+import numpy as np
+import pandas as pd
+
+try:
+    from . import kernels
+except ImportError:
+    # Loaded as a top-level module, see tools/csv_indicator.py
+    import kernels
+
+# Smallest number of rows per block of the blocked cumulative sums, see RollingMoments
+BLOCK = 256
+
+
+def as_list(value) -> list:
+    """Parameter value or list of values as a list."""
+    if isinstance(value, (list, tuple, range, np.ndarray)):
+        return list(value)
+    return [value]
+
+
+def float_dtype(values) -> np.dtype:
+    """
+    The dtype outputs computed from values (an array, Series or DataFrame) are
+    stored in: float32 if values are all float32, float64 otherwise.
+    """
+    dtypes = values.dtypes if isinstance(values, pd.DataFrame) else [values.dtype]
+    if len(dtypes) and all(dtype == np.float32 for dtype in dtypes):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def source_block(data: pd.DataFrame, source: str) -> tuple[np.ndarray, list]:
+    """
+    The (time x symbol) values of one field of a multi-symbol candle frame.
+
+    Parameters:
+        data (pd.DataFrame): Candles with (field, symbol) columns, as returned by Data.get_candles.
+        source (str): The field, e.g. "close".
+
+    Returns:
+        tuple[np.ndarray, list]: The block, float32 for float32 candles and float64
+        otherwise, and the symbols of its columns.
+    """
+    frame = data[source]
+    if isinstance(frame, pd.Series):
+        frame = frame.to_frame()
+    return np.ascontiguousarray(frame.to_numpy(dtype=float_dtype(frame))), frame.columns.to_list()
+
+
+def multi_frame(values: np.ndarray, names: list[str], index: pd.Index,
+                symbols: list) -> pd.DataFrame:
+    """Wrap a (time x len(names) * len(symbols)) block into a (name, symbol) column frame."""
+    columns = pd.MultiIndex.from_product([names, symbols])
+    return pd.DataFrame(values, index=index, columns=columns, copy=False)
+
+
+def _as_2d(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float64)
+    return x.reshape(-1, 1) if x.ndim == 1 else x
+
+
+class RollingMoments:
+    """
+    Rolling count, sum, mean and variance of a (time x symbol) block for any
+    number of window lengths.
+
+    Plain cumulative sums lose precision as the running total grows with the
+    length of the series. Here the cumulative sums restart every block of
+    rows and are taken over the deviations from the block's mean, so the
+    error only depends on the block size and the local spread of the values.
+    A block is the smallest power of two rows holding both ``block`` rows and
+    four windows, so a window spans at most two blocks; the part in the
+    earlier block is moved to the later block's center.
+
+    The cumulative sums only depend on the block size, so they are computed
+    once for all windows sharing it and every window after that costs a few
+    array operations.
+    """
+
+    def __init__(self, x: np.ndarray, block: int = BLOCK):
+        self.shape = np.shape(x)
+        self.x = _as_2d(x)
+        self.block = block
+        # Without NaN every window is full, which saves the counting
+        self.complete = not np.isnan(self.x).any()
+        self._prepared = {}
+
+    def _prepare(self, size: int) -> dict:
+        """Blocked cumulative sums for blocks of size rows."""
+        if size in self._prepared:
+            return self._prepared[size]
+
+        x = self.x
+        T, S = x.shape
+        n_blocks = -(-T // size)
+
+        valid = ~np.isnan(x)
+        padded = np.zeros((n_blocks * size, S))
+        padded[:T] = np.where(valid, x, 0.0)
+        padded_valid = np.zeros((n_blocks * size, S), dtype=bool)
+        padded_valid[:T] = valid
+
+        blocks = padded.reshape(n_blocks, size, S)
+        block_valid = padded_valid.reshape(n_blocks, size, S)
+        block_count = block_valid.sum(axis=1)
+        center = np.divide(blocks.sum(axis=1), block_count,
+                           out=np.zeros((n_blocks, S)), where=block_count > 0)
+        deviation = np.where(block_valid, blocks - center[:, None, :], 0.0)
+
+        # Row k + 1 holds the sums up to row k, row 0 is zero
+        a1 = np.zeros((T + 1, S))
+        a1[1:] = np.cumsum(deviation, axis=1).reshape(-1, S)[:T]
+        a2 = np.zeros((T + 1, S))
+        a2[1:] = np.cumsum(deviation * deviation, axis=1).reshape(-1, S)[:T]
+        counts = np.zeros((T + 1, S), dtype=np.int64)
+        counts[1:] = np.cumsum(valid, axis=0)
+
+        prepared = {
+            'size': size,
+            'a1': a1,
+            'a2': a2,
+            'counts': counts,
+            'center': center,
+            'center_rows': np.repeat(center, size, axis=0)[:T],
+        }
+        self._prepared[size] = prepared
+        return prepared
+
+    def _moments(self, window: int, squares: bool):
+        """
+        Count, sum and sum of squares of the deviations from center, for the
+        windows ending at rows window - 1 .. T - 1. The count is just window
+        if there is no NaN.
+        """
+        T = len(self.x)
+        p = self._prepare(1 << (max(self.block, 4 * window) - 1).bit_length())
+        size, a1, a2, counts, center = p['size'], p['a1'], p['a2'], p['counts'], p['center']
+
+        count = window if self.complete else counts[window:] - counts[:T - window + 1]
+        s1 = a1[window:] - a1[:T - window + 1]
+        s2 = a2[window:] - a2[:T - window + 1] if squares else None
+
+        # Windows starting in the previous block: add that block's part,
+        # moved to the center of the block the window ends in. Windows
+        # starting on the first row of a block only drop the subtracted sum.
+        end = np.arange(window - 1, T)
+        rows = np.flatnonzero((end % size <= window - 1) & (end >= window))
+        if len(rows):
+            end = end[rows]
+            before = end - window
+            block_of = end // size
+            first_row = block_of * size
+            total1 = a1[first_row]
+            m = counts[first_row] - counts[before + 1]
+            shift = center[block_of - 1] - center[block_of]
+            s1[rows] += total1 + m * shift
+            if squares:
+                p1 = total1 - a1[before + 1]
+                s2[rows] += a2[first_row] + 2.0 * shift * p1 + m * shift * shift
+
+        return count, s1, s2, p['center_rows'][window - 1:]
+
+    def _windowed(self, window: int, squares: bool, compute, out: np.ndarray = None) -> np.ndarray:
+        if window < 1:
+            raise ValueError(f"window must be at least 1, got {window}")
+        if out is None:
+            out = np.empty(self.x.shape)
+        out[:window - 1] = np.nan
+        if window <= len(self.x):
+            count, s1, s2, center = self._moments(window, squares)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                if self.complete:
+                    out[window - 1:] = compute(count, s1, s2, center)
+                else:
+                    out[window - 1:] = np.where(count == window, compute(count, s1, s2, center),
+                                                np.nan)
+        return out.reshape(self.shape)
+
+    def sum(self, window: int, out: np.ndarray = None) -> np.ndarray:
+        """Rolling sum, like DataFrame.rolling(window).sum(). Written to out if given."""
+        return self._windowed(window, False, lambda n, s1, s2, c: s1 + n * c, out)
+
+    def mean(self, window: int, out: np.ndarray = None) -> np.ndarray:
+        """Rolling mean, like DataFrame.rolling(window).mean(). Written to out if given."""
+        return self._windowed(window, False, lambda n, s1, s2, c: c + s1 / n, out)
+
+    def var(self, window: int, ddof: int = 1, out: np.ndarray = None) -> np.ndarray:
+        """Rolling variance, like DataFrame.rolling(window).var(ddof). Written to out if given."""
+        def var(n, s1, s2, _c):
+            result = np.maximum(s2 - s1 * s1 / n, 0.0) / (n - ddof)
+            return np.where(n > ddof, result, np.nan)
+        return self._windowed(window, True, var, out)
+
+    def std(self, window: int, ddof: int = 1, out: np.ndarray = None) -> np.ndarray:
+        """
+        Rolling standard deviation, like DataFrame.rolling(window).std(ddof).
+        Written to out if given.
+        """
+        out = self.var(window, ddof, out)
+        return np.sqrt(out, out=out)
+
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling sum over the first axis, see RollingMoments."""
+    return RollingMoments(x).sum(window)
+
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling mean over the first axis, see RollingMoments."""
+    return RollingMoments(x).mean(window)
+
+
+def rolling_var(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling variance over the first axis, see RollingMoments."""
+    return RollingMoments(x).var(window, ddof)
+
+
+def rolling_std(x: np.ndarray, window: int, ddof: int = 1) -> np.ndarray:
+    """Rolling standard deviation over the first axis, see RollingMoments."""
+    return RollingMoments(x).std(window, ddof)
+
+
+def _rolling_extreme(x: np.ndarray, window: int, maximum: bool, positions: bool = False):
+    """
+    Rolling max (or min) over the first axis, or with positions=True the
+    position of its first occurrence in the window, like argmax.
+    Windows containing NaN give NaN.
+
+    With numba this is the monotonic deque in kernels.rolling_extreme.
+    Without it, Van Herk/Gil-Werman: with blocks of ``window`` rows, every
+    window is the suffix of one block plus the prefix of the next, so the
+    running extremes of each block from both ends give all windows in O(n)
+    whole-array operations, without a per-row loop.
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1, got {window}")
+    x2 = _as_2d(x)
+    T, S = x2.shape
+    if kernels.available():
+        # The kernel walks each symbol's rows, which are contiguous in x2.T
+        values, rows = kernels.rolling_extreme(np.ascontiguousarray(x2.T), window, maximum)
+        return (rows if positions else values).T.reshape(np.shape(x))
+
+    out = np.full((T, S), np.nan)
+    if T < window:
+        return out.reshape(np.shape(x))
+
+    missing = np.isnan(x2)
+    has_missing = missing.any()
+    fill = -np.inf if maximum else np.inf
+    accumulate = np.maximum.accumulate if maximum else np.minimum.accumulate
+    beats = np.greater if maximum else np.less
+    ties = np.greater_equal if maximum else np.less_equal
+
+    # Laid out as (row in block, block, symbol), so the running extremes
+    # are a few passes over whole (block, symbol) planes
+    n_blocks = -(-T // window)
+    padded = np.full((n_blocks * window, S), fill)
+    padded[:T] = np.where(missing, fill, x2) if has_missing else x2
+    blocks = np.ascontiguousarray(padded.reshape(n_blocks, window, S).transpose(1, 0, 2))
+
+    prefix = accumulate(blocks, axis=0)
+    suffix = accumulate(blocks[::-1], axis=0)[::-1]
+
+    # The window ending at row k of block b starts at row k + 1 of block
+    # b - 1, or at the start of block b for the last row
+    left = np.full(blocks.shape, fill)
+    left[:-1, 1:] = suffix[1:, :-1]
+    left[-1] = suffix[0]
+
+    if positions:
+        rows = np.arange(n_blocks * window).reshape(n_blocks, window).T[:, :, None]
+        # First occurrence of the running extreme from the start of the block
+        new = np.ones(blocks.shape, dtype=bool)
+        new[1:] = beats(blocks[1:], prefix[:-1])
+        prefix_rows = np.maximum.accumulate(np.where(new, rows, -1), axis=0)
+        # From the end of the block ties move to the earlier row
+        new[-1] = True
+        new[:-1] = ties(blocks[:-1], suffix[1:])
+        suffix_rows = np.minimum.accumulate(np.where(new, rows, rows.size)[::-1], axis=0)[::-1]
+
+        left_rows = np.zeros(blocks.shape, dtype=np.int64)
+        left_rows[:-1, 1:] = suffix_rows[1:, :-1]
+        left_rows[-1] = suffix_rows[0]
+        best = np.where(ties(left, prefix), left_rows, prefix_rows)
+        best = best.transpose(1, 0, 2).reshape(-1, S)[window - 1:T]
+        best = best - np.arange(T - window + 1)[:, None]
+    else:
+        best = np.where(ties(left, prefix), left, prefix)
+        best = best.transpose(1, 0, 2).reshape(-1, S)[window - 1:T]
+
+    out[window - 1:] = best
+    if has_missing:
+        missing_count = np.zeros((T + 1, S), dtype=np.int64)
+        missing_count[1:] = np.cumsum(missing, axis=0)
+        out[window - 1:][missing_count[window:] != missing_count[:T - window + 1]] = np.nan
+
+    return out.reshape(np.shape(x))
+
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling maximum over the first axis, like DataFrame.rolling(window).max()."""
+    return _rolling_extreme(x, window, True)
+
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    """Rolling minimum over the first axis, like DataFrame.rolling(window).min()."""
+    return _rolling_extreme(x, window, False)
+
+
+def rolling_argmax(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Position (0 .. window - 1) of the first maximum in each window, NaN for
+    incomplete windows.
+    """
+    return _rolling_extreme(x, window, True, positions=True)
+
+
+def rolling_argmin(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Position (0 .. window - 1) of the first minimum in each window, NaN for
+    incomplete windows.
+    """
+    return _rolling_extreme(x, window, False, positions=True)
+
+
+def rolling_mad(x: np.ndarray, window: int, chunk_bytes: int = 32 * 1024 ** 2) -> np.ndarray:
+    """
+    Rolling mean absolute deviation from each window's own mean, as used by
+    CCI. Costs O(window) per row, computed in chunks of about chunk_bytes.
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1, got {window}")
+    x2 = _as_2d(x)
+    T, S = x2.shape
+    out = np.full((T, S), np.nan)
+    if T >= window:
+        windows = np.lib.stride_tricks.sliding_window_view(x2, window, axis=0)
+        step = max(1, chunk_bytes // (8 * S * window))
+        for start in range(0, len(windows), step):
+            chunk = windows[start:start + step]
+            mean = chunk.mean(axis=-1, keepdims=True)
+            first = window - 1 + start
+            out[first:first + len(chunk)] = np.abs(chunk - mean).mean(axis=-1)
+    return out.reshape(np.shape(x))
+
+
+def ema(x: np.ndarray, length: int, start: np.ndarray = None) -> np.ndarray:
+    """
+    EMA of every column, seeded like pandas_ta's ema: NaN before the SMA of the
+    first ``length`` values, then ewm(span=length, adjust=False).
+
+    Parameters:
+        x (np.ndarray): (time x symbol) values.
+        length (int): The EMA length.
+        start (np.ndarray, optional): Row each column starts at. Defaults to 0.
+
+    Returns:
+        np.ndarray: The EMAs, same shape as x.
+    """
+    x2 = _as_2d(x)
+    T, S = x2.shape
+    start = np.zeros(S, dtype=np.int64) if start is None else np.asarray(start, dtype=np.int64)
+    columns = np.arange(S)
+
+    rows = start[None, :] + np.arange(length)[:, None]
+    head = np.where(rows < T, x2[np.minimum(rows, T - 1), columns], np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)    # all-NaN columns
+        seed = np.nanmean(head, axis=0)
+
+    seed_row = start + length - 1
+    seeded = np.where(np.arange(T)[:, None] < seed_row[None, :], np.nan, x2)
+    inside = seed_row < T
+    seeded[seed_row[inside], columns[inside]] = seed[inside]
+
+    out = pd.DataFrame(seeded).ewm(span=length, adjust=False).mean().to_numpy()
+    return out.reshape(np.shape(x))
+
+
+def rma(x: np.ndarray, length: int) -> np.ndarray:
+    """Wilder's moving average of every column, like pandas_ta's rma."""
+    x2 = _as_2d(x)
+    out = pd.DataFrame(x2).ewm(alpha=1.0 / length, min_periods=length).mean().to_numpy()
+    return out.reshape(np.shape(x))
+
+
+def first_valid(x: np.ndarray) -> np.ndarray:
+    """Row of the first non-NaN value of every column, len(x) for all-NaN columns."""
+    x2 = _as_2d(x)
+    valid = ~np.isnan(x2)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(x2))
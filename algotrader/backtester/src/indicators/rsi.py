@@ -1,5 +1,9 @@
+import math
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
+from src.indicators.primitives import as_list, float_dtype, multi_frame, rma, source_block
+from src.indicators.streaming import EwmMean
 
 
 class RSI:
@@ -31,26 +35,108 @@ class RSI:
                     'options': ['close', 'open', 'high', 'low']
                 }
             },
+            # Bars until the first value, the smoothing takes longer to settle
+            'warmup': ['length', 1],
         }
 
     @staticmethod
     def run(data: pd.DataFrame, source: str = 'close', length: int = 14) -> pd.DataFrame:
         """Calculate the Simple Moving Average"""
         rsi = pd.DataFrame(None, index=data.index, columns=['rsi'])
-        rsi['rsi'] = ta.rsi(data[source], length=length).values
+        # Computed in float64, float32 candles get float32 outputs
+        rsi['rsi'] = ta.rsi(data[source].astype(np.float64, copy=False), length=length).to_numpy(
+            dtype=float_dtype(data[source]))
 
         return rsi
 
+    @staticmethod
+    def lookback(**_params) -> None:
+        """Number of bars each output depends on, None as the smoothing never forgets"""
+        return None
+
+    @staticmethod
+    def plan(source: str = 'close', length: int = 14) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        change = ('diff', ('source', source))
+        return {'rsi': ('rsi', ('rma', ('gain', change), length),
+                        ('rma', ('loss', change), length))}
+
+    @staticmethod
+    def init(history: pd.DataFrame, source: str = 'close', length: int = 14) -> dict:
+        """Create the streaming state from the closed bars in history"""
+        # Wilder smoothing of gains and losses, as ta.rsi (rma = ewm with alpha 1/length)
+        state = {
+            'source': source,
+            'prev': math.nan,
+            'started': False,
+            'positive': EwmMean(alpha=1.0 / length, min_periods=length),
+            'negative': EwmMean(alpha=1.0 / length, min_periods=length),
+        }
+        values = history[source].to_numpy(dtype=float)
+        if len(values):
+            change = np.diff(values, prepend=np.nan)
+            state['positive'].fill(np.where(change < 0, 0.0, change))
+            state['negative'].fill(np.where(change > 0, 0.0, change))
+            state['prev'] = values[-1]
+            state['started'] = True
+
+        return state
+
+    @staticmethod
+    def update(state: dict, bar, closed: bool = True) -> dict:
+        """
+        Add a bar and return its output row. With closed=False the bar is the
+        still-forming one: its output is returned but the state is not changed.
+        """
+        return {'rsi': RSI._step(state, float(bar[state['source']]), closed)}
+
+    @staticmethod
+    def _step(state: dict, value: float, closed: bool) -> float:
+        change = value - state['prev'] if state['started'] else math.nan
+        positive = 0.0 if change < 0 else change
+        negative = 0.0 if change > 0 else change
+
+        positive_avg = state['positive'].push(positive, closed)
+        negative_avg = state['negative'].push(negative, closed)
+        if closed:
+            state['prev'] = value
+            state['started'] = True
+
+        total = positive_avg + abs(negative_avg)
+        if total == 0:
+            # 0 / 0 on a flat series, NaN like the vectorized division
+            return math.nan
+        return 100.0 * positive_avg / total
+
     @staticmethod
     def run_multi(data: pd.DataFrame, source: str = 'close', length: list[int] | int = 14) -> pd.DataFrame:
-        """Calculate the Simple Moving Average"""
-        length = [length] if type(length) == int else length
-        symbols = data.columns.get_level_values(1).unique().to_list()
-        columns = pd.MultiIndex.from_product([[f'RSI_{x}' for x in length], symbols])
-        rsi = pd.DataFrame(None, index=data.index, columns=columns)
+        """
+        Calculate the Relative Strength Index for every symbol and length.
 
-        for symbol in symbols:
-            for l in length:
-                rsi[(f'RSI_{l}', symbol)] = ta.rsi(data[source][symbol], length=l).values
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns.
+            source (str): The field to use.
+            length (int | list[int]): One or more lengths.
 
-        return rsi
+        Returns:
+            pd.DataFrame: Columns (f"RSI_{length}", symbol), float32 for float32
+            candles and float64 otherwise.
+        """
+        lengths = as_list(length)
+        values, symbols = source_block(data, source)
+
+        # Gains and losses are shared by every length
+        change = np.diff(values, axis=0, prepend=np.nan)
+        positive = np.where(change < 0, 0.0, change)
+        negative = np.where(change > 0, 0.0, change)
+
+        S = len(symbols)
+        out = np.empty((len(values), len(lengths) * S), dtype=values.dtype)
+        for i, l in enumerate(lengths):
+            positive_avg = rma(positive, l)
+            negative_avg = rma(negative, l)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                total = positive_avg + np.abs(negative_avg)
+                out[:, i * S:(i + 1) * S] = 100 * positive_avg / total
+
+        return multi_frame(out, [f'RSI_{l}' for l in lengths], data.index, symbols)
@@ -0,0 +1,157 @@
+"""
+Trading sessions of a candle index, shared by the indicators that restart
+every session (VWAP, Currency Strength, Session High/Low, Opening Range).
+
+A SessionCalendar holds the session of every bar as integer arrays, computed
+once per index and session definition and cached, and runs the per-session
+cumulative sums and extremes on them with ufunc.accumulate instead of a
+groupby.
+
+This module only depends on numpy and pandas, so catalog.py can import it
+when it is loaded outside of the src package (see tools/csv_indicator.py).
+"""
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+RESETS = ['day', 'week', 'none']
+
+
+def session_keys(index: pd.DatetimeIndex, reset: str = 'day', reset_time: str = '00:00',
+                 timezone: str = 'UTC') -> np.ndarray:
+    """
+    The session every timestamp belongs to, as the session's start in
+    nanoseconds. Sessions start every day at reset_time in timezone. A "week"
+    starts with Monday's session, or with Sunday's when reset_time is after
+    midnight, like the FX week opening Sunday 17:00 in New York. "none" puts
+    everything in one session. Naive timestamps are UTC.
+    """
+    return _sessions(index, reset, reset_time, timezone)[0]
+
+
+def _sessions(index: pd.DatetimeIndex, reset: str, reset_time: str,
+              timezone: str) -> tuple[np.ndarray, np.ndarray]:
+    """session_keys, and the nanoseconds from the start of its session to every timestamp."""
+    reset = str(reset).lower()
+    if reset not in RESETS:
+        raise ValueError(f"Unknown reset '{reset}', expected 'day', 'week' or 'none'")
+    index = pd.DatetimeIndex(index)
+    if reset == 'none':
+        first = index.asi8[0] if len(index) else 0
+        return np.zeros(len(index), dtype=np.int64), index.asi8 - first
+
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+    hours, minutes = (int(part) for part in str(reset_time).split(':'))
+    offset = pd.Timedelta(hours=hours, minutes=minutes)
+
+    # Shifted so the session starts at local midnight, then floored to the day or week
+    local = index.tz_convert(timezone).tz_localize(None) - offset
+    start = local.normalize()
+    if reset == 'week':
+        # A session starting before midnight counts toward the next day's week
+        ahead = pd.Timedelta(days=1) if offset > pd.Timedelta(0) else pd.Timedelta(0)
+        start = start - pd.to_timedelta((start + ahead).dayofweek, unit='D')
+    return start.asi8, local.asi8 - start.asi8
+
+
+class SessionCalendar:
+    """
+    The sessions of an index as integer arrays:
+
+    - keys: the session of every bar, see session_keys,
+    - ids: the number of every bar's session, 0, 1, ... in order,
+    - starts: the offset of the first bar of every session,
+    - positions: the offset of every bar within its session,
+    - elapsed: the nanoseconds from the start of its session to every bar, in
+      the local time of the session (the first bar's time for 'none').
+
+    get() caches the calendars of the last max_entries (index, session) pairs,
+    so the session indicators on the same candles share one.
+    """
+
+    max_entries = 32
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()
+
+    def __init__(self, keys: np.ndarray, elapsed: np.ndarray):
+        self.keys = keys
+        self.elapsed = elapsed
+        first = np.r_[True, keys[1:] != keys[:-1]] if len(keys) else np.zeros(0, dtype=bool)
+        self.starts = np.flatnonzero(first)
+        self.ids = np.cumsum(first) - 1
+        self.positions = np.arange(len(keys)) - self.starts[self.ids] if len(keys) else self.ids
+        self.longest = int(self.positions.max()) + 1 if len(keys) else 0
+        for array in (self.keys, self.elapsed, self.starts, self.ids, self.positions):
+            array.flags.writeable = False
+
+    @staticmethod
+    def get(index: pd.DatetimeIndex, reset: str = 'day', reset_time: str = '00:00',
+            timezone: str = 'UTC') -> 'SessionCalendar':
+        """
+        The calendar of index for sessions restarting every reset ('day', 'week'
+        or 'none') at reset_time in timezone, from the cache if it was made before.
+        """
+        ns = pd.DatetimeIndex(index).asi8
+        # The whole index, bars may be missing anywhere
+        key = (str(reset).lower(), str(reset_time), str(timezone), str(getattr(index, 'tz', None)),
+               len(ns), hash(ns.tobytes()))
+
+        with SessionCalendar._lock:
+            calendar = SessionCalendar._entries.get(key)
+            if calendar is not None:
+                SessionCalendar._entries.move_to_end(key)
+                return calendar
+
+        calendar = SessionCalendar(*_sessions(index, reset, reset_time, timezone))
+        with SessionCalendar._lock:
+            SessionCalendar._entries[key] = calendar
+            while len(SessionCalendar._entries) > SessionCalendar.max_entries:
+                SessionCalendar._entries.popitem(last=False)
+        return calendar
+
+    @staticmethod
+    def clear() -> None:
+        with SessionCalendar._lock:
+            SessionCalendar._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def cumsum(self, values: np.ndarray) -> np.ndarray:
+        """
+        Cumulative sums of values (time first) restarting every session, added
+        up in order. NaN values are skipped and stay NaN, like a groupby cumsum.
+        """
+        return self._accumulate(np.add, values, 0.0)
+
+    def cummax(self, values: np.ndarray) -> np.ndarray:
+        """Running maximum of values (time first) within every session, NaN skipped and kept."""
+        return self._accumulate(np.maximum, values, -np.inf)
+
+    def cummin(self, values: np.ndarray) -> np.ndarray:
+        """Running minimum of values (time first) within every session, NaN skipped and kept."""
+        return self._accumulate(np.minimum, values, np.inf)
+
+    def _accumulate(self, ufunc, values: np.ndarray, identity: float) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        filled = np.where(missing, identity, values)
+
+        if len(self) * self.longest <= 2 * len(values) + 1024:
+            # The sessions as the rows of a (session x position) grid, padded
+            # with the identity, accumulated along the rows at once
+            grid = np.full((len(self), self.longest) + values.shape[1:], identity)
+            grid[self.ids, self.positions] = filled
+            out = ufunc.accumulate(grid, axis=1)[self.ids, self.positions]
+        else:
+            # Session lengths too uneven for a grid
+            out = np.empty_like(filled)
+            bounds = np.r_[self.starts, len(values)]
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                ufunc.accumulate(filled[start:end], axis=0, out=out[start:end])
+
+        out[missing] = np.nan
+        return out
@@ -1,6 +1,10 @@
+import numpy as np
 import pandas as pd
 import math
 import logging
+from src.indicators.primitives import (RollingMoments, as_list, float_dtype, multi_frame,
+                                       source_block)
+from src.indicators.streaming import RollingMean
 
 
 class SMA:
@@ -32,24 +36,66 @@ class SMA:
                     'options': ['close', 'open', 'high', 'low']
                 }
             },
+            # Bars before the first visible one to compute it from, see Indicators.warmup_bars
+            'warmup': ['window'],
         }
     
     @staticmethod
     def run(data: pd.DataFrame, source: str = 'close', window: int = 20):
         sma = pd.DataFrame(None, index=data.index, columns=['sma'])
-        sma['sma'] = data[source].rolling(window=window).mean().values
+        mean = data[source].rolling(window=window).mean()
+        sma['sma'] = mean.to_numpy(dtype=float_dtype(data[source]))
 
         return sma
+
+    @staticmethod
+    def lookback(source: str = 'close', window: int = 20) -> int:
+        """Number of bars each output depends on"""
+        return window
+
+    @staticmethod
+    def plan(source: str = 'close', window: int = 20) -> dict:
+        """The outputs as primitive expressions, see src.indicators.graph"""
+        return {'sma': ('mean', ('moments', ('source', source)), window)}
+
+    @staticmethod
+    def init(history: pd.DataFrame, source: str = 'close', window: int = 20) -> dict:
+        """Create the streaming state from the closed bars in history"""
+        state = {'source': source, 'sma': RollingMean(window)}
+        state['sma'].fill(history[source].to_numpy(dtype=float))
+
+        return state
+
+    @staticmethod
+    def update(state: dict, bar, closed: bool = True) -> dict:
+        """
+        Add a bar and return its output row. With closed=False the bar is the
+        still-forming one: its output is returned but the state is not changed.
+        """
+        return {'sma': state['sma'].push(float(bar[state['source']]), closed)}
     
     @staticmethod
-    def run_multi(data: pd.DataFrame, source: str = 'close', window: int | list[int] = 20):
-        window = [window] if type(window) == int else window
-        symbols = data.columns.get_level_values(1).unique().to_list()
-        columns = pd.MultiIndex.from_product([[f"SMA_{w}" for w in window], symbols])
-        sma = pd.DataFrame(None, index=data.index, columns=columns)
+    def run_multi(data: pd.DataFrame, source: str = 'close',
+                  window: int | list[int] = 20) -> pd.DataFrame:
+        """
+        Calculate the Simple Moving Average for every symbol and window.
 
-        for symbol in symbols:
-            for w in window:
-                sma[(f'SMA_{w}', symbol)] = data[source].rolling(window=w).mean().values
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns.
+            source (str): The field to average.
+            window (int | list[int]): One or more window lengths.
 
-        return sma
+        Returns:
+            pd.DataFrame: Columns (f"SMA_{window}", symbol), float32 for float32
+            candles and float64 otherwise.
+        """
+        windows = as_list(window)
+        values, symbols = source_block(data, source)
+        moments = RollingMoments(values)
+
+        S = len(symbols)
+        out = np.empty((len(values), len(windows) * S), dtype=values.dtype)
+        for i, w in enumerate(windows):
+            moments.mean(w, out=out[:, i * S:(i + 1) * S])
+
+        return multi_frame(out, [f'SMA_{w}' for w in windows], data.index, symbols)
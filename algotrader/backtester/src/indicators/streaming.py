@@ -0,0 +1,276 @@
+"""
+O(1) accumulators behind the incremental ``init``/``update`` indicator API.
+
+The accumulators repeat the arithmetic of the pandas kernels used by the batch
+``run`` implementations (compensated rolling sums, Welford variance, the
+``ewm`` recurrence), so feeding a series through them one value at a time
+gives the same numbers as the vectorized computation.
+
+``push(value)`` consumes a closed bar and returns the output for it.
+``push(value, commit=False)`` returns the output the bar would produce
+without changing the state, which is used for the still-forming bar.
+``fill(values)`` pushes a whole history into a fresh accumulator and returns
+the outputs.
+"""
+import math
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class RollingMean:
+    """Equivalent of ``Series.rolling(window).mean()``."""
+
+    def __init__(self, window: int, min_periods: int = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.sum_x = 0.0
+        self.neg_ct = 0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_same = 0
+        self.prev_value = math.nan
+
+    def push(self, value: float, commit: bool = True) -> float:
+        nobs, sum_x, neg_ct = self.nobs, self.sum_x, self.neg_ct
+        compensation_add, compensation_remove = self.compensation_add, self.compensation_remove
+        num_same, prev_value = self.num_same, self.prev_value
+
+        if not self.values:
+            prev_value = value
+
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if old == old:
+                nobs -= 1
+                y = -old - compensation_remove
+                t = sum_x + y
+                compensation_remove = t - sum_x - y
+                sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    neg_ct -= 1
+
+        if value == value:
+            nobs += 1
+            y = value - compensation_add
+            t = sum_x + y
+            compensation_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, value) < 0:
+                neg_ct += 1
+            num_same = num_same + 1 if value == prev_value else 1
+            prev_value = value
+
+        if nobs >= self.min_periods and nobs > 0:
+            result = sum_x / nobs
+            if num_same >= nobs:
+                result = prev_value
+            elif neg_ct == 0 and result < 0:
+                result = 0.0
+            elif neg_ct == nobs and result > 0:
+                result = 0.0
+        else:
+            result = math.nan
+
+        if commit:
+            if len(self.values) == self.window:
+                self.values.popleft()
+            self.values.append(value)
+            self.nobs, self.sum_x, self.neg_ct = nobs, sum_x, neg_ct
+            self.compensation_add, self.compensation_remove = compensation_add, compensation_remove
+            self.num_same, self.prev_value = num_same, prev_value
+
+        return result
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Push a whole history, one value at a time."""
+        return np.array([self.push(value) for value in np.asarray(values, dtype=np.float64)])
+
+
+class RollingVar:
+    """Equivalent of ``Series.rolling(window).var(ddof)`` (Welford's method)."""
+
+    def __init__(self, window: int, ddof: int = 1, min_periods: int = None):
+        self.window = window
+        self.ddof = ddof
+        self.min_periods = max(window if min_periods is None else min_periods, 1)
+        self.values = deque()
+        self.nobs = 0.0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_same = 0
+        self.prev_value = math.nan
+
+    def push(self, value: float, commit: bool = True) -> float:
+        nobs, mean_x, ssqdm_x = self.nobs, self.mean_x, self.ssqdm_x
+        compensation_add, compensation_remove = self.compensation_add, self.compensation_remove
+        num_same, prev_value = self.num_same, self.prev_value
+
+        if not self.values:
+            prev_value = value
+
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if old == old:
+                nobs -= 1
+                if nobs:
+                    prev_mean = mean_x - compensation_remove
+                    y = old - compensation_remove
+                    t = y - mean_x
+                    compensation_remove = t + mean_x - y
+                    mean_x = mean_x - t / nobs
+                    ssqdm_x = ssqdm_x - (old - prev_mean) * (old - mean_x)
+                else:
+                    mean_x = 0.0
+                    ssqdm_x = 0.0
+
+        if value == value:
+            nobs += 1
+            num_same = num_same + 1 if value == prev_value else 1
+            prev_value = value
+            prev_mean = mean_x - compensation_add
+            y = value - compensation_add
+            t = y - mean_x
+            compensation_add = t + mean_x - y
+            mean_x = mean_x + t / nobs
+            ssqdm_x = ssqdm_x + (value - prev_mean) * (value - mean_x)
+
+        if nobs >= self.min_periods and nobs > self.ddof:
+            if nobs == 1 or num_same >= nobs:
+                result = 0.0
+            else:
+                result = ssqdm_x / (nobs - self.ddof)
+        else:
+            result = math.nan
+
+        if commit:
+            if len(self.values) == self.window:
+                self.values.popleft()
+            self.values.append(value)
+            self.nobs, self.mean_x, self.ssqdm_x = nobs, mean_x, ssqdm_x
+            self.compensation_add, self.compensation_remove = compensation_add, compensation_remove
+            self.num_same, self.prev_value = num_same, prev_value
+
+        return result
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Push a whole history, one value at a time."""
+        return np.array([self.push(value) for value in np.asarray(values, dtype=np.float64)])
+
+
+class EwmMean:
+    """
+    Equivalent of ``Series.ewm(...).mean()`` given ``span`` or ``alpha``.
+    """
+
+    def __init__(self, span: float = None, alpha: float = None, adjust: bool = True,
+                 min_periods: int = 0):
+        # Same center of mass round trip as pandas
+        self.com = (span - 1) / 2.0 if span is not None else (1 - alpha) / alpha
+        self.alpha = 1.0 / (1.0 + self.com)
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = math.nan
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.started = False
+
+    def push(self, value: float, commit: bool = True) -> float:
+        weighted, old_wt, nobs = self.weighted, self.old_wt, self.nobs
+        is_observation = value == value
+
+        if not self.started:
+            weighted = value
+            nobs = int(is_observation)
+        else:
+            nobs += is_observation
+            if weighted == weighted:
+                old_wt *= 1.0 - self.alpha
+                if is_observation:
+                    new_wt = 1.0 if self.adjust else self.alpha
+                    if weighted != value:
+                        weighted = old_wt * weighted + new_wt * value
+                        weighted /= old_wt + new_wt
+                    old_wt = old_wt + new_wt if self.adjust else 1.0
+            elif is_observation:
+                weighted = value
+
+        result = weighted if nobs >= self.min_periods else math.nan
+
+        if commit:
+            self.weighted, self.old_wt, self.nobs = weighted, old_wt, nobs
+            self.started = True
+
+        return result
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized push of a whole history, the accumulator must be fresh."""
+        if self.started:
+            raise ValueError("fill needs a fresh accumulator")
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return values.copy()
+
+        weighted = pd.Series(values).ewm(com=self.com, adjust=self.adjust).mean().to_numpy()
+        observed = values == values
+        nobs = np.cumsum(observed)
+
+        # The weight of the average only depends on which values were observed
+        old_wt = 1.0
+        factor = 1.0 - self.alpha
+        new_wt = 1.0 if self.adjust else self.alpha
+        first = int(np.argmax(observed)) if nobs[-1] else len(values)
+        for is_observation in observed[first + 1:].tolist():
+            old_wt *= factor
+            if is_observation:
+                old_wt = old_wt + new_wt if self.adjust else 1.0
+
+        self.weighted, self.old_wt, self.nobs = weighted[-1], old_wt, int(nobs[-1])
+        self.started = True
+
+        return np.where(nobs >= self.min_periods, weighted, np.nan)
+
+
+class SmaSeededEma:
+    """
+    EMA seeded with the SMA of its first ``length`` values, like pandas_ta's
+    ``ema``: NaN for the first ``length - 1`` values, the SMA at ``length - 1``,
+    then ``ewm(span=length, adjust=False)``.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.seed_values = []
+        self.ewm = EwmMean(span=length, adjust=False)
+
+    def push(self, value: float, commit: bool = True) -> float:
+        if len(self.seed_values) < self.length:
+            seed_values = self.seed_values + [value]
+            if commit:
+                self.seed_values = seed_values
+            if len(seed_values) < self.length:
+                if commit:
+                    self.ewm.push(math.nan)
+                return math.nan
+            value = pd.Series(seed_values, dtype=np.float64).mean()
+
+        return self.ewm.push(value, commit)
+
+    def fill(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized push of a whole history, the accumulator must be fresh."""
+        if self.seed_values:
+            raise ValueError("fill needs a fresh accumulator")
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) < self.length:
+            return np.array([self.push(value) for value in values])
+
+        seeded = values.copy()
+        seeded[:self.length - 1] = np.nan
+        seeded[self.length - 1] = pd.Series(values[:self.length]).mean()
+        self.seed_values = values[:self.length].tolist()
+
+        return self.ewm.fill(seeded)
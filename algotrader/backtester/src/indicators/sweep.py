@@ -0,0 +1,160 @@
+"""
+Parameter sweeps that compute shared intermediate results once.
+
+An indicator supports sweeps with a ``plan(**params)`` method returning its
+outputs as expressions over primitive operations, e.g. for MACD(12, 26, 9)
+
+    ('sub', ('ema', ('source', 'close'), 12), ('ema', ('source', 'close'), 26))
+
+Equal expressions are equal tuples, so over a parameter grid every unique
+primitive (EMA(12), the rolling moments of close, ...) is computed once for
+all symbols and all combinations using it. The operations are the ones of
+src.indicators.graph.
+"""
+import logging
+import time
+from itertools import product
+import numpy as np
+import pandas as pd
+from src.indicators.graph import OPS, is_expression, walk
+from src.indicators.primitives import as_list, source_block
+
+log = logging.getLogger(__name__)
+
+
+class Sweep:
+    """
+    Plan of an indicator over a parameter grid.
+
+    The grid maps parameter names to a value or a list of values; parameters
+    not in the grid take their default from the indicator's info(). Every
+    combination of the grid values is computed.
+
+    Usage:
+        sweep = Sweep(MACD, {'fast_length': range(5, 15), 'slow_length': [26, 30]})
+        result = sweep.run(data)
+        result.xs((12, 26), level=('fast_length', 'slow_length'), axis=1)
+    """
+
+    def __init__(self, indicator, grid: dict):
+        if not hasattr(indicator, 'plan'):
+            raise ValueError(f"{getattr(indicator, '__name__', indicator)} does not support sweeps")
+
+        parameters = indicator.info()['parameters']
+        defaults = {name: spec.get('default') for name, spec in parameters.items()}
+        unknown = set(grid) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters {sorted(unknown)}, "
+                             f"expected some of {sorted(defaults)}")
+
+        self.indicator = indicator
+        self.parameters = list(grid)
+        values = [as_list(grid[name]) for name in self.parameters]
+        self.combinations = [dict(zip(self.parameters, combination))
+                             for combination in product(*values)]
+
+        # (combination, output, expression) for every output column
+        self.outputs = []
+        for combination in self.combinations:
+            for output, expression in indicator.plan(**{**defaults, **combination}).items():
+                self.outputs.append((combination, output, expression))
+
+        self.nodes = {}
+        for _, _, expression in self.outputs:
+            walk(expression, self.nodes)
+        self.report = {}
+
+    def naive_size(self) -> int:
+        """Number of primitives computed when every combination is computed on its own."""
+        total = 0
+        for combination in self.combinations:
+            nodes = {}
+            for c, _, expression in self.outputs:
+                if c is combination:
+                    walk(expression, nodes)
+            total += len(nodes)
+        return total
+
+    def run(self, data: pd.DataFrame, compare: bool = False) -> pd.DataFrame:
+        """
+        Compute every output of every combination for every symbol.
+
+        Parameters:
+            data (pd.DataFrame): Candles with (field, symbol) columns.
+            compare (bool): Also compute each combination on its own, for the
+                speedup in the report. Doubles the run time at least.
+
+        Returns:
+            pd.DataFrame: Columns with one level per grid parameter, then the
+            indicator output name and the symbol. float32 for float32 candles
+            and float64 otherwise.
+        """
+        start = time.perf_counter()
+        values, symbols = self._evaluate(data, self.outputs)
+        seconds = time.perf_counter() - start
+
+        columns = pd.MultiIndex.from_tuples(
+            [(*(combination[name] for name in self.parameters), output, symbol)
+             for combination, output, _ in self.outputs for symbol in symbols],
+            names=[*self.parameters, 'output', 'symbol'])
+        result = pd.DataFrame(values, index=data.index, columns=columns, copy=False)
+
+        self.report = {
+            'combinations': len(self.combinations),
+            'primitives': len(self.nodes),
+            'naive_primitives': self.naive_size(),
+            'seconds': seconds,
+        }
+        if compare:
+            start = time.perf_counter()
+            for combination in self.combinations:
+                self._evaluate(data, [o for o in self.outputs if o[0] is combination])
+            self.report['naive_seconds'] = time.perf_counter() - start
+            self.report['speedup'] = self.report['naive_seconds'] / seconds
+        log.info(f"{self.indicator.__name__} sweep: {self.report}")
+
+        return result
+
+    @staticmethod
+    def _evaluate(data: pd.DataFrame, outputs: list) -> tuple[np.ndarray, list]:
+        """Evaluate the output expressions into a (time x outputs * symbols) block."""
+        nodes = {}
+        for _, _, expression in outputs:
+            walk(expression, nodes)
+
+        # Results are dropped once their last user is computed
+        users = dict.fromkeys(nodes, 0)
+        for node in nodes:
+            for arg in node[1:]:
+                if is_expression(arg):
+                    users[arg] += 1
+        columns = {}
+        for i, (_, _, expression) in enumerate(outputs):
+            columns.setdefault(expression, []).append(i)
+
+        values = {}
+        symbols = None
+        out = None
+        for node in nodes:
+            op, args = node[0], node[1:]
+            if op == 'source':
+                result, source_symbols = source_block(data, *args)
+                symbols = symbols or source_symbols
+            else:
+                result = OPS[op](*(values[arg] if is_expression(arg) else arg for arg in args))
+                for arg in args:
+                    if is_expression(arg):
+                        users[arg] -= 1
+                        if users[arg] == 0:
+                            del values[arg]
+
+            if out is None:
+                # The first node is a source, float32 for float32 candles
+                S = len(symbols)
+                out = np.empty((len(data), len(outputs) * S), dtype=result.dtype)
+            for i in columns.get(node, ()):
+                out[:, i * S:(i + 1) * S] = result
+            if users[node]:
+                values[node] = result
+
+        return out, symbols
@@ -1 +1,15 @@
-from .base import *
\ No newline at end of file
+from .base import Portfolio
+from .engine import market_spreads, simulate
+from .robustness import distributions, monte_carlo
+from .stats import simulate_statistics, statistics, top
+
+__all__ = [
+    'Portfolio',
+    'market_spreads',
+    'simulate',
+    'distributions',
+    'monte_carlo',
+    'simulate_statistics',
+    'statistics',
+    'top'
+]
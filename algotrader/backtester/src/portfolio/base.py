@@ -1,38 +1,75 @@
 import pandas as pd
 import numpy as np
+from src.portfolio.engine import column_symbols, simulate
+from src.portfolio.robustness import distributions
+from src.portfolio.stats import bars_per_year, statistics, statistics_frame
 
 
 class Portfolio:
     initial_balance = 1_000
     volume = 1_000
 
-    def __init__(self, data: pd.DataFrame, positions: pd.DataFrame):
+    def __init__(self, data: pd.DataFrame, positions: pd.DataFrame, returns: pd.DataFrame = None):
         self.positions = positions
-        self.strat_rets = self.calculate_returns(data, positions)
+        # Given returns are the engine's, see robustness.py
+        self.engine_returns = returns is not None
+        self.strat_rets = self.calculate_returns(data, positions) if returns is None else returns
         self.stats = self.calculate_stats()
 
     def get_stats(self):
         return self.stats
     
     def calculate_stats(self) -> pd.DataFrame:
-        """Calculate portfolio statistics per symbol."""
-        profit_percentage = self.strat_rets.sum() * 100
+        """
+        Calculate portfolio statistics per column: the summed profit, and the
+        drawdown, Sharpe, trades and the other statistics of stats.py in one
+        pass over all columns, annualized by the bars per year of the index.
+        A trade is a run of bars holding a position, so a trade the engine
+        opened and closed within one bar is not counted.
+        """
+        # Summed in float64, also for float32 returns
+        profit_percentage = self.strat_rets.astype(np.float64).sum() * 100
 
         profit_money = profit_percentage / 100 * self.volume
 
-        #trades = (self.positions.diff() == 1).sum()
-
         # Combine all statistics in a DataFrame
         stats = pd.DataFrame({
             'Profit (%)': profit_percentage.round(2),
             'Profit ($)': profit_money.round(2),
-            #'Number of Trades': trades
         })
+        columns = statistics(self.strat_rets.to_numpy(), self.positions.to_numpy(),
+                             bars_per_year(self.strat_rets.index))
+        return stats.join(statistics_frame(columns, self.strat_rets.columns))
+
+    def equity_curve(self) -> pd.DataFrame:
+        """The balance of every column over time, compounding from initial_balance."""
+        return self.initial_balance * (1 + self.strat_rets.astype(np.float64).fillna(0)).cumprod()
+
+    def resample(self, method: str = 'bootstrap', n: int = 1000, seed=None,
+                 **options) -> pd.DataFrame:
+        """
+        Distributions of every column's return and maximum drawdown over n
+        resamples: the trades shuffled, the bars block-bootstrapped or the
+        entries delayed, see robustness.py.
 
-        return stats
+        Parameters:
+            method (str): 'shuffle', 'bootstrap' or 'delay'.
+            n (int): Resamples per column.
+            seed (optional): Seed of the resampling.
+            options: block, max_delay, workers and max_bytes of robustness.monte_carlo().
+
+        Returns:
+            pd.DataFrame: One row per resample, columns (statistic, column) in percent.
+        """
+        options.setdefault('engine', self.engine_returns)
+        return distributions(self.strat_rets, self.positions, method, n, seed, **options)
     
     @staticmethod
     def calculate_returns(data: pd.DataFrame, positions: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns of holding the positions, entered and exited at the next bars' open.
+        They have the dtype of the prices, float32 for float32 candles.
+        """
         entry_price = data['open'].shift(-1)
         exit_price = data['open'].shift(-2)
         returns = (exit_price - entry_price) / entry_price
@@ -55,4 +92,50 @@ class Portfolio:
         positions = cls.signals_to_positions(buy_signals, sell_signals)
 
         return cls(data, positions)
-    
\ No newline at end of file
+
+    @classmethod
+    def backtest(cls, data: pd.DataFrame, positions: pd.DataFrame, spread=0.0, slippage=0.0,
+                 commission=0.0, fraction=1.0, stop_loss=None, take_profit=None) -> 'Portfolio':
+        """
+        Backtest positions with costs, sizing and stop-loss/take-profit exits,
+        all columns at once (see engine.py). The returns are those of every
+        column's equity on every bar, held positions those after the exits.
+
+        Parameters:
+            data (pd.DataFrame | CandlePanel): Candles with (field, symbol) columns, or of
+                one symbol.
+            positions (pd.DataFrame): -1, 0 or 1 (or bool) for every bar of data. Every column
+                trades its symbol, the 'symbol' level of MultiIndex columns like a Sweep's.
+            spread, slippage (optional): In price units, one value or one per symbol as a dict or
+                Series, 0 for the symbols not in it. market_spreads() gives spreads from the
+                markets table.
+            commission (optional): Fraction of the notional per fill.
+            fraction (optional): Fraction of the equity every entry is sized to.
+            stop_loss, take_profit (optional): Fraction of the entry price, None for no exits.
+                These four take one value, or one per positions column as a Series.
+
+        Returns:
+            Portfolio: With the returns and held positions of every column.
+        """
+        opens = data['open']
+        symbols = list(opens.columns) if isinstance(opens, pd.DataFrame) else [None]
+        prices = [(data[field] if symbols == [None] else data[field][symbols]).to_numpy()
+                  for field in ('open', 'high', 'low', 'close')]
+
+        returns, held, _, _ = simulate(
+            *prices, positions.to_numpy(), column_symbols(positions.columns, symbols),
+            spread=_align(spread, symbols, 0.0), slippage=_align(slippage, symbols, 0.0),
+            commission=_align(commission, positions.columns, 0.0),
+            fraction=_align(fraction, positions.columns, 1.0),
+            stop_loss=_align(stop_loss, positions.columns),
+            take_profit=_align(take_profit, positions.columns))
+
+        return cls(data, pd.DataFrame(held, index=positions.index, columns=positions.columns),
+                   returns=pd.DataFrame(returns, index=positions.index, columns=positions.columns))
+
+
+def _align(values, labels, fill: float = np.nan):
+    """Values given as a dict or Series in the order of labels, fill for the missing ones."""
+    if isinstance(values, (dict, pd.Series)):
+        return pd.Series(values, dtype=np.float64).reindex(labels).fillna(fill).to_numpy()
+    return values
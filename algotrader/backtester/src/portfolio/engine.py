@@ -0,0 +1,244 @@
+"""
+Backtests of many position columns at once, with costs, sizing and exits.
+
+Every column of a positions array is one configuration, e.g. a symbol and a
+combination of strategy parameters, trading the prices of its symbol:
+
+- positions are -1 (short), 0 (flat) or 1 (long), decided on a bar's close
+  and traded at the next bar's open,
+- the candles are mid prices, buys fill half the spread plus the slippage
+  above them and sells as much below,
+- commission is a fraction of the traded notional, paid on entry and exit,
+- every entry is sized to fraction of the column's equity at the time,
+- stop_loss and take_profit close a trade once the price moves that fraction
+  of the entry price against or for it: at the open if it gaps past them,
+  else intrabar on the low and high, the stop first if a bar reaches both.
+  The column then stays flat until its position changes.
+
+The equity of every column starts at 1 and is marked at every close. All
+columns run bar by bar in one compiled kernel (see src/indicators/kernels.py),
+so besides the prices only the positions are held in memory; the returns and
+held positions of every bar are only kept if asked for.
+"""
+import logging
+import numpy as np
+import pandas as pd
+from src.data.markets import MarketCache
+from src.indicators.kernels import _jit
+
+log = logging.getLogger(__name__)
+
+
+@_jit
+def simulate_kernel(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    positions: np.ndarray, symbols: np.ndarray, cost: np.ndarray,
+                    commission: np.ndarray, fraction: np.ndarray, stop_loss: np.ndarray,
+                    take_profit: np.ndarray, returns: np.ndarray, held: np.ndarray) -> tuple:
+    """
+    Equity and number of trades of every column of positions (bars x columns,
+    int8), trading the prices (bars x symbols) of symbols[column]. cost is
+    half the spread plus the slippage per symbol; commission, fraction,
+    stop_loss and take_profit are per column, NaN for no stop or target.
+    returns and held (bars x columns) are filled with every bar's return and
+    position if they have a row per bar.
+    """
+    n, m = positions.shape
+    record = returns.shape[0] == n
+    equity = np.ones(m)
+    trades = np.zeros(m, dtype=np.int64)
+    position = np.zeros(m, dtype=np.int8)
+    units = np.zeros(m)
+    mark = np.zeros(m)
+    entry = np.zeros(m)
+    # The position a stop or target closed, not entered again until it changes
+    stopped = np.zeros(m, dtype=np.int8)
+
+    for t in range(n):
+        for c in range(m):
+            s = symbols[c]
+            before = equity[c]
+            value = before
+            o = open_[t, s]
+            p = position[c]
+
+            # No trading on a missing bar, the orders wait for the next one
+            if t > 0 and not np.isnan(o):
+                target = positions[t - 1, c]
+                if stopped[c] != 0:
+                    if target == stopped[c]:
+                        target = 0
+                    else:
+                        stopped[c] = 0
+
+                if target != p:
+                    if p != 0:
+                        fill = o - p * cost[s]
+                        value += units[c] * (fill - mark[c]) - abs(units[c]) * fill * commission[c]
+                        units[c] = 0.0
+                        p = 0
+                    if target != 0 and value > 0:
+                        fill = o + target * cost[s]
+                        units[c] = target * fraction[c] * value / fill
+                        value -= abs(units[c]) * fill * commission[c]
+                        mark[c] = fill
+                        entry[c] = fill
+                        p = target
+                        trades[c] += 1
+
+                if p != 0:
+                    exit_price = np.nan
+                    if p > 0:
+                        stop = entry[c] * (1 - stop_loss[c])
+                        limit = entry[c] * (1 + take_profit[c])
+                        if o <= stop or o >= limit:
+                            exit_price = o
+                        elif low[t, s] <= stop:
+                            exit_price = stop
+                        elif high[t, s] >= limit:
+                            exit_price = limit
+                    else:
+                        stop = entry[c] * (1 + stop_loss[c])
+                        limit = entry[c] * (1 - take_profit[c])
+                        if o >= stop or o <= limit:
+                            exit_price = o
+                        elif high[t, s] >= stop:
+                            exit_price = stop
+                        elif low[t, s] <= limit:
+                            exit_price = limit
+
+                    if not np.isnan(exit_price):
+                        fill = exit_price - p * cost[s]
+                        value += units[c] * (fill - mark[c]) - abs(units[c]) * fill * commission[c]
+                        units[c] = 0.0
+                        stopped[c] = p
+                        p = 0
+
+            if p != 0 and not np.isnan(close[t, s]):
+                value += units[c] * (close[t, s] - mark[c])
+                mark[c] = close[t, s]
+
+            position[c] = p
+            equity[c] = value
+            if record:
+                returns[t, c] = value / before - 1 if before > 0 else 0.0
+                held[t, c] = p
+
+    return equity, trades
+
+
+def _per(values, size: int, name: str, default: float = np.nan) -> np.ndarray:
+    """values as a float64 array of size, from a scalar or one value per item."""
+    values = np.asarray(default if values is None else values, dtype=np.float64)
+    if values.ndim == 0:
+        return np.full(size, float(values))
+    if values.shape != (size,):
+        raise ValueError(f"{name} has {values.size} values, expected 1 or {size}")
+    return np.ascontiguousarray(values)
+
+
+def as_positions(positions) -> np.ndarray:
+    """positions as C-ordered int8 -1/0/1, NaN flat, bool True long."""
+    positions = np.asarray(positions)
+    if positions.dtype.kind == 'f':
+        positions = np.nan_to_num(positions, nan=0.0)
+    if positions.dtype.kind != 'b':
+        positions = np.sign(positions)
+    positions = np.ascontiguousarray(positions, dtype=np.int8)
+    return positions.reshape(len(positions), -1)
+
+
+def simulate(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, positions,
+             symbols=None, spread=0.0, slippage=0.0, commission=0.0, fraction=1.0, stop_loss=None,
+             take_profit=None, record: bool = True) -> tuple:
+    """
+    Backtest every column of positions.
+
+    Parameters:
+        open_, high, low, close (np.ndarray): Mid prices, (bars x symbols) or one symbol's (bars,).
+        positions: (bars x columns) -1, 0 or 1 per bar, see as_positions.
+        symbols (optional): The price column every position column trades.
+            Defaults to 0 for all columns.
+        spread, slippage (optional): In price units, one value or one per symbol.
+        commission (optional): Fraction of the notional per fill, one value or one per column.
+        fraction (optional): Fraction of the equity every entry is sized to, one value or one
+            per column.
+        stop_loss, take_profit (optional): Fraction of the entry price, one value or one per
+            column, NaN or None for none.
+        record (bool): Keep the return and position of every bar and column. Without them
+            a run needs no memory per bar.
+
+    Returns:
+        tuple: The returns (bars x columns, float64) and held positions (bars x columns, int8),
+            None if not record, then the final equity and number of trades of every column.
+    """
+    # Views stay views, e.g. the fields of a CandlePanel
+    prices = [np.asarray(a, dtype=np.float64).reshape(len(a), -1)
+              for a in (open_, high, low, close)]
+    positions = as_positions(positions)
+    bars, columns = positions.shape
+    n_symbols = prices[0].shape[1]
+    if any(a.shape != (bars, n_symbols) for a in prices):
+        raise ValueError(f"Prices must all be ({bars} x {n_symbols}) like the positions' bars")
+
+    if symbols is None:
+        symbols = np.zeros(columns, dtype=np.int64)
+    symbols = np.asarray(symbols, dtype=np.int64)
+    if symbols.shape != (columns,) or (columns and (symbols.min() < 0
+                                                    or symbols.max() >= n_symbols)):
+        raise ValueError(f"symbols must give one of {n_symbols} price columns for each of "
+                         f"{columns} columns")
+
+    cost = _per(spread, n_symbols, 'spread', 0.0) / 2 + _per(slippage, n_symbols, 'slippage', 0.0)
+    returns = np.empty((bars if record else 0, columns))
+    held = np.empty((bars if record else 0, columns), dtype=np.int8)
+    equity, trades = simulate_kernel(*prices, positions, symbols, cost,
+                                     _per(commission, columns, 'commission', 0.0),
+                                     _per(fraction, columns, 'fraction', 1.0),
+                                     _per(stop_loss, columns, 'stop_loss'),
+                                     _per(take_profit, columns, 'take_profit'), returns, held)
+    if not record:
+        return None, None, equity, trades
+    return returns, held, equity, trades
+
+
+def market_spreads(symbols: list[str], ticks=1.0, exchange: str = None) -> np.ndarray:
+    """
+    Spreads of ticks times every symbol's min_move in the markets table, e.g.
+    ticks=10 for a 1 pip spread on 5 digit FX quotes. Symbols without a
+    market or min_move get no spread.
+
+    Parameters:
+        symbols (list[str]): Symbol names.
+        ticks (optional): Ticks of spread, one value or one per symbol.
+        exchange (str, optional): Only use markets on this exchange.
+
+    Returns:
+        np.ndarray: The spread of every symbol in price units.
+    """
+    spreads = np.zeros(len(symbols))
+    for i, symbol_id in enumerate(MarketCache.get_symbol_ids(list(symbols), exchange)):
+        market = MarketCache.get_market(symbol_id) if symbol_id is not None else None
+        if market is None or market[2] is None:
+            log.warning(f"No min_move for {symbols[i]}, backtesting it without spread")
+            continue
+        spreads[i] = market[2]
+    return spreads * _per(ticks, len(symbols), 'ticks')
+
+
+def column_symbols(columns: pd.Index, symbols: list) -> np.ndarray:
+    """
+    The position of every column's symbol in symbols: the 'symbol' level of
+    MultiIndex columns (else their last level), or the labels themselves.
+    Everything trades the only symbol of single-symbol candles.
+    """
+    if len(symbols) == 1:
+        return np.zeros(len(columns), dtype=np.int64)
+    if isinstance(columns, pd.MultiIndex):
+        names = columns.get_level_values('symbol' if 'symbol' in columns.names else -1)
+    else:
+        names = columns
+    positions = pd.Index(symbols).get_indexer(names)
+    if (positions < 0).any():
+        missing = sorted(set(names[positions < 0]), key=str)
+        raise ValueError(f"No candles for the positions of {missing}")
+    return positions.astype(np.int64)
@@ -0,0 +1,293 @@
+"""
+Grid and random search over strategy parameters on a process pool.
+
+A strategy is a module-level function taking the candles as a CandlePanel
+and its parameters as keyword arguments, and returning positions (-1/0/1
+or bool) for every bar with one column per symbol, like Portfolio.backtest
+takes them:
+
+    def crossover(candles, fast, slow):
+        close = candles['close']
+        return close.rolling(fast).mean() > close.rolling(slow).mean()
+
+    optimizer = Optimizer(crossover, {'fast': range(5, 50, 5), 'slow': [100, 200]}, spread=0.0001)
+    result = optimizer.run(panel, progress=print)
+
+The candles are copied once into shared memory (see src/data/shared.py),
+which every worker attaches read-only, so no task pickles them. The
+combinations go to the workers in batches, and every batch comes back as
+one STATS record (see stats.py) per combination and symbol. Parameters
+named like the engine's per column options (commission, fraction,
+stop_loss and take_profit) are given to the engine instead of the strategy.
+"""
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from src.data.panel import CandlePanel
+from src.data.shared import SharedPanel
+from src.portfolio.base import _align
+from src.portfolio.engine import as_positions, column_symbols
+from src.portfolio.stats import STATS, bars_per_year, simulate_statistics, statistics_frame
+
+log = logging.getLogger(__name__)
+
+ENGINE_PARAMETERS = ('commission', 'fraction', 'stop_loss', 'take_profit')
+METHODS = ('grid', 'random')
+
+# The candles and task of this worker, see _init
+_worker = {}
+
+
+def _init(candles, strategy, space: dict, options: dict) -> None:
+    """Set up a worker, attaching to the candles if they are a SharedPanel spec."""
+    _worker.clear()
+    _worker.update(candles=SharedPanel.attach(candles) if isinstance(candles, dict) else candles,
+                   strategy=strategy, space=space, options=options)
+
+
+def _positions(combinations: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+    """
+    The strategy's positions for the combinations (indices into the space) in the worker.
+
+    Returns:
+        tuple: The positions (bars x columns, int8), the combination and symbol of
+            every column, and the engine parameters of the space per column.
+    """
+    candles, space = _worker['candles'], _worker['space']
+    shape = [len(values) for values in space.values()]
+    blocks, owners, symbols = [], [], []
+    engine = {name: [] for name in ENGINE_PARAMETERS if name in space}
+
+    for combination in combinations:
+        digits = np.unravel_index(combination, shape)
+        parameters = {name: values[i] for (name, values), i in zip(space.items(), digits)}
+        signal_parameters = {name: value for name, value in parameters.items()
+                             if name not in engine}
+        positions = _worker['strategy'](candles, **signal_parameters)
+        if isinstance(positions, pd.Series):
+            positions = positions.to_frame()
+        columns = column_symbols(positions.columns, candles.symbols)
+        blocks.append(as_positions(positions.to_numpy()))
+        owners.append(np.full(len(columns), combination, dtype=np.int64))
+        symbols.append(columns)
+        for name in engine:
+            engine[name].append(np.full(len(columns), parameters[name], dtype=np.float64))
+
+    return (np.concatenate(blocks, axis=1), np.concatenate(owners), np.concatenate(symbols),
+            {name: np.concatenate(values) for name, values in engine.items()})
+
+
+def _run_batch(combinations: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Backtest the combinations in the worker.
+
+    Returns:
+        tuple: The combination and symbol of every column, and its STATS record.
+    """
+    positions, owners, symbols, engine = _positions(combinations)
+    fields = [_worker['candles'].field(field) for field in ('open', 'high', 'low', 'close')]
+    stats = simulate_statistics(*fields, positions, symbols, **engine, **_worker['options'])
+    return owners, symbols, stats
+
+
+class Optimizer:
+    """
+    Search of a strategy's parameter space.
+
+    space maps every parameter to its values. 'grid' runs every combination,
+    'random' samples combinations of them without repetition. Every
+    combination runs for every symbol of the candles.
+
+    Parameters:
+        strategy: Module-level function(candles, **parameters) -> positions.
+        space (dict): Parameter name -> list of values.
+        method (str): 'grid' or 'random'.
+        samples (int, optional): Combinations to sample for 'random'.
+        seed (int, optional): Seed of the sampling.
+        workers (int, optional): Processes, all cores by default. 1 runs in this process.
+        batch_size (int, optional): Combinations per task. By default every worker gets
+            about four, as many as keep their positions within max_bytes.
+        start_method (str, optional): multiprocessing start method, the platform's by default.
+        options: Of simulate_statistics: spread, slippage (one value or per symbol as a
+            dict or Series), commission, fraction, stop_loss, take_profit, periods_per_year
+            (from the candles' index by default) and max_bytes.
+    """
+
+    # The function running a batch of combinations in the workers
+    task = staticmethod(_run_batch)
+
+    def __init__(self, strategy, space: dict, method: str = 'grid', samples: int = None,
+                 seed: int = None, workers: int = None, batch_size: int = None,
+                 start_method: str = None, **options):
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {list(METHODS)}")
+        if method == 'random' and not samples:
+            raise ValueError("Random search needs a number of samples")
+        self.space = {name: list(values) for name, values in space.items()}
+        if not all(self.space.values()):
+            raise ValueError("Every parameter needs at least one value")
+
+        self.strategy = strategy
+        self.method = method
+        self.samples = samples
+        self.seed = seed
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.start_method = start_method
+        # Parameters of the space win over fixed engine options
+        self.options = {name: value for name, value in options.items() if name not in self.space}
+        self.cancelled = False
+        self._cancel = threading.Event()
+
+    @property
+    def size(self) -> int:
+        """The number of combinations the search runs."""
+        total = math.prod(len(values) for values in self.space.values())
+        return min(self.samples, total) if self.method == 'random' else total
+
+    def combinations(self) -> np.ndarray:
+        """
+        The indices of the combinations to run, in the order of
+        itertools.product over the space.
+        """
+        total = math.prod(len(values) for values in self.space.values())
+        if self.method == 'grid':
+            return np.arange(total, dtype=np.int64)
+        rng = np.random.default_rng(self.seed)
+        return np.sort(rng.choice(total, self.size, replace=False)).astype(np.int64)
+
+    def parameters(self, combinations: np.ndarray) -> pd.MultiIndex:
+        """The parameter values of combinations, one level per parameter."""
+        shape = [len(values) for values in self.space.values()]
+        digits = np.unravel_index(np.asarray(combinations, dtype=np.int64), shape)
+        return pd.MultiIndex.from_arrays([pd.Index(values)[i]
+                                          for values, i in zip(self.space.values(), digits)],
+                                         names=list(self.space))
+
+    def cancel(self) -> None:
+        """
+        Stop a running search after the batches in progress, from another
+        thread or the progress callback.
+        """
+        self._cancel.set()
+
+    def stream(self, data: CandlePanel | pd.DataFrame, progress=None):
+        """
+        Run the search, yielding the statistics of every batch as it finishes.
+
+        Parameters:
+            data (CandlePanel | pd.DataFrame): Candles with (field, symbol) columns.
+            progress (optional): Called with (combinations done, combinations) after every batch.
+
+        Yields:
+            pd.DataFrame: The statistics (see stats.statistics_frame) of the batch's
+                combinations, indexed by their parameters and symbol.
+        """
+        candles = data if isinstance(data, CandlePanel) else CandlePanel.from_frame(data)
+        for combinations, symbols, stats in self._batches(candles, progress):
+            yield self._frame(candles, combinations, symbols, stats)
+
+    def run(self, data: CandlePanel | pd.DataFrame, progress=None) -> pd.DataFrame:
+        """
+        Run the search, see stream. After a cancel() the combinations finished
+        before it are returned and cancelled is set.
+
+        Returns:
+            pd.DataFrame: The statistics of every combination and symbol, in the order
+                of combinations().
+        """
+        candles = data if isinstance(data, CandlePanel) else CandlePanel.from_frame(data)
+        results = list(self._batches(candles, progress))
+        dtypes = (np.int64, np.int64, STATS)
+        combinations, symbols, stats = (np.concatenate([result[i] for result in results])
+                                        if results else np.empty(0, dtype=dtype)
+                                        for i, dtype in enumerate(dtypes))
+        # Batches finish in any order
+        order = np.lexsort([symbols, combinations])
+        return self._frame(candles, combinations[order], symbols[order], stats[order])
+
+    def _frame(self, candles: CandlePanel, combinations: np.ndarray, symbols: np.ndarray,
+               stats: np.ndarray) -> pd.DataFrame:
+        parameters = self.parameters(combinations)
+        index = pd.MultiIndex.from_arrays(
+            [*(parameters.get_level_values(i) for i in range(parameters.nlevels)),
+             pd.Index(candles.symbols)[symbols]], names=[*self.space, 'symbol'])
+        return statistics_frame(stats, index)
+
+    def _batch_size(self, candles: CandlePanel, combinations: int, workers: int) -> int:
+        """About four batches per worker, with their positions within max_bytes."""
+        max_bytes = self.options.get('max_bytes', 2 ** 26)
+        most = max(1, max_bytes // max(len(candles.index) * len(candles.symbols), 1))
+        return int(max(1, min(math.ceil(combinations / (4 * workers)), most)))
+
+    def _options(self, candles: CandlePanel) -> dict:
+        """The options of the workers' task."""
+        options = dict(self.options)
+        for name in ('spread', 'slippage'):
+            if name in options:
+                options[name] = _align(options[name], candles.symbols, 0.0)
+        options.setdefault('periods_per_year', bars_per_year(candles.index))
+        return options
+
+    def _batches(self, candles: CandlePanel, progress=None):
+        """The task's results for every batch, (combinations, symbols, ...), as they finish."""
+        self._cancel.clear()
+        self.cancelled = False
+        combinations = self.combinations()
+        options = self._options(candles)
+        workers = max(1, min(self.workers, len(combinations)))
+        batch_size = self.batch_size or self._batch_size(candles, len(combinations), workers)
+        batches = [combinations[i:i + batch_size] for i in range(0, len(combinations), batch_size)]
+        log.info(f"Optimizing {self.strategy.__name__} over {len(combinations)} combinations x "
+                 f"{len(candles.symbols)} symbols, {len(batches)} batches on {workers} workers")
+
+        start = time.perf_counter()
+        done = 0
+        for result in self._results(candles, batches, workers, options):
+            done += len(np.unique(result[0]))
+            yield result
+            if progress is not None:
+                progress(done, len(combinations))
+            if self._cancel.is_set():
+                self.cancelled = True
+                log.info(f"Optimization cancelled after {done} of {len(combinations)} combinations")
+                return
+        log.info(f"Optimized {done} combinations in {time.perf_counter() - start:.1f} s")
+
+    def _results(self, candles: CandlePanel, batches: list, workers: int, options: dict):
+        """
+        The results of the batches, in this process for one worker, else as
+        the pool finishes them.
+        """
+        if workers == 1:
+            _init(candles, self.strategy, self.space, options)
+            for batch in batches:
+                if self._cancel.is_set():
+                    return
+                yield self.task(batch)
+            return
+
+        with SharedPanel(candles) as shared:
+            # Compiled for the read-only shared arrays before forking, so the
+            # workers inherit the kernels instead of compiling their own
+            fields = [shared.panel.field(field)[:2] for field in ('open', 'high', 'low', 'close')]
+            simulate_statistics(*fields, np.zeros((len(fields[0]), 1), dtype=np.int8), [0])
+
+            context = multiprocessing.get_context(self.start_method)
+            with context.Pool(workers, initializer=_init,
+                              initargs=(shared.spec, self.strategy, self.space, options)) as pool:
+                results = pool.imap_unordered(self.task, batches)
+                for _ in batches:
+                    while True:
+                        try:
+                            result = results.next(timeout=0.1)
+                            break
+                        except multiprocessing.TimeoutError:
+                            if self._cancel.is_set():
+                                return
+                    yield result
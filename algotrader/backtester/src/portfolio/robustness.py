@@ -0,0 +1,236 @@
+"""
+Monte Carlo and bootstrap distributions of a backtest's return and drawdown.
+
+A resampling is one 2-D array of indices, (resamples x length), into the
+values it reorders, with len(values) standing for a bar or trade that
+earns nothing. Three methods build them:
+
+- 'shuffle' reorders the returns of the trades (see trade_returns). The
+  total return stays, the drawdown depends on the order.
+- 'bootstrap' draws blocks of consecutive bars' returns with replacement,
+  wrapping around the end, keeping the dependence within a block.
+- 'delay' enters every trade up to max_delay bars late: the bars after its
+  entry bar, up to its exit, earn nothing. The entry bar keeps its costs.
+
+Trades are read from returns like engine.simulate()'s by default: a trade's
+first bar carries its entry fill and the bar after its last one its exit
+fill. With engine=False every bar's return is that of its own position, like
+Portfolio.calculate_returns' from the following opens, so a delay skips the
+trade's first bars instead.
+
+resample_statistics() then takes all resamples in vectorized passes over
+chunks of them within a memory budget. monte_carlo() generates and takes
+the resamples chunk by chunk, optionally on a process pool; every chunk has
+its own seed spawned from seed, so the result does not depend on the
+number of workers.
+"""
+import logging
+import multiprocessing
+import numpy as np
+import pandas as pd
+from src.portfolio.engine import as_positions
+from src.portfolio.stats import LABELS
+
+log = logging.getLogger(__name__)
+
+METHODS = ('shuffle', 'bootstrap', 'delay')
+
+RESAMPLE = np.dtype([
+    ('total_return', np.float64),
+    ('max_drawdown', np.float64),
+])
+
+# The returns and positions of this worker, see _init
+_worker = {}
+
+
+def trade_returns(returns, positions, engine: bool = True) -> np.ndarray:
+    """
+    The compounded return of every trade of one column, in the order they
+    were entered. Bars are attributed to trades like in stats.py, or to the
+    position they hold if not engine (see the module docstring).
+    """
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64).ravel())
+    positions = as_positions(positions).ravel()
+    previous = np.r_[0, positions[:-1]]
+    entries = (positions != 0) & (positions != previous)
+    ids = np.cumsum(entries) - 1
+    owners = np.where(positions != 0, ids, -1)
+    if engine:
+        owners = np.where(previous != 0, np.r_[-1, ids[:-1]], owners)
+    held = owners >= 0
+    with np.errstate(divide='ignore'):
+        growth = np.bincount(owners[held], weights=np.log1p(returns[held]),
+                             minlength=int(entries.sum()))
+    return np.expm1(growth)
+
+
+def shuffle_indices(length: int, n: int, seed=None) -> np.ndarray:
+    """n random permutations of range(length), (n x length)."""
+    rng = np.random.default_rng(seed)
+    return rng.permuted(np.tile(np.arange(length, dtype=np.int64), (n, 1)), axis=1)
+
+
+def block_indices(length: int, n: int, block: int = None, seed=None) -> np.ndarray:
+    """
+    n circular block bootstraps of range(length), (n x length), blocks of block
+    bars starting anywhere. block defaults to the cube root of length.
+    """
+    block = block or max(1, int(round(length ** (1 / 3))))
+    if length == 0:
+        return np.zeros((n, 0), dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, length, (n, -(-length // block)))
+    indices = (starts[:, :, None] + np.arange(block)) % length
+    return indices.reshape(n, -1)[:, :length]
+
+
+def delay_indices(positions, n: int, max_delay: int = 5, seed=None,
+                  engine: bool = True) -> np.ndarray:
+    """
+    n resamples of one column's bars with every trade entered 0 to max_delay
+    bars late, (n x bars): the delayed bars after an entry bar, or from the
+    entry bar if not engine, up to the trade's exit, index len(positions),
+    which earns nothing.
+    """
+    positions = as_positions(positions).ravel()
+    length = len(positions)
+    previous = np.r_[0, positions[:-1]]
+    entries = np.flatnonzero((positions != 0) & (positions != previous))
+    changes = np.r_[np.flatnonzero(positions[1:] != positions[:-1]) + 1, length]
+    exits = changes[np.searchsorted(changes, entries, side='right')]
+
+    rng = np.random.default_rng(seed)
+    starts = np.broadcast_to(entries + 1 if engine else entries, (n, len(entries)))
+    stops = np.minimum(starts + rng.integers(0, max_delay + 1, (n, len(entries))), exits)
+    # +1 where a delay starts, -1 where it stops, the delays of a row never overlap
+    rows = np.arange(n)[:, None]
+    marks = np.zeros((n, length + 1), dtype=np.int32)
+    marks[rows, starts] += 1
+    marks[rows, stops] -= 1
+    delayed = np.cumsum(marks[:, :length], axis=1) > 0
+    return np.where(delayed, length, np.arange(length, dtype=np.int64))
+
+
+def resample_statistics(values, indices: np.ndarray, max_bytes: int = 2 ** 26) -> np.ndarray:
+    """
+    The total return and maximum drawdown of every resample of values.
+
+    Parameters:
+        values: Returns of bars or trades, NaN counts as 0.
+        indices (np.ndarray): (resamples x length) indices into values, len(values) for none.
+        max_bytes (int): Memory of the resamples taken in one pass.
+
+    Returns:
+        np.ndarray: One record of dtype RESAMPLE per resample.
+    """
+    values = np.r_[np.nan_to_num(np.asarray(values, dtype=np.float64).ravel()), 0.0]
+    n, length = indices.shape
+    out = np.zeros(n, dtype=RESAMPLE)
+    if length == 0:
+        return out
+
+    # The equity and its peak of every resample of a chunk
+    chunk = max(1, int(max_bytes // (16 * length)))
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        equity = values[indices[start:stop]]
+        equity += 1
+        np.cumprod(equity, axis=1, out=equity)
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, 1, out=peak)
+        out['total_return'][start:stop] = equity[:, -1] - 1
+        out['max_drawdown'][start:stop] = 1 - np.divide(equity, peak, out=peak).min(axis=1)
+    return out
+
+
+def _init(returns: np.ndarray, positions: np.ndarray, method: str, options: dict) -> None:
+    """Set up a worker with one column's values to resample."""
+    _worker.clear()
+    if method == 'shuffle':
+        values = trade_returns(returns, positions, options.get('engine', True))
+    else:
+        values = returns
+    _worker.update(values=values, positions=positions, method=method, options=options)
+
+
+def _run_chunk(task: tuple) -> np.ndarray:
+    """The statistics of a chunk of n resamples from seed, in the worker."""
+    n, seed = task
+    values, method, options = _worker['values'], _worker['method'], _worker['options']
+    if method == 'shuffle':
+        indices = shuffle_indices(len(values), n, seed)
+    elif method == 'bootstrap':
+        indices = block_indices(len(values), n, options.get('block'), seed)
+    else:
+        indices = delay_indices(_worker['positions'], n, options.get('max_delay', 5), seed,
+                                options.get('engine', True))
+    return resample_statistics(values, indices, options.get('max_bytes', 2 ** 26))
+
+
+def monte_carlo(returns, positions, method: str = 'bootstrap', n: int = 1000, seed=None,
+                workers: int = 1, start_method: str = None, max_bytes: int = 2 ** 26,
+                **options) -> np.ndarray:
+    """
+    The total return and maximum drawdown of n resamples of one column.
+
+    Parameters:
+        returns: The column's returns per bar, e.g. a Portfolio's strat_rets.
+        positions: The positions it held per bar.
+        method (str): One of METHODS.
+        n (int): Resamples.
+        seed (optional): Seed of the resampling.
+        workers (int): Processes, 1 runs in this process.
+        start_method (str, optional): multiprocessing start method, the platform's by default.
+        max_bytes (int): Memory of the resamples generated and taken at once, per worker.
+        options: block for 'bootstrap', max_delay for 'delay', and engine=False for
+            returns not from engine.simulate(), see the module docstring.
+
+    Returns:
+        np.ndarray: One record of dtype RESAMPLE per resample.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {list(METHODS)}")
+    returns = np.nan_to_num(np.asarray(returns, dtype=np.float64).ravel())
+    positions = as_positions(positions).ravel()
+    if len(positions) != len(returns):
+        raise ValueError(f"positions {positions.shape} and returns {returns.shape} differ")
+
+    # Indices, marks, equity and peak of every bar of a resample
+    chunk = max(1, int(max_bytes // (32 * (len(returns) + 1))))
+    sizes = [min(chunk, n - start) for start in range(0, n, chunk)]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    tasks = list(zip(sizes, seed.spawn(len(sizes))))
+    options = {**options, 'max_bytes': max_bytes}
+    workers = max(1, min(workers, len(tasks)))
+    log.info(f"Resampling {n} x {len(returns)} bars by {method} in {len(tasks)} chunks "
+             f"on {workers} workers")
+
+    if workers == 1:
+        _init(returns, positions, method, options)
+        results = [_run_chunk(task) for task in tasks]
+    else:
+        context = multiprocessing.get_context(start_method)
+        with context.Pool(workers, initializer=_init,
+                          initargs=(returns, positions, method, options)) as pool:
+            results = pool.map(_run_chunk, tasks)
+    return np.concatenate(results) if results else np.zeros(0, dtype=RESAMPLE)
+
+
+def distributions(returns: pd.DataFrame, positions: pd.DataFrame, method: str = 'bootstrap',
+                  n: int = 1000, seed=None, **options) -> pd.DataFrame:
+    """
+    monte_carlo() of every column, e.g. of a Portfolio's strat_rets and positions.
+
+    Returns:
+        pd.DataFrame: One row per resample, columns (statistic, column) in percent.
+            .quantile([0.05, 0.5, 0.95]) gives their confidence intervals.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(returns.shape[1])
+    results = [monte_carlo(returns.iloc[:, i], positions.iloc[:, i], method, n, seeds[i], **options)
+               for i in range(returns.shape[1])]
+    frames = {LABELS[name]: pd.DataFrame(np.stack([result[name] for result in results], axis=1),
+                                         columns=returns.columns) * 100
+              for name in RESAMPLE.names}
+    return pd.concat(frames, axis=1)
@@ -0,0 +1,234 @@
+"""
+Statistics of many backtest columns in one pass.
+
+statistics() walks a (bars x columns) array of per-bar returns and the
+positions held, once, bar by bar over all columns in a compiled kernel (see
+src/indicators/kernels.py), and returns one record per column of the
+structured STATS dtype. The returns are those of the column's equity, which
+compounds. A trade is a run of bars holding the same non-zero position; a
+bar belongs to the trade held before it if any (its return includes the
+exit), else to the one entered on it. A trade opened and closed within one
+bar holds no position and is not counted.
+
+simulate_statistics() runs the backtest engine and the statistics over
+column chunks within a memory budget, so grids of any number of columns are
+ranked without keeping their returns; top() then picks the best columns.
+"""
+import numpy as np
+import pandas as pd
+from src.indicators.kernels import _jit
+from src.portfolio.engine import _per, as_positions, simulate
+
+STATS = np.dtype([
+    ('total_return', np.float64),
+    ('max_drawdown', np.float64),
+    ('sharpe', np.float64),
+    ('sortino', np.float64),
+    ('volatility', np.float64),
+    ('exposure', np.float64),
+    ('trades', np.int64),
+    ('win_rate', np.float64),
+    ('profit_factor', np.float64),
+    ('average_trade', np.float64),
+])
+
+# STATS field -> column of statistics_frame
+LABELS = {
+    'total_return': 'Return (%)',
+    'max_drawdown': 'Max Drawdown (%)',
+    'sharpe': 'Sharpe',
+    'sortino': 'Sortino',
+    'volatility': 'Volatility (%)',
+    'exposure': 'Exposure (%)',
+    'trades': 'Number of Trades',
+    'win_rate': 'Win Rate (%)',
+    'profit_factor': 'Profit Factor',
+    'average_trade': 'Average Trade (%)',
+}
+PERCENT = ['total_return', 'max_drawdown', 'volatility', 'exposure', 'win_rate', 'average_trade']
+
+
+@_jit
+def statistics_kernel(returns: np.ndarray, positions: np.ndarray, periods_per_year: float) -> tuple:
+    """
+    The STATS fields of every column of returns (bars x columns, float64)
+    and positions (bars x columns, int8), as arrays in the order of STATS.
+    NaN returns count as 0.
+    """
+    n, m = returns.shape
+    equity = np.ones(m)
+    peak = np.ones(m)
+    drawdown = np.zeros(m)
+    mean = np.zeros(m)
+    m2 = np.zeros(m)
+    downside = np.zeros(m)
+    held = np.zeros(m)
+    trades = np.zeros(m, dtype=np.int64)
+    wins = np.zeros(m)
+    gains = np.zeros(m)
+    losses = np.zeros(m)
+    trade = np.ones(m)
+    position = np.zeros(m, dtype=np.int8)
+
+    for t in range(n):
+        for c in range(m):
+            r = returns[t, c]
+            if np.isnan(r):
+                r = 0.0
+            p = positions[t, c]
+
+            equity[c] *= 1 + r
+            if equity[c] > peak[c]:
+                peak[c] = equity[c]
+            elif equity[c] < peak[c] * (1 - drawdown[c]):
+                drawdown[c] = 1 - equity[c] / peak[c]
+
+            # Welford's running mean and sum of squared deviations
+            delta = r - mean[c]
+            mean[c] += delta / (t + 1)
+            m2[c] += delta * (r - mean[c])
+            if r < 0:
+                downside[c] += r * r
+            if p != 0:
+                held[c] += 1
+
+            if position[c] != 0:
+                trade[c] *= 1 + r
+                if p != position[c]:
+                    if trade[c] > 1:
+                        wins[c] += 1
+                        gains[c] += trade[c] - 1
+                    else:
+                        losses[c] += 1 - trade[c]
+                    trade[c] = 1.0
+                    if p != 0:
+                        trades[c] += 1
+            elif p != 0:
+                trade[c] *= 1 + r
+                trades[c] += 1
+            position[c] = p
+
+    total_return = equity - 1
+    volatility = np.full(m, np.nan)
+    sharpe = np.full(m, np.nan)
+    sortino = np.full(m, np.nan)
+    exposure = np.full(m, np.nan)
+    win_rate = np.full(m, np.nan)
+    profit_factor = np.full(m, np.nan)
+    average_trade = np.full(m, np.nan)
+    scale = np.sqrt(periods_per_year)
+
+    for c in range(m):
+        # The trade still open at the end counts as it stands
+        if position[c] != 0:
+            if trade[c] > 1:
+                wins[c] += 1
+                gains[c] += trade[c] - 1
+            else:
+                losses[c] += 1 - trade[c]
+        if n > 1:
+            std = np.sqrt(m2[c] / (n - 1))
+            volatility[c] = std * scale
+            if std > 0:
+                sharpe[c] = mean[c] / std * scale
+        if n > 0:
+            exposure[c] = held[c] / n
+            if downside[c] > 0:
+                sortino[c] = mean[c] / np.sqrt(downside[c] / n) * scale
+        if trades[c] > 0:
+            win_rate[c] = wins[c] / trades[c]
+            average_trade[c] = (gains[c] - losses[c]) / trades[c]
+            if losses[c] > 0:
+                profit_factor[c] = gains[c] / losses[c]
+            elif gains[c] > 0:
+                profit_factor[c] = np.inf
+
+    return (total_return, drawdown, sharpe, sortino, volatility, exposure, trades, win_rate,
+            profit_factor, average_trade)
+
+
+def statistics(returns, positions, periods_per_year: float = 1.0) -> np.ndarray:
+    """
+    The statistics of every column in one pass.
+
+    Parameters:
+        returns: (bars x columns) returns of every column's equity, NaN for none.
+        positions: (bars x columns) positions held, see engine.as_positions.
+        periods_per_year (float): Bars per year to annualize the Sharpe, Sortino
+            and volatility with, 1 for per bar figures.
+
+    Returns:
+        np.ndarray: One record of dtype STATS per column. Ratios without a value,
+            e.g. the win rate without trades, are NaN.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = np.ascontiguousarray(returns.reshape(len(returns), -1))
+    positions = as_positions(positions)
+    if positions.shape != returns.shape:
+        raise ValueError(f"positions {positions.shape} and returns {returns.shape} differ")
+
+    out = np.empty(returns.shape[1], dtype=STATS)
+    results = statistics_kernel(returns, positions, float(periods_per_year))
+    for name, values in zip(STATS.names, results):
+        out[name] = values
+    return out
+
+
+def simulate_statistics(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                        positions, symbols=None, periods_per_year: float = 1.0,
+                        max_bytes: int = 2 ** 26, **options) -> np.ndarray:
+    """
+    engine.simulate() and statistics() over chunks of columns, the returns
+    and positions of a chunk within max_bytes. options are those of simulate
+    but record.
+
+    Returns:
+        np.ndarray: One record of dtype STATS per column.
+    """
+    positions = as_positions(positions)
+    bars, columns = positions.shape
+    if symbols is None:
+        symbols = np.zeros(columns, dtype=np.int64)
+    symbols = np.asarray(symbols, dtype=np.int64)
+    per_column = {name: _per(options.pop(name), columns, name)
+                  for name in ('commission', 'fraction', 'stop_loss', 'take_profit')
+                  if options.get(name) is not None}
+    chunk = max(1, int(max_bytes // max(bars * 9, 1)))
+
+    out = np.empty(columns, dtype=STATS)
+    for start in range(0, columns, chunk):
+        stop = min(start + chunk, columns)
+        sliced = {name: values[start:stop] for name, values in per_column.items()}
+        returns, held, _, _ = simulate(open_, high, low, close, positions[:, start:stop],
+                                       symbols[start:stop], **sliced, **options)
+        out[start:stop] = statistics(returns, held, periods_per_year)
+    return out
+
+
+def top(stats: np.ndarray, by: str = 'sharpe', n: int = 10, ascending: bool = False) -> np.ndarray:
+    """
+    The positions of the n columns with the highest (lowest if ascending) by,
+    best first, NaN last. Partitions instead of sorting every column.
+    """
+    values = np.asarray(stats[by], dtype=np.float64)
+    values = np.where(np.isnan(values), np.inf, values if ascending else -values)
+    n = min(n, len(values))
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    best = np.argpartition(values, n - 1)[:n]
+    return best[np.argsort(values[best], kind='stable')]
+
+
+def statistics_frame(stats: np.ndarray, columns: pd.Index = None) -> pd.DataFrame:
+    """stats as a DataFrame, one row per column, ratios in percent."""
+    df = pd.DataFrame({LABELS[name]: stats[name] * (100 if name in PERCENT else 1)
+                       for name in STATS.names}, index=columns)
+    return df
+
+
+def bars_per_year(index: pd.Index) -> float:
+    """Bars per year of a DatetimeIndex, from the time it spans. 1 if it cannot tell."""
+    if not isinstance(index, pd.DatetimeIndex) or len(index) < 2:
+        return 1.0
+    years = (index[-1] - index[0]) / pd.Timedelta(days=365.25)
+    return (len(index) - 1) / years if years > 0 else 1.0
@@ -0,0 +1,236 @@
+"""
+Walk-forward optimization of a strategy's parameters.
+
+The history after the warm-up is cut into folds. Every fold picks, for
+every symbol, the parameter combination with the best metric on its train
+bars and trades it on the test bars right after. The test windows follow
+each other, so their returns stitch into one out-of-sample equity curve.
+
+Nothing is computed per fold. The positions of every combination are
+computed once over the whole history, flat during the warm-up, and
+backtested once, in batches on the optimizer's process pool (see
+optimizer.py). The returns are summed per block of gcd(train, test) bars
+and every train window's metric comes from running sums over the blocks,
+which the overlapping windows share. Only the chosen combinations are
+backtested again, keeping their returns to slice the test windows from.
+Positions carry over fold boundaries, as the strategy would have held them.
+"""
+import math
+import numpy as np
+import pandas as pd
+from src.data.panel import CandlePanel
+from src.portfolio.base import Portfolio
+from src.portfolio.engine import simulate
+from src.portfolio.optimizer import Optimizer, _init, _positions, _worker
+
+# Metrics computable from the block sums
+WINDOW_METRICS = ('sharpe', 'sortino', 'total_return')
+# The sums of every block: bars, returns, squared returns, squared negative returns, log growth
+SUMS = ('count', 'sum', 'squares', 'downside', 'log_growth')
+
+
+def _block_sums(returns: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """
+    The SUMS of the blocks starting at bounds, (sums x blocks x columns).
+    NaN returns count as 0.
+    """
+    returns = np.nan_to_num(returns)
+    count = np.diff(np.r_[bounds, len(returns)]).astype(np.float64)
+    return np.stack([np.broadcast_to(count[:, None], (len(bounds), returns.shape[1])),
+                     np.add.reduceat(returns, bounds, axis=0),
+                     np.add.reduceat(returns * returns, bounds, axis=0),
+                     np.add.reduceat(np.minimum(returns, 0) ** 2, bounds, axis=0),
+                     np.add.reduceat(np.log1p(returns), bounds, axis=0)])
+
+
+def _run_blocks(combinations: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Backtest the combinations in the worker over the whole history.
+
+    Returns:
+        tuple: The combination and symbol of every column, and the SUMS of its blocks.
+    """
+    positions, owners, symbols, engine = _positions(combinations)
+    options = dict(_worker['options'])
+    bounds, warmup = options.pop('bounds'), options.pop('warmup')
+    max_bytes = options.pop('max_bytes', 2 ** 26)
+    options.pop('periods_per_year', None)
+    positions[:warmup] = 0
+
+    fields = [_worker['candles'].field(field) for field in ('open', 'high', 'low', 'close')]
+    bars, columns = positions.shape
+    chunk = max(1, int(max_bytes // max(bars * 9, 1)))
+    sums = np.empty((len(SUMS), len(bounds), columns))
+    for start in range(0, columns, chunk):
+        stop = min(start + chunk, columns)
+        per_column = {name: values[start:stop] for name, values in engine.items()}
+        returns, _, _, _ = simulate(*fields, positions[:, start:stop], symbols[start:stop],
+                                    **per_column, **options)
+        sums[:, :, start:stop] = _block_sums(returns, bounds)
+    return owners, symbols, sums
+
+
+def window_metric(sums: np.ndarray, metric: str, periods_per_year: float = 1.0) -> np.ndarray:
+    """metric of the windows whose SUMS are sums (sums x ...), see stats.STATS."""
+    count, total, squares, downside, log_growth = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        if metric == 'total_return':
+            return np.expm1(log_growth)
+        if metric == 'sharpe':
+            std = np.sqrt(np.maximum(squares - total * mean, 0) / (count - 1))
+            return np.where(std > 0, mean / std, np.nan) * np.sqrt(periods_per_year)
+        if metric == 'sortino':
+            sortino = np.where(downside > 0, mean / np.sqrt(downside / count), np.nan)
+            return sortino * np.sqrt(periods_per_year)
+    raise ValueError(f"Unknown metric '{metric}', expected one of {list(WINDOW_METRICS)}")
+
+
+class WalkForward(Optimizer):
+    """
+    Walk-forward optimization over rolling (or anchored) train windows of
+    train bars, each followed by a test window of test bars.
+
+    Parameters:
+        strategy, space: See Optimizer.
+        train (int): Bars of every train window, or of the first one if anchored.
+        test (int): Bars of every test window, and the step between folds.
+        warmup (int): Bars at the start without valid signals, flat and never
+            trained on, e.g. the most any combination of the space needs for its
+            indicators (see Indicators.warmup_bars).
+        anchored (bool): Train windows all start after the warm-up and grow.
+        metric (str): What the train windows are ranked by, one of WINDOW_METRICS.
+        options: method, samples, seed, workers, batch_size, start_method and the
+            engine options, see Optimizer.
+    """
+
+    task = staticmethod(_run_blocks)
+
+    def __init__(self, strategy, space: dict, train: int, test: int, warmup: int,
+                 anchored: bool = False, metric: str = 'sharpe', **options):
+        super().__init__(strategy, space, **options)
+        if train <= 0 or test <= 0:
+            raise ValueError("train and test must be positive numbers of bars")
+        if warmup < 0:
+            raise ValueError("warmup must be a number of bars")
+        if metric not in WINDOW_METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {list(WINDOW_METRICS)}")
+        self.train = train
+        self.test = test
+        self.anchored = anchored
+        self.warmup = int(warmup)
+        self.metric = metric
+        self.selections = None
+
+    def folds(self, bars: int) -> np.ndarray:
+        """
+        (train start, train end, test start, test end) of every fold, the
+        last test window may be short.
+        """
+        starts = np.arange(self.warmup + self.train, bars, self.test)
+        train_starts = np.full(len(starts), self.warmup) if self.anchored else starts - self.train
+        ends = np.minimum(starts + self.test, bars)
+        return np.stack([train_starts, starts, starts, ends], axis=1)
+
+    def _options(self, candles: CandlePanel) -> dict:
+        options = super()._options(candles)
+        block = math.gcd(self.train, self.test)
+        options.update(bounds=np.arange(self.warmup, len(candles.index), block), warmup=self.warmup)
+        return options
+
+    def run(self, data: CandlePanel | pd.DataFrame, progress=None) -> Portfolio:
+        """
+        Run the walk-forward optimization. After a cancel() the folds choose
+        among the combinations finished before it.
+
+        Parameters:
+            data (CandlePanel | pd.DataFrame): Candles with (field, symbol) columns.
+            progress (optional): Called with (combinations done, combinations) during the backtests.
+
+        Returns:
+            Portfolio: The stitched test windows of every symbol, its equity_curve() the
+                out-of-sample equity. The choice of every fold is in selections.
+        """
+        candles = data if isinstance(data, CandlePanel) else CandlePanel.from_frame(data)
+        bars = len(candles.index)
+        folds = self.folds(bars)
+        if not len(folds):
+            raise ValueError(f"{bars} bars leave no test window after {self.warmup} warm-up "
+                             f"and {self.train} train bars")
+
+        results = list(self._batches(candles, progress))
+        if not results:
+            raise ValueError("No combination was backtested")
+        combinations = np.concatenate([result[0] for result in results])
+        symbols = np.concatenate([result[1] for result in results])
+        sums = np.concatenate([result[2] for result in results], axis=2)
+
+        # Running sums over the blocks, a window's sums are the difference of two
+        options = self._options(candles)
+        block = math.gcd(self.train, self.test)
+        running = np.concatenate([np.zeros((len(SUMS), 1, sums.shape[2])),
+                                  np.cumsum(sums, axis=1)], axis=1)
+        first, last = (folds[:, 0] - self.warmup) // block, (folds[:, 1] - self.warmup) // block
+        metric = window_metric(running[:, last] - running[:, first], self.metric,
+                               options['periods_per_year'])
+        metric = np.where(np.isnan(metric), -np.inf, metric)
+
+        # The best combination of every fold and symbol, the first of ties
+        chosen = np.empty((len(folds), len(candles.symbols)), dtype=np.int64)
+        for s in range(len(candles.symbols)):
+            columns = np.flatnonzero(symbols == s)
+            order = columns[np.argsort(combinations[columns], kind='stable')]
+            chosen[:, s] = order[np.argmax(metric[:, order], axis=1)]
+
+        returns, held = self._test_windows(candles, folds, combinations, chosen, options)
+        self.selections = self._selections(candles, folds, combinations, chosen, metric)
+        return Portfolio(candles, held, returns=returns)
+
+    def _test_windows(self, candles: CandlePanel, folds: np.ndarray, combinations: np.ndarray,
+                      chosen: np.ndarray, options: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        The returns and positions of the chosen columns on their test windows,
+        stitched per symbol.
+        """
+        unique = np.unique(combinations[chosen])
+        _init(candles, self.strategy, self.space, options)
+        positions, owners, column_symbols_, engine = _positions(unique)
+        positions[:self.warmup] = 0
+        engine_options = {name: options[name] for name in ('spread', 'slippage', 'commission',
+                                                           'fraction', 'stop_loss', 'take_profit')
+                          if name in options}
+        engine_options.update(engine)
+        fields = [candles.field(field) for field in ('open', 'high', 'low', 'close')]
+        all_returns, all_held, _, _ = simulate(*fields, positions, column_symbols_,
+                                               **engine_options)
+
+        lookup = {(owner, symbol): i
+                  for i, (owner, symbol) in enumerate(zip(owners, column_symbols_))}
+        rows = np.arange(folds[0, 2], folds[-1, 3])
+        returns = np.empty((len(rows), len(candles.symbols)))
+        held = np.empty((len(rows), len(candles.symbols)), dtype=np.int8)
+        for k, (_, _, start, end) in enumerate(folds):
+            for s in range(len(candles.symbols)):
+                column = lookup[(combinations[chosen[k, s]], s)]
+                returns[start - rows[0]:end - rows[0], s] = all_returns[start:end, column]
+                held[start - rows[0]:end - rows[0], s] = all_held[start:end, column]
+
+        index = candles.index[rows]
+        return (pd.DataFrame(returns, index=index, columns=candles.symbols),
+                pd.DataFrame(held, index=index, columns=candles.symbols))
+
+    def _selections(self, candles: CandlePanel, folds: np.ndarray, combinations: np.ndarray,
+                    chosen: np.ndarray, metric: np.ndarray) -> pd.DataFrame:
+        """The windows, chosen parameters and their train metric of every fold and symbol."""
+        k, s = np.divmod(np.arange(chosen.size), chosen.shape[1])
+        index = pd.MultiIndex.from_arrays([k, pd.Index(candles.symbols)[s]],
+                                          names=['fold', 'symbol'])
+        # The windows' ends as the timestamps of their last bars
+        edges = {name: candles.index[folds[k, i] - (i % 2)] for i, name in
+                 enumerate(['train_start', 'train_end', 'test_start', 'test_end'])}
+        parameters = self.parameters(combinations[chosen[k, s]]).to_frame(index=False)
+        selections = pd.DataFrame(edges, index=index)
+        for name in parameters:
+            selections[name] = parameters[name].to_numpy()
+        selections[self.metric] = metric[k, chosen[k, s]]
+        return selections
@@ -0,0 +1,90 @@
+import unittest
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import src.data as Data
+from src.data.feeds.fileFeed import FileFeed
+
+
+class TestFileFeed(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        FileFeed.data_dir = self.tmp.name
+
+        index = pd.date_range('2024-01-01', periods=50, freq='h', name='time')
+        close = np.linspace(1.0, 2.0, 50)
+        self.csv = pd.DataFrame({
+            'Open': close - 0.01, 'High': close + 0.02, 'Low': close - 0.02,
+            'Close': close, 'Volume': np.arange(50),
+        }, index=index)
+        self.csv.to_csv(os.path.join(self.tmp.name, 'EURUSD_H1.csv'))
+
+    def test_multiindex_layout(self):
+        df = Data.get_candles('file', ['EURUSD'], 60)
+
+        self.assertEqual(df.columns.to_list(), [
+            ('open', 'EURUSD'), ('high', 'EURUSD'), ('low', 'EURUSD'),
+            ('close', 'EURUSD'), ('volume', 'EURUSD')])
+        self.assertEqual(df.index.name, 'timestamp')
+        np.testing.assert_allclose(df[('close', 'EURUSD')].values, self.csv['Close'].values)
+
+    def test_projection_and_range(self):
+        df = Data.get_candles('file', ['EURUSD'], 60, start_date='2024-01-01 10:00',
+                              end_date='2024-01-01 20:00', columns=['close'])
+
+        self.assertEqual(df.columns.to_list(), [('close', 'EURUSD')])
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df.index[0], pd.Timestamp('2024-01-01 10:00'))
+
+    def test_range_with_warmup(self):
+        df = Data.get_range_candles('file', ['EURUSD'], 60, start_date='2024-01-01 10:30',
+                                    end_date='2024-01-01 20:00', warmup=5)
+
+        # From the bar 10:30 falls in, and the 5 bars before it
+        self.assertEqual(df.index[0], pd.Timestamp('2024-01-01 05:00'))
+        self.assertEqual(df.index[-1], pd.Timestamp('2024-01-01 19:00'))
+        self.assertEqual(len(df), 15)
+        pdt.assert_frame_equal(df, Data.get_candles('file', ['EURUSD'], 60).iloc[5:20])
+
+        # Only the history there is
+        df = Data.get_range_candles('file', ['EURUSD'], 60, start_date='2024-01-01 03:00',
+                                    warmup=10)
+        self.assertEqual(len(df), 50)
+        self.assertEqual(len(FileFeed.get_candles('EURUSD', 60, limit=10)), 10)
+
+    def test_store_rebuilt_when_source_changes(self):
+        FileFeed.get_candles('EURUSD', 60)
+        self.csv['Close'] = 5.0
+        path = os.path.join(self.tmp.name, 'EURUSD_H1.csv')
+        self.csv.to_csv(path)
+        os.utime(path, ns=(0, 1))
+
+        df = FileFeed.get_candles('EURUSD', 60, columns=['close'])
+        expected = self.csv['Close'].rename('close').rename_axis('timestamp')
+        pdt.assert_series_equal(df['close'], expected, check_freq=False)
+
+    def test_float32(self):
+        df = Data.get_candles('file', ['EURUSD'], 60, dtype='float32')
+
+        self.assertTrue((df.dtypes == np.float32).all())
+        np.testing.assert_array_equal(df[('close', 'EURUSD')].values,
+                                      self.csv['Close'].values.astype(np.float32))
+        panel = Data.get_candle_panel('file', ['EURUSD'], 60, dtype='float32')
+        self.assertEqual(panel.values.dtype, np.float32)
+
+        with self.assertRaises(ValueError):
+            Data.get_candles('file', ['EURUSD'], 60, dtype='int64')
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            FileFeed.get_candles('GBPUSD', 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
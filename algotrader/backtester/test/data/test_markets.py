@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from src.data.markets import MarketCache
+
+
+MARKETS = [
+    {'symbol_id': 1, 'symbol': 'EURUSD', 'exchange': 'ICMarkets', 'market_type': 'forex',
+     'min_move': 0.00001},
+    {'symbol_id': 2, 'symbol': 'GBPUSD', 'exchange': 'ICMarkets', 'market_type': 'forex',
+     'min_move': 0.00001},
+    {'symbol_id': 3, 'symbol': 'EURUSD', 'exchange': 'Oanda', 'market_type': 'forex',
+     'min_move': 0.0001},
+]
+
+
+class TestMarketCache(unittest.TestCase):
+    def setUp(self) -> None:
+        MarketCache.ttl = 300
+        MarketCache.min_refresh = 10
+        MarketCache.invalidate()
+        patcher = mock.patch('src.data.markets.Database.get_markets', return_value=MARKETS)
+        self.get_markets = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_lookup_single_request(self):
+        symbol_ids = MarketCache.get_symbol_ids(['EURUSD', 'GBPUSD'])
+
+        self.assertEqual(symbol_ids, [1, 2])
+        self.assertEqual(MarketCache.get_market(2), ('GBPUSD', 'ICMarkets', 0.00001))
+        self.assertEqual(self.get_markets.call_count, 1)
+
+    def test_lookup_by_exchange(self):
+        self.assertEqual(MarketCache.get_symbol_ids(['EURUSD'], exchange='Oanda'), [3])
+
+    def test_miss_refresh_is_rate_limited(self):
+        self.assertEqual(MarketCache.get_symbol_ids(['XAUUSD', 'EURUSD']), [None, 1])
+        self.assertIsNone(MarketCache.get_market(42))
+        self.assertEqual(self.get_markets.call_count, 1)
+
+    def test_reload_after_ttl(self):
+        MarketCache.get_market(1)
+        MarketCache.ttl = 0
+        MarketCache.get_market(1)
+        self.assertEqual(self.get_markets.call_count, 2)
+
+    def test_failed_reload_keeps_previous_copy(self):
+        MarketCache.get_market(1)
+        self.get_markets.return_value = None
+        MarketCache.refresh(force=True)
+        self.assertEqual(MarketCache.get_market(1), ('EURUSD', 'ICMarkets', 0.00001))
+
+
+if __name__ == '__main__':
+    unittest.main()
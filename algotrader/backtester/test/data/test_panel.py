@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas.testing as pdt
+import src.data as Data
+from src.data import CandlePanel
+from src.portfolio import Portfolio
+from benchmarks.synthetic import FIELDS, make_ohlcv
+
+
+class TestCandlePanel(unittest.TestCase):
+    def setUp(self) -> None:
+        symbols = ['EURUSD', 'GBPUSD', 'USDJPY']
+        df = make_ohlcv(100, symbols, seed=7)
+        # Group the columns by symbol like get_candles
+        self.df = df[[(field, symbol) for symbol in symbols for field in FIELDS]]
+        self.panel = CandlePanel.from_frame(self.df)
+
+    def test_round_trip(self):
+        self.assertEqual(self.panel.shape, (100, 3, 5))
+        self.assertTrue(self.panel.values.flags['C_CONTIGUOUS'])
+        pdt.assert_frame_equal(self.panel.to_frame(), self.df)
+
+    def test_views_share_memory(self):
+        self.assertTrue(np.shares_memory(self.panel.symbol('GBPUSD'), self.panel.values))
+        self.assertTrue(np.shares_memory(self.panel.field('close'), self.panel.values))
+        self.assertTrue(np.shares_memory(self.panel['close'].values, self.panel.values))
+        self.assertTrue(np.shares_memory(Data.get(self.panel, 'USDJPY').values, self.panel.values))
+        self.assertTrue(np.shares_memory(self.panel.slice(10, 20).values, self.panel.values))
+
+    def test_field_and_symbol_access(self):
+        pdt.assert_frame_equal(self.panel['close'], self.df['close'])
+        pdt.assert_frame_equal(Data.get(self.panel, 'GBPUSD'), Data.get(self.df, 'GBPUSD'))
+
+    def test_portfolio_on_panel(self):
+        buy = self.panel['close'] > self.panel['close'].rolling(5).mean()
+        sell = ~buy
+
+        pdt.assert_frame_equal(Portfolio.from_signals(self.panel, buy, sell).get_stats(),
+                               Portfolio.from_signals(self.df, buy, sell).get_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
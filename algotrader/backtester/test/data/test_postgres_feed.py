@@ -0,0 +1,66 @@
+import unittest
+import struct
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+from src.data.feeds.postgresFeed import PostgresFeed
+from shared.candle_queries import aggregated_candles_sql, to_positional
+
+
+def copy_stream(rows: list[tuple]) -> bytes:
+    """Build a COPY (FORMAT binary) stream the way Postgres sends it."""
+    out = b'PGCOPY\n\xff\r\n\x00' + struct.pack('>ii', 0, 0)
+    for timestamp, *values in rows:
+        micros = (pd.Timestamp(timestamp) - pd.Timestamp('2000-01-01')) // pd.Timedelta('1us')
+        out += struct.pack('>h', 6) + struct.pack('>iq', 8, micros)
+        for value in values:
+            out += struct.pack('>id', 8, value)
+    return out + struct.pack('>h', -1)
+
+
+class TestPostgresFeed(unittest.TestCase):
+    def test_decode_copy(self):
+        stream = copy_stream([
+            ('2024-01-02 10:00', 1.1, 1.2, 1.0, 1.15, 100.0),
+            ('2024-01-02 10:15', 1.15, 1.3, 1.1, 1.25, 50.0),
+        ])
+
+        df = PostgresFeed.decode_copy(stream)
+
+        self.assertEqual(df.index.to_list(), [pd.Timestamp('2024-01-02 10:00'),
+                                              pd.Timestamp('2024-01-02 10:15')])
+        self.assertEqual(df.columns.to_list(), ['open', 'high', 'low', 'close', 'volume'])
+        self.assertEqual(df.iloc[1].to_list(), [1.15, 1.3, 1.1, 1.25, 50.0])
+
+    def test_decode_float32(self):
+        stream = copy_stream([('2024-01-02 10:00', 1.1, 1.2, 1.0, 1.15, 100.0)])
+
+        df = PostgresFeed.decode_copy(stream, np.float32)
+
+        self.assertTrue((df.dtypes == np.float32).all())
+        self.assertEqual(df.iloc[0].to_list(),
+                         [np.float32(v) for v in (1.1, 1.2, 1.0, 1.15, 100.0)])
+
+    def test_decode_empty(self):
+        self.assertTrue(PostgresFeed.decode_copy(copy_stream([])).empty)
+
+    def test_decode_rejects_nulls(self):
+        stream = bytearray(copy_stream([('2024-01-02', 1.0, 1.0, 1.0, 1.0, 1.0)]))
+        stream[19 + 2 + 12:19 + 2 + 16] = struct.pack('>i', -1)
+        with self.assertRaises(ValueError):
+            PostgresFeed.decode_copy(bytes(stream))
+
+    def test_positional_query(self):
+        sql = to_positional(aggregated_candles_sql(limit=True))
+
+        self.assertNotIn(':timeframe', sql)
+        self.assertIn('::integer', sql)
+        self.assertIn('% $2', sql)
+        self.assertIn('LIMIT $5', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.data.feeds.fileFeed import FileFeed
+from src.data.synthetic import SYNTHETICS, SyntheticCache, SyntheticInstrument, register_synthetic
+
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        FileFeed.data_dir = self.tmp.name
+        SyntheticCache.clear()
+
+        rng = np.random.default_rng(1)
+        index = pd.date_range('2024-01-01', periods=30, freq='h', name='time')
+        for symbol, price in [('EURUSD', 1.1), ('GBPUSD', 1.3), ('USDJPY', 150.0)]:
+            close = price * np.exp(np.cumsum(rng.normal(0, 0.001, 30)))
+            open_ = np.r_[price, close[:-1]]
+            pd.DataFrame({
+                'Open': open_, 'High': np.maximum(open_, close) * 1.001,
+                'Low': np.minimum(open_, close) * 0.999, 'Close': close, 'Volume': 1,
+            }, index=index).to_csv(os.path.join(self.tmp.name, f'{symbol}_H1.csv'))
+
+    def test_fx_crosses(self):
+        self.assertEqual(len(SYNTHETICS), 21)
+        self.assertEqual(SYNTHETICS['EURGBP'].legs, {'EURUSD': 1, 'GBPUSD': -1})
+        self.assertEqual(SYNTHETICS['GBPJPY'].legs, {'GBPUSD': 1, 'USDJPY': 1})
+        self.assertEqual(SYNTHETICS['CADCHF'].legs, {'USDCAD': -1, 'USDCHF': 1})
+
+    def test_cross_candles(self):
+        df = Data.get_candles('file', ['EURUSD', 'GBPJPY', 'EURGBP'], 60)
+        eurusd = df.xs('EURUSD', axis=1, level=1)
+        eurgbp = df.xs('EURGBP', axis=1, level=1)
+        legs = Data.get_candles('file', ['GBPUSD', 'USDJPY'], 60)
+
+        np.testing.assert_allclose(eurgbp['close'], eurusd['close'] / legs[('close', 'GBPUSD')])
+        np.testing.assert_allclose(df[('open', 'GBPJPY')],
+                                   legs[('open', 'GBPUSD')] * legs[('open', 'USDJPY')])
+        self.assertTrue((eurgbp['high'] >= eurgbp[['open', 'close']].max(axis=1)).all())
+        self.assertTrue((eurgbp['low'] <= eurgbp[['open', 'close']].min(axis=1)).all())
+
+    def test_weighted_sum(self):
+        register_synthetic(SyntheticInstrument('EURGBP_SPREAD', {'EURUSD': 1, 'GBPUSD': -0.5},
+                                               kind='sum'))
+        self.addCleanup(SYNTHETICS.pop, 'EURGBP_SPREAD')
+        df = Data.get_candles('file', ['EURGBP_SPREAD', 'EURUSD', 'GBPUSD'], 60)
+
+        np.testing.assert_allclose(df[('close', 'EURGBP_SPREAD')],
+                                   df[('close', 'EURUSD')] - 0.5 * df[('close', 'GBPUSD')])
+        np.testing.assert_allclose(df[('high', 'EURGBP_SPREAD')],
+                                   df[('high', 'EURUSD')] - 0.5 * df[('low', 'GBPUSD')])
+
+    def test_cached_by_leg_version(self):
+        with mock.patch.object(SyntheticInstrument, 'compute', autospec=True,
+                               side_effect=SyntheticInstrument.compute) as compute:
+            Data.get_candles('file', ['EURGBP'], 60)
+            Data.get_candles('file', ['EURGBP'], 60, columns=['close'])
+            self.assertEqual(compute.call_count, 1)
+
+            Data.get_candles('file', ['EURGBP'], 60, end_date='2024-01-01 12:00')
+            self.assertEqual(compute.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
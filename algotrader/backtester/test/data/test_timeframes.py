@@ -0,0 +1,129 @@
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import src.data as Data
+from src.data.timeframes import (align_to_timeframe, bar_ends, bar_start, can_resample,
+                                 resample_candles, select_range)
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(bars: int = 1424, timeframe: int = 15, seed: int = 4) -> pd.DataFrame:
+    """Candles of one symbol without missing bars, ending in the middle of a 4 hour bar"""
+    candles = make_ohlcv(bars, ['EURUSD'], timeframe, seed, start='2024-01-01 13:00', missing=0)
+    return Data.get(candles, 'EURUSD')
+
+
+def sma(bars: pd.DataFrame, window: int = 5) -> pd.DataFrame:
+    return pd.DataFrame({'sma': bars['close'].rolling(window).mean()})
+
+
+def higher_timeframe_sma(data: pd.DataFrame, timeframe: int = 15,
+                         input_timeframe: int = 240) -> pd.DataFrame:
+    """SMA of input_timeframe bars as seen on the bars of data"""
+    return align_to_timeframe(sma(resample_candles(data, input_timeframe)), input_timeframe,
+                              data.index, timeframe)
+
+
+class TestTimeframes(unittest.TestCase):
+    def test_resample(self):
+        data = make_candles()
+        expected = data.resample('4h').agg(
+            {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+        ).dropna()
+        pdt.assert_frame_equal(resample_candles(data, 240), expected, check_freq=False)
+
+        # Bars of the aggregation query are cut at midnight, a day or more is a day
+        seven_hours = resample_candles(data, 420)
+        self.assertEqual(sorted(set(seven_hours.index.hour)), [0, 7, 14, 21])
+        self.assertTrue((bar_ends(seven_hours.index, 420) % (24 * 60 * 60 * 10 ** 9) == 0)[
+            seven_hours.index.hour == 21].all())
+        pdt.assert_index_equal(resample_candles(data, 7 * 24 * 60).index,
+                               resample_candles(data, 1440).index)
+
+        self.assertTrue(can_resample(15, 240))
+        self.assertTrue(can_resample(15, 10080))
+        self.assertFalse(can_resample(15, 100))
+        self.assertFalse(can_resample(240, 60))
+
+    def test_resample_symbols(self):
+        a, b = make_candles(seed=1), make_candles(seed=2).iloc[100:]
+        data = pd.concat({'A': a, 'B': b}, axis=1).swaplevel(axis=1)
+        bars = resample_candles(data, 60)
+
+        self.assertTrue(bars.columns.equals(data.columns))
+        pdt.assert_frame_equal(bars.xs('A', axis=1, level=1), resample_candles(a, 60),
+                               check_names=False)
+        pdt.assert_frame_equal(bars.xs('B', axis=1, level=1).dropna(), resample_candles(b, 60),
+                               check_names=False)
+        # No volume either before B has bars
+        self.assertTrue(bars[('volume', 'B')].iloc[:20].isna().all())
+
+    def test_only_closed_bars(self):
+        data = make_candles()
+        result = higher_timeframe_sma(data)
+        htf = sma(resample_candles(data, 240))
+
+        # The M15 bar closing with an H4 bar shows it, the one before shows the previous H4 bar
+        t = pd.Timestamp('2024-01-03 03:45')
+        self.assertEqual(result.loc[t, 'sma'], htf.loc[pd.Timestamp('2024-01-03 00:00'), 'sma'])
+        self.assertEqual(result.loc[t - pd.Timedelta('15min'), 'sma'],
+                         htf.loc[pd.Timestamp('2024-01-02 20:00'), 'sma'])
+        # The last H4 bar is still forming
+        self.assertNotIn(htf['sma'].iloc[-1], result['sma'].to_numpy())
+        # Nothing before the first SMA bar closes
+        first_close = bar_ends(htf['sma'].dropna().index[:1], 240)[0]
+        self.assertTrue(result['sma'][bar_ends(data.index, 15) < first_close].isna().all())
+
+    def test_no_look_ahead(self):
+        data = make_candles()
+        result = higher_timeframe_sma(data)
+
+        # Every value is what would have been shown with the data up to that bar
+        for end in range(100, len(data), 37):
+            seen = higher_timeframe_sma(data.iloc[:end + 1])
+            with self.subTest(bar=data.index[end]):
+                pdt.assert_frame_equal(seen, result.iloc[:end + 1])
+
+        # Changing later bars changes nothing before them
+        changed = data.copy()
+        changed.iloc[1000:, :4] *= 1.5
+        pdt.assert_frame_equal(higher_timeframe_sma(changed).iloc[:1000], result.iloc[:1000])
+
+    def test_select_range(self):
+        data = make_candles()
+        self.assertEqual(bar_start('2024-01-02 05:31', 240), pd.Timestamp('2024-01-02 04:00'))
+        # Bars start after midnight UTC
+        self.assertEqual(bar_start('2024-01-02T05:31:00+02:00', 1440),
+                         pd.Timestamp('2024-01-02 02:00', tz='+02:00'))
+
+        selected = select_range(data, '2024-01-02 04:00', '2024-01-03')
+        pdt.assert_frame_equal(selected, data.loc['2024-01-02 04:00':'2024-01-02 23:45'])
+        # Naive timestamps are UTC
+        pdt.assert_frame_equal(
+            select_range(data.tz_localize('UTC'), '2024-01-02T06:00:00+02:00', '2024-01-03'),
+            selected.tz_localize('UTC'))
+        pdt.assert_frame_equal(select_range(data, end_date='2024-01-02T04:00:00Z'),
+                               data.loc[:'2024-01-02 03:45'])
+
+    def test_input_candles(self):
+        data = make_candles(timeframe=60)
+        pdt.assert_frame_equal(Data.get_input_candles('file', ['EURUSD'], data, 60, 240),
+                               resample_candles(data, 240))
+        self.assertIs(Data.get_input_candles('file', ['EURUSD'], data, 60, 60), data)
+
+        # Not made of whole bars, loaded in the layout of data
+        loaded = pd.concat({'EURUSD': make_candles(timeframe=90)}, axis=1).swaplevel(axis=1)
+        with mock.patch('src.data.base.get_candles', return_value=loaded) as get_candles:
+            candles = Data.get_input_candles('file', ['EURUSD'], data, 60, 90)
+        get_candles.assert_called_once_with('file', ['EURUSD'], 90, dtype=np.float64)
+        self.assertEqual(candles.columns.to_list(), data.columns.to_list())
+
+
+if __name__ == '__main__':
+    unittest.main()
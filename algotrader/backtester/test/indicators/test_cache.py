@@ -0,0 +1,95 @@
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import SMA, RSI, CURRENCY_STRENGTH
+from src.indicators.cache import IndicatorCache
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(symbols: list[str] | tuple[str, ...] = ('EURUSD',)) -> pd.DataFrame:
+    """M30 candles, with the symbol level dropped for a single symbol"""
+    return Data.get(make_ohlcv(400, list(symbols), 30, seed=5))
+
+
+class TestIndicatorCache(unittest.TestCase):
+    def setUp(self) -> None:
+        IndicatorCache.clear()
+        IndicatorCache.max_bytes = 16 * 1024 ** 2
+        self.addCleanup(setattr, IndicatorCache, 'max_bytes', None)
+
+    def assert_result(self, result: pd.DataFrame, expected: pd.DataFrame):
+        self.assertTrue(result.index.equals(expected.index))
+        np.testing.assert_allclose(result.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                                   rtol=1e-12, atol=0)
+
+    def test_hit(self):
+        data = make_candles()
+        params = {'source': 'close', 'window': 20}
+        first = IndicatorCache.run('Simple Moving Average', SMA, data, params, [1], 60)
+
+        recomputed = AssertionError('recomputed')
+        with mock.patch.object(IndicatorCache, '_compute', side_effect=recomputed):
+            second = IndicatorCache.run('Simple Moving Average', SMA, data.copy(),
+                                        {'window': 20.0, 'source': 'close'}, [1], 60)
+
+        self.assert_result(second, first)
+        stats = IndicatorCache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['bytes'], first.memory_usage().sum())
+
+    def test_extend(self):
+        data = make_candles()
+        symbols = CURRENCY_STRENGTH.info()['inputs']
+        multi = make_candles(symbols)
+        cases = [
+            ('Simple Moving Average', SMA, data, {'source': 'close', 'window': 20}),
+            ('Relative Strength Index', RSI, data, {'source': 'close', 'length': 14}),
+            ('Currency Strength', CURRENCY_STRENGTH, multi, {}),
+        ]
+
+        for name, indicator, candles, params in cases:
+            with self.subTest(name=name):
+                IndicatorCache.run(name, indicator, candles.iloc[:300], params, [1], 30)
+
+                # Forming bar revised, new bars appended, then revised again
+                revised = candles.iloc[:300].copy()
+                revised.iloc[-1] *= 1.001
+                for part in (revised, candles.iloc[:301], candles.iloc[:350], candles):
+                    result = IndicatorCache.run(name, indicator, part, params, [1], 30)
+                    self.assert_result(result, indicator.run(part, **params))
+
+        stats = IndicatorCache.stats()
+        self.assertEqual((stats['misses'], stats['extensions']), (3, 12))
+
+    def test_changed_history_recomputes(self):
+        data = make_candles()
+        params = {'source': 'close', 'window': 5}
+        IndicatorCache.run('Simple Moving Average', SMA, data.iloc[:300], params, [1], 30)
+
+        shifted = data.iloc[10:]
+        result = IndicatorCache.run('Simple Moving Average', SMA, shifted, params, [1], 30)
+        self.assert_result(result, SMA.run(shifted, **params))
+        self.assertEqual(IndicatorCache.stats()['misses'], 2)
+
+    def test_evicts_by_bytes(self):
+        data = make_candles()
+        size = SMA.run(data).memory_usage().sum()
+        IndicatorCache.max_bytes = int(size * 2.5)
+
+        for window in (5, 10, 20):
+            IndicatorCache.run('Simple Moving Average', SMA, data, {'window': window}, [1], 30)
+        IndicatorCache.run('Simple Moving Average', SMA, data, {'window': 10}, [1], 30)
+
+        stats = IndicatorCache.stats()
+        self.assertEqual((stats['entries'], stats['evictions'], stats['hits']), (2, 1, 1))
+        self.assertLessEqual(stats['bytes'], IndicatorCache.max_bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
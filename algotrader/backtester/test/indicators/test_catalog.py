@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+import src.indicators as Indicators
+from src.indicators import catalog
+from src.indicators import user_indicators as ui
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(bars: int = 600, seed: int = 8) -> pd.DataFrame:
+    df = Data.get(make_ohlcv(bars, ['EURUSD'], seed=seed, volatility=0.3), 'EURUSD')
+    df.iloc[300] = np.nan
+    return df
+
+
+CATALOG = [indicator for indicator in Indicators.INDICATORS.values()
+           if getattr(indicator, '__module__', None) == catalog.__name__]
+
+
+class TestCatalog(unittest.TestCase):
+    def test_registered(self):
+        self.assertEqual(len(CATALOG), 23)
+        for indicator in CATALOG:
+            self.assertIs(Indicators.INDICATORS[indicator.info()['name']], indicator)
+
+    def test_runs_without_touching_input(self):
+        data = make_candles()
+        original = data.copy()
+        for indicator in CATALOG:
+            info = indicator.info()
+            parameters = {name: spec['default'] for name, spec in info['parameters'].items()}
+            with self.subTest(indicator=info['name']):
+                result = indicator.run(data, **parameters)
+
+                pd.testing.assert_frame_equal(data, original)
+                self.assertTrue(result.index.equals(data.index))
+                self.assertEqual(set(result.columns), set(info['outputs']))
+                for name in result.columns:
+                    self.assertFalse(np.shares_memory(result[name].to_numpy(), data.to_numpy()))
+                # Away from the warm-up and the lagging span of Ichimoku
+                self.assertTrue(result.iloc[-100:-30].notna().all().all())
+
+    def test_matches_user_functions(self):
+        data = make_candles()
+        mid = data.rename(columns={'open': 'mid_o', 'high': 'mid_h', 'low': 'mid_l',
+                                   'close': 'mid_c'})
+        cases = [
+            (catalog.ATR, ui.ATR, {'n': 10}, {'ATR': 'ATR_10'}),
+            (catalog.ADX, ui.ADX, {'period': 7}, {}),
+            (catalog.SuperTrend, ui.SuperTrend, {'atr_period': 5, 'multiplier': 2.0}, {}),
+            (catalog.Ichimoku, ui.Ichimoku, {}, {}),
+            (catalog.VWAP, ui.VWAP, {}, {}),
+            (catalog.MFI, ui.MFI, {'period': 10}, {}),
+            (catalog.ZigZag, ui.ZigZag, {'deviation': 1.0}, {}),
+        ]
+        for indicator, function, params, names in cases:
+            with self.subTest(indicator=indicator.__name__):
+                result = indicator.run(data, **params).rename(columns=names)
+                expected = function(mid.copy(), **params)[result.columns]
+                pd.testing.assert_frame_equal(result, expected)
+
+    def test_rsi_on_any_index(self):
+        # The original function aligned its result on a RangeIndex, all NaN on timestamps
+        data = make_candles()
+        by_position = catalog.RSI.run(data.reset_index(drop=True), 14)
+        result = ui.RSI(data.rename(columns={'close': 'mid_c'}), 14)['RSI_14']
+        np.testing.assert_array_equal(result.to_numpy(), by_position['RSI'].to_numpy())
+        self.assertTrue(result.iloc[14:].notna().all())
+
+
+if __name__ == '__main__':
+    unittest.main()
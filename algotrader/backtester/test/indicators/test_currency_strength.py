@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+from src.indicators import CURRENCY_STRENGTH
+from src.indicators.currencyStrength import CurrencyStrengthEngine, session_keys
+from benchmarks.synthetic import make_ohlcv
+
+MAJORS = ['EURUSD', 'USDJPY', 'USDCHF', 'GBPUSD', 'AUDUSD', 'USDCAD', 'NZDUSD']
+OTHERS = ['SEK', 'NOK', 'DKK', 'PLN', 'HUF', 'CZK', 'MXN', 'ZAR', 'TRY', 'SGD', 'HKD', 'CNH', 'ILS']
+
+
+def usd_rates(currencies: list[str], bars: int, seed: int = 1) -> pd.DataFrame:
+    """Value of each currency in USD, a random walk per currency."""
+    candles = make_ohlcv(bars, currencies, seed=seed, start='2024-01-01 20:00', missing=0,
+                         weekends=True)
+    return candles['close']
+
+
+def make_candles(symbols: list[str], rates: pd.DataFrame) -> pd.DataFrame:
+    closes = {}
+    for symbol in symbols:
+        base, quote = symbol[:3], symbol[3:]
+        closes[symbol] = ((rates[base] if base != 'USD' else 1.0)
+                          / (rates[quote] if quote != 'USD' else 1.0))
+    closes = pd.DataFrame(closes)
+    return pd.concat({field: closes for field in ('open', 'high', 'low', 'close')}, axis=1)
+
+
+def symmetric_change(prev, curr):
+    return (curr - prev) / ((curr + prev) / 2) * 10000
+
+
+class TestCurrencyStrength(unittest.TestCase):
+    def test_matches_pairwise_definition(self):
+        rates = usd_rates(['EUR', 'GBP', 'JPY', 'AUD', 'NZD', 'CAD', 'CHF'], 100)
+        data = make_candles(MAJORS, rates)
+        result = CURRENCY_STRENGTH.run(data)
+        self.assertEqual(list(result.columns), list(CURRENCY_STRENGTH.info()['outputs']))
+
+        close = data['close']
+        day = data.index.normalize()
+        usd = sum(sign * symmetric_change(close[s].shift(), close[s])
+                  for s, sign in zip(MAJORS, [-1, 1, 1, -1, -1, 1, -1])) / 7
+        np.testing.assert_allclose(result['USD'], usd.groupby(day).cumsum(), rtol=1e-9)
+
+        # EUR against every other currency, through the crosses
+        usd_value = rates.assign(USD=1.0)
+        eur = sum(symmetric_change(usd_value['EUR'].shift() / usd_value[c].shift(),
+                                   usd_value['EUR'] / usd_value[c])
+                  for c in usd_value.columns if c != 'EUR') / 7
+        np.testing.assert_allclose(result['EUR'], eur.groupby(day).cumsum(), rtol=1e-9)
+
+        # Every cross move is counted for both of its currencies with opposite signs
+        np.testing.assert_allclose(result.sum(axis=1).iloc[1:], 0, atol=1e-9)
+
+    def test_many_currencies_and_redundant_pairs(self):
+        currencies = ['EUR', 'GBP', 'JPY', 'AUD', 'NZD', 'CAD', 'CHF'] + OTHERS
+        rates = usd_rates(currencies, 200)
+        tree = MAJORS + [f'USD{c}' for c in OTHERS]
+        crosses = ['EURGBP', 'EURJPY', 'GBPJPY', 'EURSEK', 'NOKSEK', 'AUDNZD']
+
+        expected = CURRENCY_STRENGTH.run(make_candles(tree, rates))
+        self.assertEqual(len(expected.columns), 21)
+        # Consistent crosses do not change the result
+        result = CURRENCY_STRENGTH.run(make_candles(tree + crosses, rates))
+        np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+        # Symbols that are not pairs are ignored
+        with_index = make_candles(tree, rates)
+        with_index[('close', 'US500')] = 5000.0
+        np.testing.assert_allclose(CURRENCY_STRENGTH.run(with_index), expected, rtol=1e-12)
+
+    def test_pairs_must_connect(self):
+        with self.assertRaises(ValueError):
+            CurrencyStrengthEngine({'EURUSD': ('EUR', 'USD'), 'GBPJPY': ('GBP', 'JPY')})
+        with self.assertRaises(ValueError):
+            CurrencyStrengthEngine.from_symbols(['US500', 'XAUUSD.r'])
+
+    def test_sessions(self):
+        index = pd.DatetimeIndex(['2024-01-05 21:59', '2024-01-05 22:00', '2024-01-07 23:00',
+                                  '2024-01-08 21:00', '2024-01-08 22:30'])
+        starts = lambda *args: (np.r_[True, np.diff(session_keys(index, *args)) != 0]).tolist()
+
+        self.assertEqual(starts('day'), [True, False, True, True, False])
+        # 17:00 in New York is 22:00 UTC in winter
+        self.assertEqual(starts('day', '17:00', 'America/New_York'),
+                         [True, True, True, False, True])
+        # The week opens with Sunday's session
+        self.assertEqual(starts('week', '17:00', 'America/New_York'),
+                         [True, False, True, False, False])
+        self.assertEqual(starts('week'), [True, False, False, True, False])
+        self.assertEqual(starts('none'), [True, False, False, False, False])
+        with self.assertRaises(ValueError):
+            session_keys(index, 'month')
+
+    def test_streaming(self):
+        currencies = ['EUR', 'GBP', 'JPY', 'AUD', 'NZD', 'CAD', 'CHF'] + OTHERS
+        data = make_candles(MAJORS + [f'USD{c}' for c in OTHERS], usd_rates(currencies, 300))
+        data.iloc[120] = np.nan
+        params = {'reset': 'day', 'reset_time': '17:00', 'timezone': 'America/New_York'}
+        expected = CURRENCY_STRENGTH.run(data, **params)
+
+        for split in (0, 1, 100, 250):
+            with self.subTest(split=split):
+                state = CURRENCY_STRENGTH.init(data.iloc[:split], **params)
+                rows = [CURRENCY_STRENGTH.update(state, data.iloc[i])
+                        for i in range(split, len(data))]
+                np.testing.assert_allclose(pd.DataFrame(rows, index=data.index[split:]),
+                                           expected.iloc[split:], rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
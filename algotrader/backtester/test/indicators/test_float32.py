@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+import src.indicators as Indicators
+from src.indicators import SMA, RSI, BBANDS, MACD
+from src.indicators.cache import IndicatorCache
+from src.indicators.graph import NodeCache
+from src.data.version import data_version
+from src.portfolio import Portfolio
+from benchmarks.synthetic import FIELDS, make_ohlcv
+
+SYMBOLS = {'EURUSD': 1.1, 'GBPUSD': 1.3, 'USDJPY': 150.0, 'EURGBP': 0.85}
+
+PARAMETERS = {
+    'Moving Average Convergence Divergence': {
+        'fast_length': 12, 'slow_length': 26, 'source': 'close', 'signal_smoothing': 9},
+}
+
+
+def make_candles(bars: int = 2000) -> pd.DataFrame:
+    """float32 candles of every symbol at its price level, with (field, symbol) columns"""
+    df = make_ohlcv(bars, list(SYMBOLS), seed=21, volatility=0.2)
+    for symbol, price in SYMBOLS.items():
+        prices = [(field, symbol) for field in ('open', 'high', 'low', 'close')]
+        df[prices] *= price / df['close', symbol].iloc[0]
+    columns = [(field, symbol) for symbol in SYMBOLS for field in FIELDS]
+    return df[columns].astype(np.float32)
+
+
+def assert_float32_close(test: unittest.TestCase, result: pd.DataFrame, expected: pd.DataFrame,
+                         rtol: float):
+    """result of float32 candles is float32 and within rtol of expected, from float64 candles"""
+    test.assertEqual(result.columns.to_list(), expected.columns.to_list())
+    for column in result.columns:
+        if expected[column].dtype.kind == 'f':
+            test.assertEqual(result[column].dtype, np.float32, column)
+    np.testing.assert_allclose(result.to_numpy(dtype=np.float64),
+                               expected.to_numpy(dtype=np.float64), rtol=rtol, atol=0)
+
+
+class TestFloat32(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = make_candles()
+        # The same candles, so only the computations differ
+        self.data64 = self.data.astype(np.float64)
+
+    def test_every_indicator(self):
+        self.assertEqual(set(Indicators.FLOAT32_RTOL), set(Indicators.INDICATORS))
+        for name, indicator in Indicators.INDICATORS.items():
+            info = indicator.info()
+            defaults = {p: spec['default'] for p, spec in info['parameters'].items()}
+            parameters = PARAMETERS.get(name, defaults)
+            with self.subTest(indicator=name):
+                if name == 'Currency Strength':
+                    result = indicator.run(self.data, **parameters)
+                    expected = indicator.run(self.data64, **parameters)
+                else:
+                    result = indicator.run(Data.get(self.data, 'EURUSD'), **parameters)
+                    expected = indicator.run(Data.get(self.data64, 'EURUSD'), **parameters)
+                assert_float32_close(self, result, expected, Indicators.FLOAT32_RTOL[name])
+
+    def test_run_multi(self):
+        requests = [
+            (SMA, {'source': 'close', 'window': [5, 20]}),
+            (RSI, {'source': 'close', 'length': [7, 14]}),
+            (BBANDS, {'length': [10, 20], 'source': 'close', 'std': [1.5, 2.0]}),
+            (MACD, {'fast_length': 12, 'slow_length': [26, 30], 'source': 'close',
+                    'signal_smoothing': 9}),
+        ]
+        for indicator, parameters in requests:
+            with self.subTest(indicator=indicator.__name__):
+                rtol = Indicators.FLOAT32_RTOL[indicator.info()['name']]
+                assert_float32_close(self, indicator.run_multi(self.data, **parameters),
+                                     indicator.run_multi(self.data64, **parameters), rtol)
+
+    def test_indicator_cache(self):
+        IndicatorCache.clear()
+        NodeCache.clear()
+        data = Data.get(self.data, 'EURUSD')
+        data64 = Data.get(self.data64, 'EURUSD')
+        self.assertNotEqual(data_version(data), data_version(data64))
+
+        # Same bars in both dtypes, each gets its own entries
+        parameters = {'source': 'close', 'length': 14}
+        result = IndicatorCache.run('Relative Strength Index', RSI, data, parameters, [1], 60)
+        expected = IndicatorCache.run('Relative Strength Index', RSI, data64, parameters, [1], 60)
+        self.assertEqual(result['rsi'].dtype, np.float32)
+        self.assertEqual(expected['rsi'].dtype, np.float64)
+
+    def test_portfolio(self):
+        close = self.data['close']
+        buy = close > close.rolling(20).mean()
+        sell = close < close.rolling(20).mean()
+
+        returns = Portfolio.calculate_returns(self.data, Portfolio.signals_to_positions(buy, sell))
+        self.assertTrue((returns.dtypes == np.float32).all())
+
+        stats = Portfolio.from_signals(self.data, buy, sell).get_stats()
+        expected = Portfolio.from_signals(self.data64, buy, sell).get_stats()
+        np.testing.assert_allclose(stats['Profit (%)'], expected['Profit (%)'], atol=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import src.indicators as Indicators
+from benchmarks import golden
+
+
+class TestGolden(unittest.TestCase):
+    """Every indicator against the outputs recorded by python -m benchmarks.golden --write"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.candles, cls.panel, cls.expected = golden.load()
+
+    def assert_golden(self, key: str, values: np.ndarray):
+        expected = self.expected[key]
+        if expected.dtype.kind == 'f':
+            np.testing.assert_allclose(values, expected, rtol=golden.RTOL, atol=0, equal_nan=True,
+                                       err_msg=key)
+        else:
+            np.testing.assert_array_equal(values, expected, err_msg=key)
+
+    def test_indicators(self):
+        for name in Indicators.INDICATORS:
+            for use_plan in (False, True):
+                with self.subTest(indicator=name, plan=use_plan):
+                    result = golden.indicator_outputs(name, self.candles, self.panel, use_plan)
+                    keys = [key for key in self.expected if key.startswith(f'indicator|{name}|')]
+                    self.assertEqual(sorted(f'indicator|{name}|{column}' for column in result),
+                                     sorted(keys))
+                    for column, values in result.items():
+                        self.assert_golden(f'indicator|{name}|{column}', values.to_numpy())
+
+    def test_user_indicators(self):
+        for name in golden.user_functions():
+            with self.subTest(function=name):
+                result = golden.user_outputs(name, self.candles)
+                keys = [key for key in self.expected if key.startswith(f'user|{name}|')]
+                self.assertEqual(sorted(f'user|{name}|{column}' for column in result), sorted(keys))
+                for column, values in result.items():
+                    self.assert_golden(f'user|{name}|{column}', values.to_numpy())
+
+    def test_inputs(self):
+        # The generator still makes the recorded candles
+        candles, panel = golden.make_inputs()
+        np.testing.assert_allclose(candles.to_numpy(), self.candles.to_numpy(), rtol=1e-12)
+        np.testing.assert_allclose(panel.to_numpy(), self.panel.to_numpy(), rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import SMA, RSI, BBANDS, MACD
+from src.indicators import graph
+from src.indicators import catalog
+from src.indicators.cache import IndicatorCache
+from src.indicators.graph import NodeCache, evaluate
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(symbols: list[str], bars: int = 1000) -> pd.DataFrame:
+    df = make_ohlcv(bars, symbols, seed=3, volatility=0.2)
+    df.iloc[:40, df.columns.get_level_values(1) == symbols[0]] = np.nan
+    return df
+
+
+def counting(name: str, calls: dict):
+    op = graph.OPS[name]
+
+    def counted(*args):
+        calls[name] = calls.get(name, 0) + 1
+        return op(*args)
+    return counted
+
+
+class TestGraph(unittest.TestCase):
+    def setUp(self) -> None:
+        NodeCache.clear()
+        NodeCache.max_bytes = 16 * 1024 ** 2
+        self.addCleanup(setattr, NodeCache, 'max_bytes', None)
+
+    def test_matches_run(self):
+        data = make_candles(['EURUSD', 'GBPUSD'])
+        requests = [
+            (SMA, {'source': 'close', 'window': 20}),
+            (RSI, {'source': 'close', 'length': 14}),
+            (BBANDS, {'length': 20, 'source': 'close', 'std': 2, 'ma_mode': 'SMA'}),
+            (MACD, {'fast_length': 12, 'slow_length': 26, 'source': 'close',
+                    'signal_smoothing': 9}),
+        ]
+        results = evaluate(data, [indicator.plan(**params) for indicator, params in requests])
+
+        for (indicator, params), result in zip(requests, results):
+            for symbol in ('EURUSD', 'GBPUSD'):
+                expected = indicator.run(Data.get(data, symbol), **params)
+                with self.subTest(indicator=indicator.__name__, symbol=symbol):
+                    self.assertEqual(result.xs(symbol, axis=1, level=1).columns.to_list(),
+                                     expected.columns.to_list())
+                    np.testing.assert_allclose(result.xs(symbol, axis=1, level=1),
+                                               expected.astype(float), rtol=1e-9, atol=1e-12)
+
+        # A single symbol's fields give plain output columns
+        single = evaluate(Data.get(data, 'GBPUSD'), [RSI.plan('close', 14)])[0]
+        self.assertEqual(single.columns.to_list(), ['rsi'])
+        np.testing.assert_array_equal(single['rsi'], results[1][('rsi', 'GBPUSD')])
+
+    def test_shares_nodes(self):
+        df = Data.get(make_candles(['EURUSD']), 'EURUSD')
+        requests = [(catalog.ATR, {'n': 14}), (catalog.ADX, {'period': 14}),
+                    (catalog.SuperTrend, {'atr_period': 14}),
+                    (catalog.KeltnerChannels, {'n_atr': 14})]
+        plans = [indicator.plan(**params) for indicator, params in requests]
+        calls = {}
+        with mock.patch.dict(graph.OPS, {name: counting(name, calls)
+                                         for name in ('true_range', 'rolling_mean', 'shift')}):
+            results = evaluate(df, plans)
+
+        # One true range and ATR(14) for all four, the previous high and low once each
+        self.assertEqual(calls['true_range'], 1)
+        self.assertEqual(calls['shift'], 2)
+        # ATR, the two smoothed directional movements and ADX
+        self.assertEqual(calls['rolling_mean'], 4)
+
+        for (indicator, params), result in zip(requests, results):
+            with self.subTest(indicator=indicator.__name__):
+                pd.testing.assert_frame_equal(result, indicator.run(df, **params))
+
+    def test_node_cache(self):
+        data = make_candles(['EURUSD', 'GBPUSD'])
+        scope = (('EURUSD', 'GBPUSD'), 60, 'v1')
+        first = evaluate(data, [MACD.plan(12, 26, 'close', 9)], scope)[0]
+        # close, 2 EMAs, MACD line, signal line and histogram
+        self.assertEqual(NodeCache.stats()['misses'], 6)
+
+        calls = {}
+        with mock.patch.dict(graph.OPS, {'ema': counting('ema', calls)}):
+            again = evaluate(data, [MACD.plan(12, 26, 'close', 9)], scope)[0]
+            pd.testing.assert_frame_equal(again, first)
+            self.assertEqual(calls, {})
+
+            # Only the new slow EMA, the close and EMA(12) are warm
+            evaluate(data, [MACD.plan(12, 30, 'close', 9)], scope)
+            self.assertEqual(calls, {'ema': 1})
+
+            # Another scope is other data
+            evaluate(data, [MACD.plan(12, 26, 'close', 9)], scope[:2] + ('v2',))
+            self.assertEqual(calls, {'ema': 3})
+
+        # Cached arrays are shared read-only, results are copies
+        first.iloc[:, 0] = 0.0
+        pd.testing.assert_frame_equal(evaluate(data, [MACD.plan(12, 26, 'close', 9)], scope)[0],
+                                      again)
+
+    def test_node_cache_bounded(self):
+        data = make_candles(['EURUSD', 'GBPUSD'])
+        NodeCache.max_bytes = 10 * len(data) * 2 * 8
+        for length in range(5, 25):
+            evaluate(data, [SMA.plan('close', length)], ('scope',))
+
+        stats = NodeCache.stats()
+        self.assertGreater(stats['evictions'], 0)
+        self.assertLessEqual(stats['bytes'], NodeCache.max_bytes)
+        self.assertEqual(stats['entries'], 10)
+
+    def test_indicator_cache_shares_nodes(self):
+        IndicatorCache.clear()
+        data = Data.get(make_candles(['EURUSD']), 'EURUSD')
+        macd = {'fast_length': 12, 'slow_length': 26, 'source': 'close', 'signal_smoothing': 9}
+        IndicatorCache.run('Moving Average Convergence Divergence', MACD, data, macd, [1], 60)
+        hits = NodeCache.stats()['hits']
+        result = IndicatorCache.run('Relative Strength Index', RSI, data,
+                                    {'source': 'close', 'length': 14}, [1], 60)
+
+        # The close column is reused
+        self.assertEqual(NodeCache.stats()['hits'], hits + 1)
+        np.testing.assert_allclose(result['rsi'], RSI.run(data, 'close', 14)['rsi'], rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+from src.indicators import kernels
+from src.indicators.primitives import (rolling_argmax, rolling_argmin, rolling_mad, rolling_max,
+                                       rolling_mean, rolling_min, rolling_sum, rolling_var)
+
+
+def make_values(bars: int = 1000, symbols: int = 3, seed: int = 8) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Rounded, so windows have tied extremes
+    x = np.round(np.cumsum(rng.normal(0, 1, (bars, symbols)), axis=0), 0)
+    x[rng.random((bars, symbols)) < 0.01] = np.nan
+    return x
+
+
+class TestRollingPrimitives(unittest.TestCase):
+    windows = (1, 2, 7, 25, 999, 1000, 1001)
+
+    def expected(self, x: np.ndarray, window: int) -> dict:
+        rolling = pd.DataFrame(x).rolling(window)
+        return {
+            rolling_max: rolling.max(),
+            rolling_min: rolling.min(),
+            rolling_argmax: rolling.apply(np.argmax, raw=True),
+            rolling_argmin: rolling.apply(np.argmin, raw=True),
+            rolling_sum: rolling.sum(),
+            rolling_mean: rolling.mean(),
+            # Compared exactly, pandas' var has rounding errors of its own
+            rolling_var: rolling.apply(lambda w: w.var(ddof=1) if len(w) > 1 else np.nan, raw=True),
+            rolling_mad: rolling.apply(lambda w: np.abs(w - w.mean()).mean(), raw=True),
+        }
+
+    def test_matches_pandas(self):
+        x = make_values()
+        for compiled in (True, False):
+            with mock.patch.object(kernels, 'available', return_value=compiled):
+                for window in self.windows:
+                    for primitive, expected in self.expected(x, window).items():
+                        with self.subTest(compiled=compiled, window=window,
+                                          primitive=primitive.__name__):
+                            np.testing.assert_allclose(primitive(x, window), expected.to_numpy(),
+                                                       rtol=1e-9, atol=1e-9)
+
+    def test_one_dimensional(self):
+        x = make_values(symbols=1)[:, 0]
+        for primitive, expected in self.expected(x, 14).items():
+            with self.subTest(primitive=primitive.__name__):
+                result = primitive(x, 14)
+                self.assertEqual(result.shape, x.shape)
+                np.testing.assert_allclose(result, expected[0].to_numpy(), rtol=1e-9, atol=1e-9)
+
+    def test_invalid_window(self):
+        for primitive in (rolling_max, rolling_argmin, rolling_mad):
+            with self.assertRaises(ValueError):
+                primitive(make_values(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import subprocess
+import sys
+import os
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, ROOT)
+
+import src.indicators as Indicators
+
+
+class TestRegistry(unittest.TestCase):
+    def test_listing_imports_no_implementation(self):
+        # A fresh interpreter, this one has imported the indicators already
+        code = ("import sys, websocket_client, src.indicators as I\n"
+                "names = I.get_available_indicators()\n"
+                "assert 'Bollinger Bands' in I.INDICATORS and not I.INDICATORS.loaded()\n"
+                "print(len(names), *sorted(m for m in ('pandas', 'numpy', 'pandas_ta',"
+                " 'src.indicators.sma', 'src.indicators.catalog') if m in sys.modules))")
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                                text=True, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.split(), [str(len(Indicators.REGISTRY))])
+
+    def test_paths(self):
+        for name, indicator in Indicators.INDICATORS.items():
+            with self.subTest(indicator=name):
+                self.assertEqual(indicator.info()['name'], name)
+                self.assertIs(Indicators.INDICATORS[name], indicator)
+        for attribute, name in Indicators.EXPORTS.items():
+            self.assertIs(getattr(Indicators, attribute), Indicators.INDICATORS[name])
+
+        with self.assertRaises(KeyError):
+            Indicators.INDICATORS['Unknown']
+        with self.assertRaises(AttributeError):
+            Indicators.UNKNOWN
+
+    def test_warm_up(self):
+        thread = Indicators.warm_up()
+        self.assertIs(Indicators.warm_up(), thread)
+        thread.join(60)
+
+        self.assertEqual(set(Indicators.INDICATORS.loaded()), set(Indicators.REGISTRY))
+        for module in Indicators.WARM_UP_MODULES:
+            self.assertIn(module, sys.modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import SMA, RSI, BBANDS, MACD
+from src.indicators.primitives import RollingMoments
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(symbols: list[str], bars: int = 3000) -> pd.DataFrame:
+    df = make_ohlcv(bars, symbols, seed=11, volatility=0.2)
+    # A symbol with a shorter history
+    df.iloc[:137, df.columns.get_level_values(1) == symbols[1]] = np.nan
+    return df
+
+
+class TestRunMulti(unittest.TestCase):
+    symbols = ['EURUSD', 'GBPUSD', 'USDJPY']
+
+    def setUp(self) -> None:
+        self.data = make_candles(self.symbols)
+
+    def assert_columns(self, multi: pd.DataFrame, expected: dict):
+        """expected maps a run_multi column name to a function of a single symbol frame."""
+        self.assertEqual(multi.columns.get_level_values(0).unique().to_list(), list(expected))
+        self.assertTrue((multi.dtypes == np.float64).all())
+        for symbol in self.symbols:
+            single = Data.get(self.data, symbol)
+            for name, compute in expected.items():
+                with self.subTest(name=name, symbol=symbol):
+                    np.testing.assert_allclose(multi[(name, symbol)], compute(single),
+                                               rtol=1e-9, atol=1e-12)
+
+    def test_sma(self):
+        windows = [1, 5, 20, 200]
+        multi = SMA.run_multi(self.data, 'close', windows)
+        self.assert_columns(multi, {
+            f'SMA_{w}': lambda df, w=w: SMA.run(df, 'close', w)['sma'] for w in windows
+        })
+
+    def test_rsi(self):
+        lengths = [2, 14, 50]
+        multi = RSI.run_multi(self.data, 'close', lengths)
+        self.assert_columns(multi, {
+            f'RSI_{l}': lambda df, l=l: RSI.run(df, 'close', l)['rsi'] for l in lengths
+        })
+
+    def test_bbands(self):
+        for ma_mode in ('SMA', 'EMA'):
+            multi = BBANDS.run_multi(self.data, [5, 20], 'close', [1.5, 2], ma_mode)
+            expected = {}
+            for length in (5, 20):
+                for std in (1.5, 2):
+                    run = (lambda df, length=length, std=std:
+                           BBANDS.run(df, length, 'close', std, ma_mode))
+                    for name, output in (('BBL', 'lower'), ('BBM', 'mid'), ('BBU', 'upper')):
+                        expected[f'{name}_{length}_{float(std)}'] = (
+                            lambda df, run=run, output=output: run(df)[output])
+            self.assert_columns(multi, expected)
+
+    def test_macd(self):
+        multi = MACD.run_multi(self.data, [8, 12], [26, 5], 'close', [9, 3])
+        expected = {}
+        for fast, slow, signal in [(8, 26, 9), (8, 26, 3), (5, 8, 9), (5, 8, 3),
+                                   (12, 26, 9), (12, 26, 3), (5, 12, 9), (5, 12, 3)]:
+            run = lambda df, f=fast, s=slow, g=signal: MACD.run(df, f, s, 'close', g)
+            for name, output in (('MACD', 'MACD'), ('MACDh', 'Histogram'), ('MACDs', 'Signal')):
+                expected[f'{name}_{fast}_{slow}_{signal}'] = (
+                    lambda df, run=run, output=output: run(df)[output])
+        self.assert_columns(multi, expected)
+
+    def test_rolling_moments_precision(self):
+        # A long series far from zero, where plain cumulative sums lose digits
+        rng = np.random.default_rng(2)
+        x = 1e4 + np.cumsum(rng.normal(0, 1, (200_000, 2)), axis=0)
+        x[5000, 1] = np.nan
+        moments = RollingMoments(x)
+
+        ends = np.sort(rng.choice(np.arange(3000, len(x)), 2000, replace=False))
+        for window in (3, 300, 3000):
+            windows = np.stack([x[end - window + 1:end + 1] for end in ends], axis=1)
+            with self.subTest(window=window):
+                np.testing.assert_allclose(moments.mean(window)[ends], windows.mean(axis=0),
+                                           rtol=1e-14)
+                np.testing.assert_allclose(moments.var(window, ddof=0)[ends], windows.var(axis=0),
+                                           rtol=1e-9, atol=1e-10)
+
+
+if __name__ == '__main__':
+    unittest.main()
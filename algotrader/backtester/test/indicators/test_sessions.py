@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import src.data as Data
+from src.indicators import catalog
+from src.indicators.sessions import SessionCalendar, session_keys
+from benchmarks.synthetic import make_ohlcv
+
+NEW_YORK = ('day', '17:00', 'America/New_York')
+
+
+def make_candles(bars: int = 3000, seed: int = 8) -> pd.DataFrame:
+    """M15 candles of one symbol without gaps, over the DST switch on March 10"""
+    candles = make_ohlcv(bars, ['EURUSD'], 15, seed, start='2024-03-04', missing=0, weekends=True)
+    return Data.get(candles, 'EURUSD')
+
+
+class TestSessions(unittest.TestCase):
+    def setUp(self) -> None:
+        SessionCalendar.clear()
+
+    def test_calendar(self):
+        data = make_candles()
+        calendar = SessionCalendar.get(data.index, *NEW_YORK)
+        keys = session_keys(data.index, *NEW_YORK)
+
+        np.testing.assert_array_equal(calendar.keys, keys)
+        np.testing.assert_array_equal(calendar.starts,
+                                      np.flatnonzero(np.r_[True, np.diff(keys) != 0]))
+        np.testing.assert_array_equal(calendar.ids, np.unique(keys, return_inverse=True)[1])
+        self.assertEqual(calendar.positions[calendar.starts].max(), 0)
+        # The first bars of the sessions are at 17:00 in New York, over the DST switch on March 10
+        first = data.index[calendar.starts[1:]].tz_localize('UTC').tz_convert('America/New_York')
+        self.assertEqual(set(first.strftime('%H:%M')), {'17:00'})
+        np.testing.assert_array_equal(calendar.elapsed[calendar.starts[1:]], 0)
+
+        self.assertIs(SessionCalendar.get(data.index, *NEW_YORK), calendar)
+        self.assertIsNot(SessionCalendar.get(data.index[:-1], *NEW_YORK), calendar)
+        weekly = SessionCalendar.get(data.index, 'week', '17:00', 'America/New_York')
+        self.assertIsNot(weekly, calendar)
+
+    def test_accumulate(self):
+        data = make_candles()
+        values = data[['high', 'low']].to_numpy().copy()
+        values[::7, 0] = np.nan
+        for reset in ('day', 'week', 'none'):
+            calendar = SessionCalendar.get(data.index, reset, '17:00', 'America/New_York')
+            grouped = pd.DataFrame(values).groupby(calendar.ids)
+            for name in ('cumsum', 'cummax', 'cummin'):
+                with self.subTest(reset=reset, accumulate=name):
+                    # groupby sums with compensation, the calendar in plain order
+                    expected = getattr(grouped, name)().to_numpy()
+                    rtol = 1e-14 if name == 'cumsum' else 0
+                    np.testing.assert_allclose(getattr(calendar, name)(values), expected, rtol=rtol)
+                    np.testing.assert_allclose(getattr(calendar, name)(values[:, 0]),
+                                               expected[:, 0], rtol=rtol)
+
+        # Sessions too uneven for the grid, one long and many short ones
+        index = data.index[:1000].append(pd.date_range('2025-01-01', periods=500, freq='D'))
+        calendar = SessionCalendar.get(index, 'day')
+        self.assertGreater(len(calendar) * calendar.longest, 2 * len(index) + 1024)
+        grouped = pd.DataFrame(values[:1500]).groupby(calendar.ids)
+        np.testing.assert_allclose(calendar.cumsum(values[:1500]), grouped.cumsum().to_numpy(),
+                                   rtol=1e-14)
+        np.testing.assert_array_equal(calendar.cummax(values[:1500]), grouped.cummax().to_numpy())
+
+    def test_indicators_match_groupby(self):
+        data = make_candles()
+        days = data.index.date
+
+        typical = (data['high'] + data['low'] + data['close']) / 3
+        volume = data['volume'].groupby(days).cumsum()
+        vwap = (typical * data['volume']).groupby(days).cumsum() / volume
+        np.testing.assert_allclose(catalog.VWAP.run(data)['VWAP'], vwap, rtol=1e-14)
+
+        result = catalog.SessionHighLow.run(data)
+        np.testing.assert_array_equal(result['SESSION_HIGH'], data['high'].groupby(days).cummax())
+        np.testing.assert_array_equal(result['SESSION_LOW'], data['low'].groupby(days).cummin())
+
+    def test_opening_range(self):
+        data = make_candles()
+        result = catalog.OpeningRange.run(data, 60, *NEW_YORK)
+        calendar = SessionCalendar.get(data.index, *NEW_YORK)
+
+        for session in range(1, len(calendar) - 1):
+            start, end = calendar.starts[session], calendar.starts[session + 1]
+            with self.subTest(session=data.index[start]):
+                # The range of the first hour's four bars, as far as seen
+                np.testing.assert_array_equal(result['OR_HIGH'].iloc[start:start + 4],
+                                              data['high'].iloc[start:start + 4].cummax())
+                opening = data.iloc[start:start + 4]
+                self.assertTrue((result['OR_HIGH'].iloc[start + 4:end]
+                                 == opening['high'].max()).all())
+                self.assertTrue((result['OR_LOW'].iloc[start + 4:end]
+                                 == opening['low'].min()).all())
+        # The data starts after the first session's opening range
+        self.assertTrue(result.iloc[:calendar.starts[1]].isna().all().all())
+
+    def test_no_look_ahead(self):
+        data = make_candles()
+        for indicator, parameters in ((catalog.VWAP, NEW_YORK), (catalog.SessionHighLow, NEW_YORK),
+                                      (catalog.OpeningRange, (30, *NEW_YORK))):
+            result = indicator.run(data, *parameters)
+            for end in (100, 1234, 2999):
+                with self.subTest(indicator=indicator.__name__, end=end):
+                    pdt.assert_frame_equal(indicator.run(data.iloc[:end], *parameters),
+                                           result.iloc[:end])
+
+
+if __name__ == '__main__':
+    unittest.main()
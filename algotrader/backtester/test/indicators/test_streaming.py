@@ -0,0 +1,91 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import SMA, RSI, BBANDS, MACD, CURRENCY_STRENGTH
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(bars: int = 500, seed: int = 3) -> pd.DataFrame:
+    df = Data.get(make_ohlcv(bars, ['EURUSD'], 15, seed, volatility=0.2), 'EURUSD')
+    # A flat stretch exercises the constant-window paths
+    df.iloc[100:130] = df.iloc[99]
+    return df
+
+
+def stream(indicator, data: pd.DataFrame, split: int, **params) -> pd.DataFrame:
+    """Run the indicator with init on data[:split] and update for every later bar."""
+    state = indicator.init(data.iloc[:split], **params)
+    rows = [indicator.update(state, data.iloc[i]) for i in range(split, len(data))]
+    return pd.DataFrame(rows, index=data.index[split:])
+
+
+class TestStreaming(unittest.TestCase):
+    cases = [
+        (SMA, {'source': 'close', 'window': 20}),
+        (SMA, {'source': 'high', 'window': 1}),
+        (RSI, {'source': 'close', 'length': 14}),
+        (BBANDS, {'length': 20, 'source': 'close', 'std': 2, 'ma_mode': 'SMA'}),
+        (BBANDS, {'length': 10, 'source': 'close', 'std': 1.5, 'ma_mode': 'EMA'}),
+        (MACD, {'fast_length': 12, 'slow_length': 26, 'source': 'close', 'signal_smoothing': 9}),
+    ]
+
+    def assert_matches(self, actual: pd.DataFrame, expected: pd.DataFrame):
+        expected = expected.loc[actual.index, list(actual.columns)]
+        np.testing.assert_allclose(actual.to_numpy(dtype=float), expected.to_numpy(dtype=float),
+                                   rtol=1e-12, atol=0)
+
+    def test_matches_run(self):
+        data = make_candles()
+        for indicator, params in self.cases:
+            expected = indicator.run(data, **params)
+            # Before, inside and after the warm-up period
+            for split in (0, 5, 60, 400):
+                with self.subTest(indicator=indicator.__name__, params=params, split=split):
+                    self.assert_matches(stream(indicator, data, split, **params), expected)
+
+    def test_forming_bar(self):
+        data = make_candles()
+        for indicator, params in self.cases:
+            with self.subTest(indicator=indicator.__name__, params=params):
+                state = indicator.init(data.iloc[:-1], **params)
+
+                # Revise the last bar a few times before it closes
+                for close in (1.0, 1.2, data['close'].iloc[-1]):
+                    forming = data.copy()
+                    forming.iloc[-1, forming.columns.get_loc('close')] = close
+                    forming.iloc[-1, forming.columns.get_loc('high')] = close
+                    row = indicator.update(state, forming.iloc[-1], closed=False)
+                    self.assert_matches(pd.DataFrame([row], index=data.index[-1:]),
+                                        indicator.run(forming, **params))
+
+                row = indicator.update(state, data.iloc[-1])
+                self.assert_matches(pd.DataFrame([row], index=data.index[-1:]),
+                                    indicator.run(data, **params))
+
+    def test_currency_strength(self):
+        symbols = CURRENCY_STRENGTH.info()['inputs']
+        data = make_ohlcv(300, symbols, 15, volatility=0.2)
+        data.iloc[150] = np.nan
+        expected = CURRENCY_STRENGTH.run(data)
+
+        for split in (0, 1, 96, 200):
+            with self.subTest(split=split):
+                self.assert_matches(stream(CURRENCY_STRENGTH, data, split), expected)
+
+        state = CURRENCY_STRENGTH.init(data.iloc[:-1])
+        forming = data.copy()
+        forming.iloc[-1, forming.columns.get_loc(('close', 'EURUSD'))] = 1.5
+        row = CURRENCY_STRENGTH.update(state, forming.iloc[-1], closed=False)
+        self.assert_matches(pd.DataFrame([row], index=data.index[-1:]),
+                            CURRENCY_STRENGTH.run(forming))
+        row = CURRENCY_STRENGTH.update(state, data.iloc[-1])
+        self.assert_matches(pd.DataFrame([row], index=data.index[-1:]), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import SMA, RSI, BBANDS, MACD, CURRENCY_STRENGTH
+from src.indicators.sweep import Sweep
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(symbols: list[str], bars: int = 2000) -> pd.DataFrame:
+    df = make_ohlcv(bars, symbols, seed=7, volatility=0.2)
+    df.iloc[:50, df.columns.get_level_values(1) == symbols[0]] = np.nan
+    return df
+
+
+class TestSweep(unittest.TestCase):
+    symbols = ['EURUSD', 'GBPUSD']
+
+    def setUp(self) -> None:
+        self.data = make_candles(self.symbols)
+
+    def assert_sweep(self, indicator, grid: dict, fixed: dict) -> Sweep:
+        sweep = Sweep(indicator, grid)
+        result = sweep.run(self.data)
+        self.assertEqual(result.columns.names, [*grid, 'output', 'symbol'])
+
+        for symbol in self.symbols:
+            single = Data.get(self.data, symbol)
+            for combination in sweep.combinations:
+                expected = indicator.run(single, **fixed, **combination)
+                for output in expected.columns:
+                    with self.subTest(symbol=symbol, combination=combination, output=output):
+                        np.testing.assert_allclose(result[(*combination.values(), output, symbol)],
+                                                   expected[output].astype(float), rtol=1e-9,
+                                                   atol=1e-12)
+        return sweep
+
+    def test_matches_run(self):
+        self.assert_sweep(SMA, {'window': [5, 20]}, {'source': 'close'})
+        self.assert_sweep(RSI, {'length': [2, 14], 'source': ['close', 'high']}, {})
+        self.assert_sweep(BBANDS, {'length': [10, 20], 'std': [1.5, 2], 'ma_mode': ['SMA', 'EMA']},
+                          {'source': 'close'})
+
+    def test_shares_primitives(self):
+        grid = {'fast_length': [8, 12], 'slow_length': [26], 'signal_smoothing': [3, 9]}
+        sweep = self.assert_sweep(MACD, grid, {'source': 'close'})
+
+        # close, 3 EMAs, 2 MACD lines, 4 signal lines and 4 histograms
+        self.assertEqual(len(sweep.nodes), 14)
+        # close, 2 EMAs, MACD line, signal and histogram for each of the 4 combinations
+        self.assertEqual(sweep.naive_size(), 24)
+
+        sweep.run(self.data, compare=True)
+        self.assertEqual(sweep.report['combinations'], 4)
+        self.assertGreater(sweep.report['speedup'], 0)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Sweep(SMA, {'length': [5]})
+        with self.assertRaises(ValueError):
+            Sweep(CURRENCY_STRENGTH, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,228 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import src.data as Data
+from src.indicators import user_indicators as ui
+from src.indicators import kernels
+from benchmarks.synthetic import make_ohlcv
+
+
+def make_candles(bars: int = 1500, seed: int = 4) -> pd.DataFrame:
+    """Volatile candles with the mid_* columns and the RangeIndex of the legacy frames"""
+    df = Data.get(make_ohlcv(bars, ['EURUSD'], seed=seed, volatility=1.0), 'EURUSD')
+    df.iloc[200:230] = df.iloc[199]
+    df = df.rename(columns={'open': 'mid_o', 'high': 'mid_h', 'low': 'mid_l', 'close': 'mid_c'})
+    return df.reset_index(drop=True)
+
+
+# The Python loop implementations the kernels replaced, kept as the reference.
+# They need a RangeIndex.
+
+def legacy_psar(df: pd.DataFrame, iaf=0.02, maxaf=0.2):
+    length = len(df)
+    df['PSAR'] = df.mid_c.copy()
+    df['PSARHIGH'] = 0.0
+    df['PSARLOW'] = 0.0
+    df['PSARDIR'] = 0.0
+    df['PSARAF'] = 0.0
+
+    df.loc[0, 'PSARHIGH'] = df.loc[0, 'mid_h']
+    df.loc[0, 'PSARLOW'] = df.loc[0, 'mid_l']
+    df.loc[0, 'PSARDIR'] = 1
+    df.loc[0, 'PSARAF'] = iaf
+    df.loc[0, 'PSAR'] = df.loc[0, 'PSARLOW']
+
+    for i in range(1, length):
+        psar = df.loc[i-1, 'PSAR']
+        direction = df.loc[i-1, 'PSARDIR']
+        af = df.loc[i-1, 'PSARAF']
+        high_point = df.loc[i-1, 'PSARHIGH']
+        low_point = df.loc[i-1, 'PSARLOW']
+
+        if direction == 1:
+            psar = psar + af * (high_point - psar)
+            psar = min(psar, df.loc[max(0, i-2), 'mid_l'], df.loc[max(0, i-1), 'mid_l'])
+            if df.loc[i, 'mid_l'] < psar:
+                direction = -1
+                psar = high_point
+                high_point = df.loc[i, 'mid_h']
+                low_point = df.loc[i, 'mid_l']
+                af = iaf
+            else:
+                if df.loc[i, 'mid_h'] > high_point:
+                    high_point = df.loc[i, 'mid_h']
+                    af = min(af + iaf, maxaf)
+        else:
+            psar = psar - af * (psar - low_point)
+            psar = max(psar, df.loc[max(0, i-2), 'mid_h'], df.loc[max(0, i-1), 'mid_h'])
+            if df.loc[i, 'mid_h'] > psar:
+                direction = 1
+                psar = low_point
+                high_point = df.loc[i, 'mid_h']
+                low_point = df.loc[i, 'mid_l']
+                af = iaf
+            else:
+                if df.loc[i, 'mid_l'] < low_point:
+                    low_point = df.loc[i, 'mid_l']
+                    af = min(af + iaf, maxaf)
+
+        df.loc[i, 'PSAR'] = psar
+        df.loc[i, 'PSARDIR'] = direction
+        df.loc[i, 'PSARHIGH'] = high_point
+        df.loc[i, 'PSARLOW'] = low_point
+        df.loc[i, 'PSARAF'] = af
+
+    df.drop(['PSARHIGH', 'PSARLOW', 'PSARDIR', 'PSARAF'], axis=1, inplace=True)
+    return df
+
+
+def legacy_supertrend(df: pd.DataFrame, atr_period=10, multiplier=3.0):
+    df = ui.ATR(df, n=atr_period)
+    atr_col = f"ATR_{atr_period}"
+    df['basic_upper'] = ((df.mid_h + df.mid_l) / 2) + (multiplier * df[atr_col])
+    df['basic_lower'] = ((df.mid_h + df.mid_l) / 2) - (multiplier * df[atr_col])
+    df['SUPERTREND'] = 0.0
+    df['ST_DIRECTION'] = 0
+
+    for i in range(1, len(df)):
+        if df.loc[i, 'mid_c'] > df.loc[i-1, 'basic_upper']:
+            df.loc[i, 'ST_DIRECTION'] = 1
+        elif df.loc[i, 'mid_c'] < df.loc[i-1, 'basic_lower']:
+            df.loc[i, 'ST_DIRECTION'] = -1
+        else:
+            df.loc[i, 'ST_DIRECTION'] = df.loc[i-1, 'ST_DIRECTION']
+            if (df.loc[i, 'ST_DIRECTION'] == 1
+                    and df.loc[i, 'basic_lower'] < df.loc[i-1, 'basic_lower']):
+                df.loc[i, 'basic_lower'] = df.loc[i-1, 'basic_lower']
+            if (df.loc[i, 'ST_DIRECTION'] == -1
+                    and df.loc[i, 'basic_upper'] > df.loc[i-1, 'basic_upper']):
+                df.loc[i, 'basic_upper'] = df.loc[i-1, 'basic_upper']
+
+        if df.loc[i, 'ST_DIRECTION'] == 1:
+            df.loc[i, 'SUPERTREND'] = df.loc[i, 'basic_lower']
+        else:
+            df.loc[i, 'SUPERTREND'] = df.loc[i, 'basic_upper']
+
+    df.drop(['basic_upper', 'basic_lower'], axis=1, inplace=True)
+    return df
+
+
+def legacy_zigzag(df: pd.DataFrame, deviation=5.0):
+    df['ZIGZAG'] = 0.0
+    df['ZIGZAG_PIVOT'] = False
+
+    last_price = df.iloc[0].mid_c
+    last_position = 0
+    for i in range(1, len(df)):
+        current_price = df.iloc[i].mid_c
+        price_change = (current_price - last_price) / last_price * 100
+        if abs(price_change) >= deviation:
+            df.loc[df.index[last_position], 'ZIGZAG'] = last_price
+            df.loc[df.index[last_position], 'ZIGZAG_PIVOT'] = True
+            last_price = current_price
+            last_position = i
+
+    df.loc[df.index[last_position], 'ZIGZAG'] = last_price
+    df.loc[df.index[last_position], 'ZIGZAG_PIVOT'] = True
+    return df
+
+
+def legacy_aroon(df: pd.DataFrame, period=25):
+    since_high = df.mid_h.rolling(window=period).apply(lambda x: period - x.argmax() - 1)
+    since_low = df.mid_l.rolling(window=period).apply(lambda x: period - x.argmin() - 1)
+    df['AROON_UP'] = 100 * (period - since_high) / period
+    df['AROON_DOWN'] = 100 * (period - since_low) / period
+    df['AROON_OSC'] = df['AROON_UP'] - df['AROON_DOWN']
+    return df
+
+
+class TestRollingIndicators(unittest.TestCase):
+    def test_extremes_match_pandas(self):
+        data = make_candles()
+        data.loc[700, ['mid_h', 'mid_l', 'mid_c']] = np.nan
+        high, low = data.mid_h.rolling(14), data.mid_l.rolling(14)
+        cases = [
+            (ui.Aroon, {'period': 14}, legacy_aroon(data.copy(), 14)),
+            (ui.DonchianChannels, {'period': 14}, {'DC_UPPER': high.max(), 'DC_LOWER': low.min()}),
+            (ui.WilliamsR, {'period': 14},
+             {'WILLIAMS_R': -100 * (high.max() - data.mid_c) / (high.max() - low.min())}),
+            (ui.Stochastic, {'k_period': 14},
+             {'STOCH_K': 100 * (data.mid_c - low.min()) / (high.max() - low.min())}),
+            (ui.Ichimoku, {},
+             {'KIJUN': (data.mid_h.rolling(26).max() + data.mid_l.rolling(26).min()) / 2,
+              'SENKOU_B': ((data.mid_h.rolling(52).max()
+                            + data.mid_l.rolling(52).min()) / 2).shift(26)}),
+        ]
+        for indicator, params, expected in cases:
+            result = indicator(data.copy(), **params)
+            columns = ('AROON_UP', 'AROON_DOWN', 'AROON_OSC') if indicator is ui.Aroon else expected
+            for column in columns:
+                with self.subTest(indicator=indicator.__name__, column=column):
+                    pd.testing.assert_series_equal(result[column], expected[column],
+                                                   check_names=False)
+
+    def test_cci_mean_deviation(self):
+        data = make_candles(300)
+        result = ui.CCI(data.copy(), period=20)['CCI']
+        typical = (data.mid_h + data.mid_l + data.mid_c) / 3
+        for i in (19, 150, 299):
+            window = typical.iloc[i - 19:i + 1]
+            deviation = (window - window.mean()).abs().mean()
+            expected = (typical.iloc[i] - window.mean()) / (0.015 * deviation)
+            self.assertAlmostEqual(result.iloc[i], expected, places=9)
+        self.assertTrue(result.iloc[:19].isna().all())
+
+
+class TestPathDependentIndicators(unittest.TestCase):
+    cases = [
+        (ui.PSAR, legacy_psar, {}),
+        (ui.PSAR, legacy_psar, {'iaf': 0.05, 'maxaf': 0.3}),
+        (ui.SuperTrend, legacy_supertrend, {}),
+        (ui.SuperTrend, legacy_supertrend, {'atr_period': 3, 'multiplier': 1.5}),
+        (ui.ZigZag, legacy_zigzag, {}),
+        (ui.ZigZag, legacy_zigzag, {'deviation': 1.0}),
+    ]
+
+    def test_matches_legacy(self):
+        data = make_candles()
+        data.loc[700, ['mid_h', 'mid_l', 'mid_c']] = np.nan
+        for indicator, legacy, params in self.cases:
+            with self.subTest(indicator=indicator.__name__, params=params):
+                expected = legacy(data.copy(), **params)
+                pd.testing.assert_frame_equal(indicator(data.copy(), **params), expected)
+
+    def test_any_index(self):
+        data = make_candles()
+        index = pd.date_range('2024-01-01', periods=len(data), freq='h', name='time')
+        timestamps = data.set_index(index)
+        for indicator, _, params in self.cases:
+            with self.subTest(indicator=indicator.__name__, params=params):
+                expected = indicator(data.copy(), **params)
+                result = indicator(timestamps.copy(), **params)
+                self.assertTrue(result.index.equals(timestamps.index))
+                np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+    def test_python_fallback(self):
+        data = make_candles(300)
+        high, low, close = (data[c].to_numpy() for c in ('mid_h', 'mid_l', 'mid_c'))
+        np.testing.assert_array_equal(kernels.psar(high, low, 0.02, 0.2),
+                                      kernels.psar.py_func(high, low, 0.02, 0.2))
+        for compiled, python in zip(kernels.supertrend(close, high * 1.01, low * 0.99),
+                                    kernels.supertrend.py_func(close, high * 1.01, low * 0.99)):
+            np.testing.assert_array_equal(compiled, python)
+        for compiled, python in zip(kernels.zigzag(close, 2.0), kernels.zigzag.py_func(close, 2.0)):
+            np.testing.assert_array_equal(compiled, python)
+
+    def test_empty(self):
+        data = make_candles().iloc[:0]
+        self.assertEqual(len(ui.PSAR(data.copy())), 0)
+        self.assertEqual(len(ui.SuperTrend(data.copy())), 0)
+        self.assertEqual(len(ui.ZigZag(data.copy())), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import pandas as pd
+import pandas.testing as pdt
+import src.data as Data
+import src.indicators as Indicators
+from src.indicators.cache import IndicatorCache
+from benchmarks.synthetic import make_ohlcv
+
+# The first visible bar
+START = 1500
+
+
+def make_candles(bars: int = 2000) -> pd.DataFrame:
+    return Data.get(make_ohlcv(bars, ['EURUSD'], seed=43, volatility=0.2), 'EURUSD')
+
+
+def defaults(indicator) -> dict:
+    parameters = indicator.info()['parameters']
+    return {name: parameter['default'] for name, parameter in parameters.items()}
+
+
+class TestWarmup(unittest.TestCase):
+    def test_visible_range(self):
+        data = make_candles()
+        for name, indicator in Indicators.INDICATORS.items():
+            parameters = defaults(indicator)
+            warmup = Indicators.warmup_bars(indicator, parameters)
+            if warmup is None:
+                continue
+
+            with self.subTest(indicator=name):
+                visible = IndicatorCache.run(name, indicator, data.iloc[START - warmup:],
+                                             parameters, ['EURUSD'], 60, cache=False).iloc[warmup:]
+                history = indicator.run(data, **parameters).iloc[START:]
+
+                # Every visible bar has its values
+                self.assertFalse(visible.isna().any().any())
+                if Indicators.exact_lookback(indicator, parameters) is not None:
+                    pdt.assert_frame_equal(visible, history, check_dtype=False, rtol=1e-12)
+                else:
+                    # Settled to the values of the whole history
+                    error = (visible - history).abs().max() / history.abs().max()
+                    self.assertLess(error.max(), 0.01)
+
+    def test_warmup_bars(self):
+        sma, macd, bbands = (Indicators.INDICATORS[name] for name in (
+            'Simple Moving Average', 'Moving Average Convergence Divergence', 'Bollinger Bands'))
+
+        self.assertEqual(Indicators.warmup_bars(sma, {'source': 'close', 'window': 50}), 50)
+        # Declared until the first signal value, then left to settle
+        self.assertEqual(macd.info()['warmup'], ['slow_length', 'signal_smoothing'])
+        self.assertEqual(Indicators.warmup_bars(macd, defaults(macd)), 4 * (26 + 9))
+        self.assertIsNone(Indicators.exact_lookback(macd, defaults(macd)))
+        # The lookback of ta.variance is longer
+        self.assertEqual(Indicators.warmup_bars(bbands, {**defaults(bbands), 'length': 1}), 30)
+        # Reset every day, on the whole history
+        self.assertIsNone(Indicators.warmup_bars(Indicators.INDICATORS['Currency Strength'], {}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import src.data as Data
+from src.portfolio import Portfolio, market_spreads, simulate
+from src.portfolio import engine
+from benchmarks.synthetic import make_ohlcv
+
+
+def flat_prices(opens: list[float], high: list[float] = None, low: list[float] = None):
+    """Bars opening and closing at opens, with high and low 1 around them unless given."""
+    opens = np.asarray(opens, dtype=float)
+    high = opens + 1 if high is None else np.asarray(high, dtype=float)
+    low = opens - 1 if low is None else np.asarray(low, dtype=float)
+    return opens, high, low, opens.copy()
+
+
+class TestEngine(unittest.TestCase):
+    def test_long_and_short(self):
+        prices = flat_prices([100, 100, 100, 110, 110, 110])
+        positions = np.array([1, 1, 1, 1, 0, 0])
+
+        returns, held, equity, trades = simulate(*prices, positions)
+        # Entered at the open after the signal, out at the open after it ends
+        np.testing.assert_array_equal(held.ravel(), [0, 1, 1, 1, 1, 0])
+        np.testing.assert_allclose(returns.ravel(), [0, 0, 0, 0.1, 0, 0])
+        np.testing.assert_allclose(equity, [1.1])
+        np.testing.assert_array_equal(trades, [1])
+
+        _, held, equity, _ = simulate(*prices, -positions)
+        np.testing.assert_array_equal(held.ravel(), [0, -1, -1, -1, -1, 0])
+        np.testing.assert_allclose(equity, [0.9])
+
+    def test_costs_and_sizing(self):
+        prices = flat_prices([100, 100, 100, 110, 110, 110])
+        positions = np.array([1, 1, 1, 1, 0, 0])
+
+        _, _, equity, _ = simulate(*prices, positions, spread=1.0, slippage=0.25, commission=0.001)
+        # Bought at 100.75 with all the equity, sold at 109.25
+        units = 1 / 100.75
+        expected = 1 - 0.001 + units * (109.25 - 100.75) - units * 109.25 * 0.001
+        np.testing.assert_allclose(equity, [expected], rtol=1e-14)
+
+        _, _, equity, _ = simulate(*prices, positions, fraction=0.25)
+        np.testing.assert_allclose(equity, [1.025])
+
+    def test_stop_loss_and_take_profit(self):
+        prices = flat_prices([100, 100, 100, 100, 100, 100], low=[99, 99, 98, 99, 99, 99])
+        positions = np.array([1, 1, 1, 1, 0, 1])
+
+        returns, held, equity, trades = simulate(*prices, positions, stop_loss=0.015)
+        # Stopped at 98.5 on the third bar, flat until the position changes
+        np.testing.assert_array_equal(held.ravel(), [0, 1, 0, 0, 0, 0])
+        np.testing.assert_allclose(equity, [0.985])
+        self.assertEqual(returns[2, 0], equity[0] - 1)
+        # And entered again once it does
+        prices = flat_prices([100] * 7, low=[99, 99, 98, 99, 99, 99, 99])
+        _, held, _, trades = simulate(*prices, np.array([1, 1, 1, 1, 0, 1, 1]), stop_loss=0.015)
+        np.testing.assert_array_equal(held.ravel(), [0, 1, 0, 0, 0, 0, 1])
+        np.testing.assert_array_equal(trades, [2])
+
+        # A gap past the stop exits at the open
+        prices = flat_prices([100, 100, 95, 95])
+        _, _, equity, _ = simulate(*prices, np.array([1, 1, 1, 1]), stop_loss=0.02)
+        np.testing.assert_allclose(equity, [0.95])
+
+        # Short take profit at 97, reached intrabar
+        prices = flat_prices([100, 100, 98, 98], low=[99, 99, 96, 97])
+        _, held, equity, _ = simulate(*prices, np.array([-1, -1, -1, -1]), take_profit=0.03)
+        np.testing.assert_array_equal(held.ravel(), [0, -1, 0, 0])
+        np.testing.assert_allclose(equity, [1.03])
+
+        # Both in one bar, the stop first
+        prices = flat_prices([100, 100, 100], high=[101, 101, 103], low=[99, 99, 97])
+        _, _, equity, _ = simulate(*prices, np.array([1, 1, 1]), stop_loss=0.02, take_profit=0.02)
+        np.testing.assert_allclose(equity, [0.98])
+
+    def test_columns(self):
+        df = make_ohlcv(500, ['EURUSD', 'GBPUSD'], seed=3, volatility=0.2)
+        prices = [df[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+        rng = np.random.default_rng(0)
+        positions = np.repeat(rng.integers(-1, 2, (50, 6)), 10, axis=0)
+        symbols = np.array([0, 1, 0, 1, 0, 1])
+        stops = np.array([np.nan, np.nan, 0.002, 0.002, 0.005, np.nan])
+        options = {'spread': [0.01, 0.02], 'commission': 1e-4}
+
+        returns, held, equity, trades = simulate(*prices, positions, symbols, stop_loss=stops,
+                                                 **options)
+        np.testing.assert_allclose(np.prod(1 + returns, axis=0), equity, rtol=1e-12)
+        for c in range(6):
+            with self.subTest(column=c):
+                single = simulate(*(a[:, symbols[c]] for a in prices), positions[:, c],
+                                  stop_loss=stops[c], spread=options['spread'][symbols[c]],
+                                  commission=1e-4)
+                np.testing.assert_array_equal(single[0].ravel(), returns[:, c])
+                np.testing.assert_array_equal(single[1].ravel(), held[:, c])
+
+        _, _, unrecorded, unrecorded_trades = simulate(*prices, positions, symbols, stop_loss=stops,
+                                                       record=False, **options)
+        np.testing.assert_array_equal(unrecorded, equity)
+        np.testing.assert_array_equal(unrecorded_trades, trades)
+
+        with self.assertRaises(ValueError):
+            simulate(*prices, positions, np.array([0, 1, 2, 0, 1, 0]))
+        with self.assertRaises(ValueError):
+            simulate(*prices, positions, symbols, commission=[0.1, 0.2])
+
+    def test_missing_bars(self):
+        prices = flat_prices([100, 100, np.nan, 110, 110])
+        returns, held, equity, _ = simulate(*prices, np.array([1, 0, 0, 0, 0]))
+        # The exit waits for the first open after the missing bar
+        np.testing.assert_array_equal(held.ravel(), [0, 1, 1, 0, 0])
+        np.testing.assert_allclose(equity, [1.1])
+        self.assertFalse(np.isnan(returns).any())
+
+    def test_python_kernel(self):
+        df = make_ohlcv(200, ['EURUSD'], seed=3, volatility=0.2)
+        prices = [df[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+        positions = np.repeat(np.random.default_rng(1).integers(-1, 2, (20, 3)), 10, axis=0)
+        options = {'spread': 0.01, 'commission': 1e-4, 'stop_loss': 0.003, 'take_profit': 0.004}
+
+        compiled = simulate(*prices, positions, **options)
+        with mock.patch.object(engine, 'simulate_kernel', engine.simulate_kernel.py_func):
+            python = simulate(*prices, positions, **options)
+        for a, b in zip(compiled, python):
+            np.testing.assert_allclose(a, b, rtol=1e-13)
+
+    def test_market_spreads(self):
+        markets = {1: ('EURUSD', 'ICMarkets', 0.00001), 2: ('XAUUSD', 'ICMarkets', None)}
+        with mock.patch.object(engine.MarketCache, 'get_symbol_ids', return_value=[1, 2, None]), \
+                mock.patch.object(engine.MarketCache, 'get_market', side_effect=markets.get):
+            spreads = market_spreads(['EURUSD', 'XAUUSD', 'UNKNOWN'], ticks=10)
+        np.testing.assert_allclose(spreads, [0.0001, 0, 0])
+
+
+class TestPortfolioBacktest(unittest.TestCase):
+    def test_sweep_columns(self):
+        df = make_ohlcv(500, ['EURUSD', 'GBPUSD'], seed=3, volatility=0.2)
+        close = df['close']
+        positions = pd.concat({window: np.sign(close - close.rolling(window).mean()).fillna(0)
+                               for window in (5, 20)}, axis=1, names=['window', 'symbol'])
+
+        stops = pd.Series([0.01, 0.01, np.nan, np.nan], index=positions.columns)
+        portfolio = Portfolio.backtest(df, positions, spread={'EURUSD': 0.01}, commission=1e-4,
+                                       stop_loss=stops)
+        self.assertEqual(portfolio.strat_rets.shape, positions.shape)
+        pdt.assert_index_equal(portfolio.get_stats().index, positions.columns)
+        self.assertTrue((portfolio.get_stats()['Number of Trades'] > 0).all())
+
+        single = Portfolio.backtest(Data.get(df, 'GBPUSD'), positions[[(20, 'GBPUSD')]],
+                                    commission=1e-4)
+        pdt.assert_frame_equal(single.strat_rets, portfolio.strat_rets[[(20, 'GBPUSD')]])
+
+        with self.assertRaises(ValueError):
+            Portfolio.backtest(df, positions.rename(columns={'GBPUSD': 'USDJPY'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
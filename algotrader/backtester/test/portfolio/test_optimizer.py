@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+from src.data import CandlePanel
+from src.data.shared import SharedPanel
+from src.portfolio.optimizer import Optimizer
+from src.portfolio.stats import simulate_statistics, statistics_frame
+from benchmarks.synthetic import make_ohlcv
+
+
+def crossover(candles, fast: int, slow: int) -> pd.DataFrame:
+    close = candles['close']
+    return np.sign(close.rolling(fast).mean() - close.rolling(slow).mean()).fillna(0)
+
+
+class TestOptimizer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.df = make_ohlcv(600, ['EURUSD', 'GBPUSD'], seed=11, volatility=0.2)
+        self.panel = CandlePanel.from_frame(self.df)
+        self.space = {'fast': [3, 5, 8], 'slow': [20, 40]}
+        self.options = {'spread': {'EURUSD': 0.01, 'GBPUSD': 0.02}, 'commission': 1e-4,
+                        'periods_per_year': 1}
+
+    def expected(self, fast: int, slow: int, **options) -> pd.DataFrame:
+        prices = [self.df[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+        stats = simulate_statistics(*prices, crossover(self.df, fast, slow).to_numpy(), [0, 1],
+                                    spread=[0.01, 0.02], commission=1e-4, **options)
+        index = pd.MultiIndex.from_product([[fast], [slow], ['EURUSD', 'GBPUSD']],
+                                           names=['fast', 'slow', 'symbol'])
+        return statistics_frame(stats, index)
+
+    def test_grid(self):
+        progress = []
+        result = Optimizer(crossover, self.space, workers=1, batch_size=4, **self.options).run(
+            self.df, progress=lambda done, total: progress.append((done, total)))
+
+        expected = pd.concat([self.expected(fast, slow) for fast in [3, 5, 8] for slow in [20, 40]])
+        pdt.assert_frame_equal(result, expected)
+        self.assertEqual(progress, [(4, 6), (6, 6)])
+
+    def test_processes(self):
+        serial = Optimizer(crossover, self.space, workers=1, **self.options).run(self.panel)
+        parallel = Optimizer(crossover, self.space, workers=2, batch_size=1,
+                             **self.options).run(self.panel)
+        pdt.assert_frame_equal(parallel, serial)
+
+        streaming = Optimizer(crossover, self.space, workers=2, batch_size=2, **self.options)
+        frames = list(streaming.stream(self.panel))
+        self.assertEqual(len(frames), 3)
+        pdt.assert_frame_equal(pd.concat(frames).sort_index(), serial.sort_index())
+
+    def test_random_and_engine_parameters(self):
+        space = {**self.space, 'stop_loss': [0.002, 0.01]}
+        optimizer = Optimizer(crossover, space, method='random', samples=5, seed=1, workers=1,
+                              **self.options)
+        self.assertEqual(optimizer.size, 5)
+        result = optimizer.run(self.panel)
+        self.assertEqual(len(result), 10)
+        self.assertEqual(len(result.index.droplevel('symbol').unique()), 5)
+        again = Optimizer(crossover, space, method='random', samples=5, seed=1, workers=1,
+                          **self.options)
+        pdt.assert_frame_equal(again.run(self.panel), result)
+
+        fast, slow, stop_loss, _ = result.index[0]
+        expected = self.expected(fast, slow, stop_loss=stop_loss)
+        np.testing.assert_array_equal(result.iloc[:2].to_numpy(), expected.to_numpy())
+
+        with self.assertRaises(ValueError):
+            Optimizer(crossover, space, method='random')
+
+    def test_cancel(self):
+        optimizer = Optimizer(crossover, self.space, workers=1, batch_size=2, **self.options)
+        result = optimizer.run(self.panel, progress=lambda done, total: optimizer.cancel())
+        self.assertTrue(optimizer.cancelled)
+        self.assertEqual(len(result), 4)
+
+        result = optimizer.run(self.panel)
+        self.assertFalse(optimizer.cancelled)
+        self.assertEqual(len(result), 12)
+
+
+class TestSharedPanel(unittest.TestCase):
+    def test_attach(self):
+        candles = make_ohlcv(50, ['EURUSD', 'GBPUSD'], seed=11, volatility=0.2)
+        panel = CandlePanel.from_frame(candles)
+        with SharedPanel(panel) as shared:
+            attached = SharedPanel.attach(shared.spec)
+            np.testing.assert_array_equal(attached.values, panel.values)
+            pdt.assert_index_equal(attached.index, panel.index)
+            self.assertEqual(attached.symbols, panel.symbols)
+            self.assertFalse(attached.values.flags.writeable)
+            self.assertTrue(np.shares_memory(attached['close'].to_numpy(), attached.values))
+
+            del attached
+            SharedPanel.detach(shared.spec)
+
+
+if __name__ == '__main__':
+    unittest.main()
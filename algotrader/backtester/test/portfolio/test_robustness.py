@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+from src.portfolio import Portfolio
+from src.portfolio.robustness import (block_indices, delay_indices, distributions, monte_carlo,
+                                      resample_statistics, shuffle_indices, trade_returns)
+from src.portfolio.stats import statistics
+from benchmarks.synthetic import make_ohlcv
+
+
+class TestRobustness(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame = make_ohlcv(500, ['EURUSD'], seed=3, volatility=0.2)
+        self.candles = self.frame.xs('EURUSD', axis=1, level=1)
+        rng = np.random.default_rng(1)
+        regimes = np.repeat(rng.integers(-1, 2, (50, 2)), 10, axis=0)
+        self.positions = pd.DataFrame(regimes, index=self.candles.index, columns=['a', 'b'])
+        self.portfolio = Portfolio.backtest(self.candles, self.positions, spread=0.01,
+                                            commission=1e-4)
+        self.returns = self.portfolio.strat_rets['a'].to_numpy()
+        self.held = self.portfolio.positions['a'].to_numpy()
+
+    def test_trade_returns(self):
+        trades = trade_returns(self.returns, self.held)
+        self.assertEqual(len(trades), statistics(self.returns, self.held)['trades'][0])
+        self.assertAlmostEqual(np.prod(1 + trades), np.prod(1 + self.returns), places=12)
+
+        returns = np.array([0.1, 0.2, -0.1, 0.05, 0.3, 0.0])
+        positions = np.array([1, 1, -1, 0, 1, 0])
+        # The reversal's bar closes the long, the bar after the short ends it
+        np.testing.assert_allclose(trade_returns(returns, positions),
+                                   [1.1 * 1.2 * 0.9 - 1, 0.05, 0.3])
+        # Returns of the bars' own positions, like Portfolio.calculate_returns'
+        np.testing.assert_allclose(trade_returns(returns, positions, engine=False),
+                                   [1.1 * 1.2 - 1, -0.1, 0.3])
+
+    def test_indices(self):
+        shuffled = shuffle_indices(7, 50, seed=0)
+        np.testing.assert_array_equal(np.sort(shuffled, axis=1), np.tile(np.arange(7), (50, 1)))
+        np.testing.assert_array_equal(shuffle_indices(7, 50, seed=0), shuffled)
+
+        blocks = block_indices(10, 20, block=3, seed=0)
+        self.assertEqual(blocks.shape, (20, 10))
+        steps = np.diff(blocks, axis=1)[:, [0, 1, 3, 4, 6, 7]]
+        self.assertTrue(np.all((steps == 1) | (steps == -9)))
+
+        positions = np.array([0, 1, 1, 1, 1, 0, -1, -1, 0, 0])
+        delayed = delay_indices(positions, 200, max_delay=2, seed=0)
+        self.assertEqual(delayed.shape, (200, 10))
+        # Bars 2-3 of the long and 7 of the short may be skipped, never their entries or other bars
+        skipped = delayed == 10
+        self.assertFalse(skipped[:, [0, 1, 4, 5, 6, 8, 9]].any())
+        self.assertEqual({tuple(row) for row in skipped[:, [2, 3, 7]].astype(int)},
+                         {(a, b, c) for a, b in [(0, 0), (1, 0), (1, 1)] for c in (0, 1)})
+        # Without the engine's entry bars the delays start at the entries
+        skipped = delay_indices(positions, 200, max_delay=2, seed=0, engine=False) == 10
+        self.assertFalse(skipped[:, [0, 3, 4, 5, 8, 9]].any())
+        self.assertEqual({tuple(row) for row in skipped[:, [1, 2, 6, 7]].astype(int)},
+                         {(a, b, c, d) for a, b in [(0, 0), (1, 0), (1, 1)]
+                          for c, d in [(0, 0), (1, 0), (1, 1)]})
+
+    def test_resample_statistics(self):
+        identity = np.arange(len(self.returns))[None]
+        expected = statistics(self.returns, self.held)
+        result = resample_statistics(self.returns, identity)
+        np.testing.assert_allclose(result['total_return'], expected['total_return'], rtol=1e-12)
+        np.testing.assert_allclose(result['max_drawdown'], expected['max_drawdown'], rtol=1e-12)
+
+        indices = block_indices(len(self.returns), 30, seed=4)
+        chunked = resample_statistics(self.returns, indices, max_bytes=1)
+        for i, row in enumerate(indices):
+            stats = statistics(self.returns[row], np.ones(len(row)))
+            self.assertAlmostEqual(chunked['total_return'][i], stats['total_return'][0], places=12)
+            self.assertAlmostEqual(chunked['max_drawdown'][i], stats['max_drawdown'][0], places=12)
+
+    def test_monte_carlo(self):
+        shuffled = monte_carlo(self.returns, self.held, 'shuffle', n=100, seed=2)
+        total_return = np.prod(1 + self.returns) - 1
+        np.testing.assert_allclose(shuffled['total_return'], total_return, rtol=1e-10)
+        self.assertGreater(np.ptp(shuffled['max_drawdown']), 0)
+
+        delayed = monte_carlo(self.returns, self.held, 'delay', n=100, seed=2, max_delay=0)
+        np.testing.assert_allclose(delayed['total_return'], total_return, rtol=1e-12)
+
+        # The chunks have their own seeds, whatever the number of workers
+        serial = monte_carlo(self.returns, self.held, 'bootstrap', n=300, seed=7, max_bytes=50_000)
+        parallel = monte_carlo(self.returns, self.held, 'bootstrap', n=300, seed=7,
+                               max_bytes=50_000, workers=2)
+        np.testing.assert_array_equal(parallel, serial)
+
+        with self.assertRaises(ValueError):
+            monte_carlo(self.returns, self.held, 'jackknife')
+
+    def test_portfolio(self):
+        result = self.portfolio.resample('delay', n=50, seed=0)
+        self.assertEqual(result.shape, (50, 4))
+        self.assertEqual(list(result.columns), [('Return (%)', 'a'), ('Return (%)', 'b'),
+                                                ('Max Drawdown (%)', 'a'),
+                                                ('Max Drawdown (%)', 'b')])
+        pdt.assert_frame_equal(self.portfolio.resample('delay', n=50, seed=0), result)
+        self.assertTrue((result['Max Drawdown (%)'] >= 0).all().all())
+
+        # Returns from the next opens delay from the entry bar
+        portfolio = Portfolio(self.frame, self.positions[['a']].set_axis(['EURUSD'], axis=1))
+        self.assertFalse(portfolio.engine_returns)
+        pdt.assert_frame_equal(portfolio.resample('delay', n=50, seed=0),
+                               distributions(portfolio.strat_rets, portfolio.positions, 'delay',
+                                             50, 0, engine=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
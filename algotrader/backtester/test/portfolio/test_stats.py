@@ -0,0 +1,123 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from unittest import mock
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+from src.portfolio import Portfolio, simulate
+from src.portfolio import stats
+from src.portfolio.stats import STATS, simulate_statistics, statistics, top
+from benchmarks.synthetic import make_ohlcv
+
+
+def reference(returns: np.ndarray, positions: np.ndarray, periods_per_year: float) -> dict:
+    """The statistics of one column, one pandas call at a time."""
+    r = pd.Series(returns).fillna(0)
+    equity = (1 + r).cumprod()
+    position = pd.Series(positions)
+    # Bars of the trade held before them, else of the one entered on them
+    previous = position.shift(1, fill_value=0)
+    starts = (position != 0) & (position != previous)
+    trade_ids = starts.cumsum().where((previous != 0) | (position != 0))
+    trade_ids[(previous != 0) & starts] -= 1
+    trade_returns = (1 + r).groupby(trade_ids).prod() - 1
+    wins, losses = trade_returns[trade_returns > 0], trade_returns[trade_returns <= 0]
+    return {
+        'total_return': equity.iloc[-1] - 1,
+        'max_drawdown': (1 - equity / equity.cummax().clip(lower=1)).max(),
+        'sharpe': r.mean() / r.std() * np.sqrt(periods_per_year),
+        'sortino': r.mean() / np.sqrt((r.clip(upper=0) ** 2).mean()) * np.sqrt(periods_per_year),
+        'volatility': r.std() * np.sqrt(periods_per_year),
+        'exposure': (position != 0).mean(),
+        'trades': starts.sum(),
+        'win_rate': len(wins) / len(trade_returns),
+        'profit_factor': wins.sum() / -losses.sum(),
+        'average_trade': trade_returns.mean(),
+    }
+
+
+class TestStatistics(unittest.TestCase):
+    def setUp(self) -> None:
+        df = make_ohlcv(1000, ['EURUSD', 'GBPUSD'], seed=5, volatility=0.2)
+        self.prices = [df[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+        rng = np.random.default_rng(2)
+        self.positions = np.repeat(rng.integers(-1, 2, (50, 8)), 20, axis=0)
+        self.symbols = np.arange(8) % 2
+        self.options = {'spread': 0.01, 'commission': 1e-4, 'stop_loss': [0.005, np.nan] * 4}
+
+    def test_against_pandas(self):
+        returns, held, _, _ = simulate(*self.prices, self.positions, self.symbols, **self.options)
+        result = statistics(returns, held, 24 * 365)
+        self.assertEqual(result.dtype, STATS)
+
+        for c in range(8):
+            for name, expected in reference(returns[:, c], held[:, c], 24 * 365).items():
+                with self.subTest(column=c, statistic=name):
+                    np.testing.assert_allclose(result[name][c], expected, rtol=1e-9)
+
+    def test_flips_and_flat_columns(self):
+        returns = np.array([[0.0, 0], [0.01, 0], [-0.02, 0], [0.03, 0], [0.01, 0]])
+        positions = np.array([[1, 0], [1, 0], [-1, 0], [-1, 0], [0, 0]])
+        result = statistics(returns, positions)
+        # The flip's bar is the long's exit, the short is out on the last bar
+        self.assertEqual(result['trades'][0], 2)
+        np.testing.assert_allclose(result['win_rate'][0], 0.5)
+        np.testing.assert_allclose(result['average_trade'][0],
+                                   ((1.01 * 0.98 - 1) + (1.03 * 1.01 - 1)) / 2)
+        np.testing.assert_allclose(result['exposure'][0], 0.8)
+        np.testing.assert_allclose(result['max_drawdown'][0], 1 - 1.01 * 0.98 / 1.01)
+
+        self.assertEqual(result['trades'][1], 0)
+        self.assertEqual(result['total_return'][1], 0)
+        for name in ('sharpe', 'sortino', 'win_rate', 'profit_factor', 'average_trade'):
+            self.assertTrue(np.isnan(result[name][1]), name)
+
+    def test_python_kernel(self):
+        returns, held, _, _ = simulate(*self.prices, self.positions, self.symbols, **self.options)
+        compiled = statistics(returns, held, 250)
+        with mock.patch.object(stats, 'statistics_kernel', stats.statistics_kernel.py_func):
+            python = statistics(returns, held, 250)
+        for name in STATS.names:
+            np.testing.assert_allclose(compiled[name], python[name], rtol=1e-13, err_msg=name)
+
+    def test_chunks_and_top(self):
+        returns, held, _, _ = simulate(*self.prices, self.positions, self.symbols, **self.options)
+        expected = statistics(returns, held)
+        # A chunk of 3 columns, the per column stops sliced with them
+        chunked = simulate_statistics(*self.prices, self.positions, self.symbols,
+                                      max_bytes=3 * 9 * 1000, **self.options)
+        for name in STATS.names:
+            np.testing.assert_array_equal(chunked[name], expected[name], err_msg=name)
+
+        best = top(expected, 'sharpe', 3)
+        np.testing.assert_array_equal(best, np.argsort(-expected['sharpe'])[:3])
+        worst = top(expected, 'max_drawdown', 2, ascending=True)
+        np.testing.assert_array_equal(worst,
+                                      np.argsort(expected['max_drawdown'], kind='stable')[:2])
+        with_nan = expected.copy()
+        with_nan['sharpe'][best[0]] = np.nan
+        self.assertNotIn(best[0], top(with_nan, 'sharpe', 7))
+
+
+class TestPortfolioStats(unittest.TestCase):
+    def test_from_signals(self):
+        df = make_ohlcv(1000, ['EURUSD', 'GBPUSD'], seed=5, volatility=0.2)
+        buy = df['close'] > df['close'].rolling(10).mean()
+        portfolio = Portfolio.from_signals(df, buy, ~buy)
+        result = portfolio.get_stats()
+
+        self.assertEqual(list(result.columns[:2]), ['Profit (%)', 'Profit ($)'])
+        self.assertIn('Max Drawdown (%)', result.columns)
+        # One trade per run of True positions
+        positions = portfolio.positions
+        entries = positions & ~positions.shift(fill_value=False)
+        pdt.assert_series_equal(result['Number of Trades'], entries.sum(), check_names=False)
+        pdt.assert_series_equal(portfolio.equity_curve().iloc[-1] / Portfolio.initial_balance - 1,
+                                result['Return (%)'] / 100, check_names=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
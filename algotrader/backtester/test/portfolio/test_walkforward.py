@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+from src.data import CandlePanel
+from src.portfolio.engine import simulate
+from src.portfolio.stats import statistics
+from src.portfolio.walkforward import WalkForward
+from benchmarks.synthetic import make_ohlcv
+
+
+def crossover(candles, fast: int, slow: int) -> pd.DataFrame:
+    close = candles['close']
+    return np.sign(close.rolling(fast).mean() - close.rolling(slow).mean()).fillna(0)
+
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self) -> None:
+        self.df = make_ohlcv(700, ['EURUSD', 'GBPUSD'], seed=5, volatility=0.2)
+        self.panel = CandlePanel.from_frame(self.df)
+        self.space = {'fast': [3, 5, 8], 'slow': [20, 40]}
+        self.options = {'spread': {'EURUSD': 0.01, 'GBPUSD': 0.02}, 'commission': 1e-4,
+                        'periods_per_year': 1}
+
+    def backtest(self, fast: int, slow: int, warmup: int) -> tuple[np.ndarray, np.ndarray]:
+        prices = [self.df[field].to_numpy() for field in ('open', 'high', 'low', 'close')]
+        positions = crossover(self.df, fast, slow).to_numpy()
+        positions[:warmup] = 0
+        returns, held, _, _ = simulate(*prices, positions, [0, 1], spread=[0.01, 0.02],
+                                       commission=1e-4)
+        return returns, held
+
+    def test_folds(self):
+        walk = WalkForward(crossover, self.space, train=200, test=100, warmup=40, workers=1)
+        self.assertEqual(walk.warmup, 40)
+        np.testing.assert_array_equal(walk.folds(500), [[40, 240, 240, 340], [140, 340, 340, 440],
+                                                        [240, 440, 440, 500]])
+        anchored = WalkForward(crossover, self.space, train=200, test=100, anchored=True, warmup=0,
+                               workers=1)
+        np.testing.assert_array_equal(anchored.folds(400)[:, :2], [[0, 200], [0, 300]])
+
+        with self.assertRaises(ValueError):
+            WalkForward(crossover, self.space, train=200, test=100, warmup=40, metric='win_rate')
+        with self.assertRaises(ValueError):
+            WalkForward(crossover, self.space, train=200, test=100, warmup=-1)
+        with self.assertRaises(ValueError):
+            WalkForward(crossover, self.space, train=800, test=100, warmup=40,
+                        workers=1).run(self.panel)
+
+    def test_against_refitting_every_fold(self):
+        for anchored, metric in [(False, 'sharpe'), (True, 'total_return'), (False, 'sortino')]:
+            walk = WalkForward(crossover, self.space, train=150, test=100, warmup=40,
+                               anchored=anchored, metric=metric, workers=1, batch_size=4,
+                               **self.options)
+            portfolio = walk.run(self.df)
+
+            runs = {(fast, slow): self.backtest(fast, slow, walk.warmup)
+                    for fast in self.space['fast'] for slow in self.space['slow']}
+            expected_returns = np.empty((0, 2))
+            expected_held = np.empty((0, 2))
+            folds = walk.folds(len(self.df))
+            for k, (train_start, train_end, test_start, test_end) in enumerate(folds):
+                scores = []
+                for returns, held in runs.values():
+                    stats = statistics(returns[train_start:train_end], held[train_start:train_end])
+                    scores.append(np.nan_to_num(stats[metric], nan=-np.inf))
+                best = np.argmax(scores, axis=0)
+                keys = list(runs)
+                for s, symbol in enumerate(['EURUSD', 'GBPUSD']):
+                    selection = walk.selections.loc[(k, symbol)]
+                    self.assertEqual(tuple(selection[['fast', 'slow']]), keys[best[s]])
+                    np.testing.assert_allclose(selection[metric], scores[best[s]][s], rtol=1e-9)
+                expected_returns = np.vstack([expected_returns, np.stack(
+                    [runs[keys[best[s]]][0][test_start:test_end, s] for s in range(2)], axis=1)])
+                expected_held = np.vstack([expected_held, np.stack(
+                    [runs[keys[best[s]]][1][test_start:test_end, s] for s in range(2)], axis=1)])
+
+            np.testing.assert_array_equal(portfolio.strat_rets.to_numpy(), expected_returns)
+            np.testing.assert_array_equal(portfolio.positions.to_numpy(), expected_held)
+            self.assertEqual(portfolio.strat_rets.index[0], self.df.index[walk.warmup + 150])
+            self.assertEqual(portfolio.strat_rets.index[-1], self.df.index[-1])
+
+    def test_processes(self):
+        serial = WalkForward(crossover, self.space, train=150, test=100, warmup=40, workers=1,
+                             **self.options)
+        parallel = WalkForward(crossover, self.space, train=150, test=100, warmup=40, workers=2,
+                               batch_size=1, **self.options)
+        pdt.assert_frame_equal(parallel.run(self.panel).strat_rets,
+                               serial.run(self.panel).strat_rets)
+        pdt.assert_frame_equal(parallel.selections, serial.selections)
+
+
+if __name__ == '__main__':
+    unittest.main()
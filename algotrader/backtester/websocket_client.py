@@ -3,6 +3,7 @@ import websockets
 import logging
 from src.utils.ticket import Ticket
 from src.handlers import MessageDispatcher, IndicatorHandler
+import src.indicators as Indicators
 
 
 class WebSocketClient:
@@ -33,6 +34,8 @@ class WebSocketClient:
             self.logger.info("Connected to server")
 
             await self._send_login(websocket)
+            # Load the indicators while waiting for the first requests
+            Indicators.warm_up()
 
             async for message in websocket:
                 await self.dispatcher.dispatch(message, websocket)
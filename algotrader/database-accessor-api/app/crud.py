@@ -4,6 +4,15 @@ from app.models import markets, candles
 from typing import Optional
 from datetime import datetime
 
+try:
+    from shared.candle_queries import aggregated_candles_sql
+except ImportError:
+    # Running from a checkout instead of the container, where ../shared is mounted
+    import os
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+    from shared.candle_queries import aggregated_candles_sql
+
 
 async def get_market_by_id(session, symbol_id: int):
     """
@@ -156,52 +165,7 @@ async def get_candles(
     :rtype: list[dict]
     """
 
-    sql = text("""
-        WITH RoundedCandles AS (
-            SELECT
-                date_trunc('day', timestamp) + INTERVAL '1 minute' * (
-                    ((EXTRACT(HOUR FROM timestamp)::integer * 60) + EXTRACT(MINUTE FROM timestamp)::integer) - 
-                    ((EXTRACT(HOUR FROM timestamp)::integer * 60 + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
-                ) AS rounded_timestamp,
-                open,
-                high,
-                low,
-                close,
-                volume,
-                ROW_NUMBER() OVER (
-                    PARTITION BY symbol_id, date_trunc('day', timestamp) + INTERVAL '1 minute' * (
-                        ((EXTRACT(HOUR FROM timestamp)::integer * 60) + EXTRACT(MINUTE FROM timestamp)::integer) - 
-                        ((EXTRACT(HOUR FROM timestamp)::integer * 60 + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
-                    )
-                    ORDER BY timestamp ASC
-                ) AS rn_asc,
-                ROW_NUMBER() OVER (
-                    PARTITION BY symbol_id, date_trunc('day', timestamp) + INTERVAL '1 minute' * (
-                        ((EXTRACT(HOUR FROM timestamp)::integer * 60) + EXTRACT(MINUTE FROM timestamp)::integer) - 
-                        ((EXTRACT(HOUR FROM timestamp)::integer * 60 + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
-                    )
-                    ORDER BY timestamp DESC
-                ) AS rn_desc
-            FROM candles
-            WHERE symbol_id = :symbol_id
-            AND (timestamp >= :start_date OR :start_date IS NULL)
-            AND (timestamp < :end_date OR :end_date IS NULL)
-        )
-        SELECT
-            rounded_timestamp AS timestamp,
-            MAX(open) FILTER (WHERE rn_asc = 1) AS open,
-            MAX(high) AS high,
-            MIN(low) AS low,
-            MAX(close) FILTER (WHERE rn_desc = 1) AS close,
-            SUM(volume) AS volume
-        FROM RoundedCandles
-        GROUP BY timestamp
-        ORDER BY timestamp {order_direction}
-        {limit_clause}
-    """.format(
-        order_direction="DESC" if limit else "ASC",
-        limit_clause="LIMIT :limit" if limit else ""
-    ))
+    sql = text(aggregated_candles_sql(limit=bool(limit)))
 
     start_date = datetime.fromisoformat(_start_date) if _start_date else None
     end_date = datetime.fromisoformat(_end_date) if _end_date else None
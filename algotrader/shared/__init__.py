@@ -0,0 +1 @@
+"""Code shared between the AlgoTrader Python services."""
@@ -0,0 +1,92 @@
+"""
+SQL used by both the database accessor API and the backtester's direct
+Postgres feed, so the two always aggregate candles the same way.
+"""
+import re
+
+AGGREGATED_CANDLES_SQL = """
+    WITH RoundedCandles AS (
+        SELECT
+            date_trunc('day', timestamp) + INTERVAL '1 minute' * (
+                ((EXTRACT(HOUR FROM timestamp)::integer * 60)
+                    + EXTRACT(MINUTE FROM timestamp)::integer)
+                - ((EXTRACT(HOUR FROM timestamp)::integer * 60
+                    + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
+            ) AS rounded_timestamp,
+            open,
+            high,
+            low,
+            close,
+            volume,
+            ROW_NUMBER() OVER (
+                PARTITION BY symbol_id, date_trunc('day', timestamp) + INTERVAL '1 minute' * (
+                    ((EXTRACT(HOUR FROM timestamp)::integer * 60)
+                        + EXTRACT(MINUTE FROM timestamp)::integer)
+                    - ((EXTRACT(HOUR FROM timestamp)::integer * 60
+                        + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
+                )
+                ORDER BY timestamp ASC
+            ) AS rn_asc,
+            ROW_NUMBER() OVER (
+                PARTITION BY symbol_id, date_trunc('day', timestamp) + INTERVAL '1 minute' * (
+                    ((EXTRACT(HOUR FROM timestamp)::integer * 60)
+                        + EXTRACT(MINUTE FROM timestamp)::integer)
+                    - ((EXTRACT(HOUR FROM timestamp)::integer * 60
+                        + EXTRACT(MINUTE FROM timestamp)::integer) % :timeframe)
+                )
+                ORDER BY timestamp DESC
+            ) AS rn_desc
+        FROM candles
+        WHERE symbol_id = :symbol_id
+        AND (timestamp >= :start_date OR :start_date IS NULL)
+        AND (timestamp < :end_date OR :end_date IS NULL)
+    )
+    SELECT
+        rounded_timestamp AS timestamp,
+        MAX(open) FILTER (WHERE rn_asc = 1) AS open,
+        MAX(high) AS high,
+        MIN(low) AS low,
+        MAX(close) FILTER (WHERE rn_desc = 1) AS close,
+        SUM(volume) AS volume
+    FROM RoundedCandles
+    GROUP BY timestamp
+    ORDER BY timestamp {order_direction}
+    {limit_clause}
+"""
+
+AGGREGATED_CANDLES_PARAMS = ['symbol_id', 'timeframe', 'start_date', 'end_date', 'limit']
+
+
+def aggregated_candles_sql(limit: bool = False) -> str:
+    """
+    Get the candle aggregation query with named (:name) parameters.
+
+    The query takes symbol_id, timeframe (minutes), start_date, end_date and,
+    if limit is set, limit. With a limit the newest candles are returned in
+    descending order and the caller has to reverse them.
+
+    :param limit: Whether the query should end with a LIMIT clause
+
+    :return: The SQL query
+    :rtype: str
+    """
+    return AGGREGATED_CANDLES_SQL.format(
+        order_direction="DESC" if limit else "ASC",
+        limit_clause="LIMIT :limit" if limit else ""
+    )
+
+
+def to_positional(sql: str, names: list[str] = None) -> str:
+    """
+    Replace :name parameters with the $1, $2, ... placeholders used by asyncpg.
+
+    :param sql: Query with named parameters
+    :param names: Parameter names in positional order
+
+    :return: The SQL query with positional parameters
+    :rtype: str
+    """
+    names = AGGREGATED_CANDLES_PARAMS if names is None else names
+    positions = {name: i + 1 for i, name in enumerate(names)}
+    pattern = re.compile(r'(?<!:):(' + '|'.join(map(re.escape, names)) + r')\b')
+    return pattern.sub(lambda match: f"${positions[match.group(1)]}", sql)
@@ -6,10 +6,10 @@ from datetime import datetime
 
 import pandas as pd
 
-# Import user indicators (works when run as a script)
+# Import the indicator catalog (works when run as a script)
 try:
     # If executed as a package module
-    from . import user_indicators as ui  # type: ignore
+    from . import catalog  # type: ignore
 except Exception:
     # Fallback to indicators in backtester/src/indicators
     THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,9 +20,9 @@ except Exception:
         if p not in sys.path:
             sys.path.insert(0, p)
     try:
-        import user_indicators as ui  # type: ignore
+        import catalog  # type: ignore
     except Exception as e:
-        raise ImportError(f"Failed to import user_indicators from {INDICATORS_DIR}") from e
+        raise ImportError(f"Failed to import catalog from {INDICATORS_DIR}") from e
 
 
 TF_ALIAS = {
@@ -84,40 +84,20 @@ def load_csv(data_dir: str, symbol: str, timeframe: str) -> pd.DataFrame:
     df.sort_index(inplace=True)
 
     # Standard expected columns from downloader: Open, High, Low, Close, Volume
-    # Map to mid_* for user's indicators
+    # Lower-cased, the field names of the indicator catalog
     rename_map = {}
     for col in df.columns:
         lc = col.lower()
-        if lc == 'open':
-            rename_map[col] = 'Open'
-        elif lc == 'high':
-            rename_map[col] = 'High'
-        elif lc == 'low':
-            rename_map[col] = 'Low'
-        elif lc == 'close':
-            rename_map[col] = 'Close'
-        elif lc == 'volume':
-            rename_map[col] = 'Volume'
+        if lc in ('open', 'high', 'low', 'close', 'volume'):
+            rename_map[col] = lc
     if rename_map:
         df.rename(columns=rename_map, inplace=True)
 
     # Coerce OHLCV to numeric
-    for col in ['Open','High','Low','Close','Volume']:
+    for col in ['open','high','low','close','volume']:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')
 
-    # Create mid_* aliases
-    if 'Close' in df.columns:
-        df['mid_c'] = df['Close']
-    if 'Open' in df.columns:
-        df['mid_o'] = df['Open']
-    if 'High' in df.columns:
-        df['mid_h'] = df['High']
-    if 'Low' in df.columns:
-        df['mid_l'] = df['Low']
-    if 'Volume' in df.columns:
-        df['volume'] = df['Volume']
-
     return df
 
 
@@ -128,44 +108,31 @@ def to_iso_no_z(dt: pd.Timestamp) -> str:
 
 
 def compute_indicator(df: pd.DataFrame, name: str, params: dict) -> list[dict]:
+    # The catalog's indicators return their outputs and leave df untouched
     name_u = name.strip().upper()
     out_rows: list[dict] = []
 
     if name_u == 'SMA':
         window = int(params.get('window', 20))
-        src = params.get('source', 'mid_c')
-        df2 = ui.SMA(df.copy(), column=src, period=window)
-        key = f'SMA_{window}'
-        for ts, val in df2[key].dropna().items():
+        src = params.get('source', 'close')
+        # mid_* names from before the columns were lower-cased
+        src = {'mid_o': 'open', 'mid_h': 'high', 'mid_l': 'low', 'mid_c': 'close'}.get(src, src)
+        df2 = catalog.SMA.run(df, source=src, period=window)
+        for ts, val in df2['SMA'].dropna().items():
             out_rows.append({ 'timestamp': to_iso_no_z(ts), 'sma': float(val) })
         return out_rows
 
     if name_u == 'RSI':
         length = int(params.get('length', 14))
-        # Try user's implementation first
-        try:
-            df2 = ui.RSI(df.copy(), n=length)
-        except Exception:
-            df2 = pd.DataFrame(index=df.index)
-        key = f'RSI_{length}'
-        series = None
-        if key in df2.columns:
-            series = df2[key]
-        else:
-            # fallback: first RSI_* column
-            rsi_cols = [c for c in df2.columns if str(c).upper().startswith('RSI_')]
-            if rsi_cols:
-                series = df2[rsi_cols[0]]
-        # If series missing or all NaN, compute robust RSI here with aligned index
-        if series is None or series.dropna().empty:
-            delta = df['mid_c'].diff()
-            gains = delta.clip(lower=0)
-            losses = (-delta).clip(lower=0)
-            alpha = 1.0 / length
-            avg_gain = gains.ewm(alpha=alpha, min_periods=length, adjust=False).mean()
-            avg_loss = losses.ewm(alpha=alpha, min_periods=length, adjust=False).mean()
-            rs = avg_gain / avg_loss
-            series = 100.0 - (100.0 / (1.0 + rs))
+        # Wilder's smoothing
+        delta = df['close'].diff()
+        gains = delta.clip(lower=0)
+        losses = (-delta).clip(lower=0)
+        alpha = 1.0 / length
+        avg_gain = gains.ewm(alpha=alpha, min_periods=length, adjust=False).mean()
+        avg_loss = losses.ewm(alpha=alpha, min_periods=length, adjust=False).mean()
+        rs = avg_gain / avg_loss
+        series = 100.0 - (100.0 / (1.0 + rs))
         for ts, val in series.dropna().items():
             out_rows.append({ 'timestamp': to_iso_no_z(ts), 'rsi': float(val) })
         return out_rows
@@ -173,7 +140,7 @@ def compute_indicator(df: pd.DataFrame, name: str, params: dict) -> list[dict]:
     if name_u in ('BBANDS', 'BOLLINGER', 'BOLLINGERBANDS'):
         n = int(params.get('length', 20))
         s = float(params.get('std', 2))
-        df2 = ui.BollingerBands(df.copy(), n=n, s=s)
+        df2 = catalog.BollingerBands.run(df, n=n, s=s)
         for ts, row in df2[['BB_LW','BB_MA','BB_UP']].dropna().iterrows():
             out_rows.append({
                 'timestamp': to_iso_no_z(ts),
@@ -187,7 +154,7 @@ def compute_indicator(df: pd.DataFrame, name: str, params: dict) -> list[dict]:
         n_slow = int(params.get('slow', 26))
         n_fast = int(params.get('fast', 12))
         n_signal = int(params.get('signal', 9))
-        df2 = ui.MACD(df.copy(), n_slow=n_slow, n_fast=n_fast, n_signal=n_signal)
+        df2 = catalog.MACD.run(df, n_slow=n_slow, n_fast=n_fast, n_signal=n_signal)
         for ts, row in df2[['MACD','SIGNAL','HIST']].dropna().iterrows():
             out_rows.append({
                 'timestamp': to_iso_no_z(ts),
@@ -197,13 +164,11 @@ def compute_indicator(df: pd.DataFrame, name: str, params: dict) -> list[dict]:
             })
         return out_rows
 
-    # Volume histogram (uses Volume or volume column)
+    # Volume histogram (uses the volume column)
     if name_u == 'VOL':
         vol_series = None
         if 'volume' in df.columns:
             vol_series = df['volume']
-        elif 'Volume' in df.columns:
-            vol_series = df['Volume']
         else:
             # If no volume column, synthesize zeros
             vol_series = pd.Series(0, index=df.index)
@@ -217,8 +182,6 @@ def compute_indicator(df: pd.DataFrame, name: str, params: dict) -> list[dict]:
         vol_series = None
         if 'volume' in df.columns:
             vol_series = df['volume']
-        elif 'Volume' in df.columns:
-            vol_series = df['Volume']
         else:
             vol_series = pd.Series(0, index=df.index)
         sma = vol_series.rolling(length, min_periods=length).mean()